@@ -1,7 +1,7 @@
-import React, { useState, useEffect } from 'react';
-import { Card, Input, Select, Slider, Button, Space, Row, Col, Typography, message, Collapse } from 'antd';
+import React, { useState, useEffect, useRef } from 'react';
+import { AutoComplete, Card, Input, Select, Slider, Button, Space, Row, Col, Typography, message, Collapse } from 'antd';
 import { SearchOutlined, FilterOutlined } from '@ant-design/icons';
-import { searchProperties } from '../services/propertyService';
+import { getProperty, searchProperties, suggestProperties, Suggestion } from '../services/propertyService';
 import { fetchAuthSession } from 'aws-amplify/auth';
 import { withAuthenticator } from '@aws-amplify/ui-react';
 import PropertyDetails from './PropertyDetails';
@@ -11,6 +11,9 @@ const { Title, Text, Paragraph } = Typography;
 const { Option } = Select;
 const { Panel } = Collapse;
 
+// Wait for a pause in typing before asking for suggestions
+const SUGGEST_DEBOUNCE_MS = 150;
+
 interface Property {
   id: string;
   title: string;
@@ -37,6 +40,8 @@ const PropertySearch: React.FC = () => {
   const [loading, setLoading] = useState(false);
   const [token, setToken] = useState<string>('');
   const [selectedProperty, setSelectedProperty] = useState<Property | null>(null);
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
+  const suggestTimer = useRef<ReturnType<typeof setTimeout>>();
   const [filters, setFilters] = useState<SearchFilters>({
     query: '',
     location: '',
@@ -90,7 +95,7 @@ const PropertySearch: React.FC = () => {
         bedrooms: filters.bedrooms,
         bathrooms: filters.bathrooms,
         amenities: filters.amenities?.join(',')
-      }, tokn);
+      }, tokn, { view: 'card' });
       setProperties(response.properties);
     } catch (error) {
       message.error('Failed to search properties. Please try again.');
@@ -100,6 +105,32 @@ const PropertySearch: React.FC = () => {
     }
   };
 
+  // Search results are cards, load the full property for the detail view
+  const handleSelectProperty = async (property: Property) => {
+    try {
+      setSelectedProperty({ ...property, ...(await getProperty(property.id, token)) });
+    } catch (error) {
+      message.error('Failed to load property details. Please try again.');
+      console.error('Error loading property:', error);
+    }
+  };
+
+  const handleQueryChange = (value: string) => {
+    setFilters({ ...filters, query: value });
+    clearTimeout(suggestTimer.current);
+    if (!value.trim() || !token) {
+      setSuggestions([]);
+      return;
+    }
+    suggestTimer.current = setTimeout(async () => {
+      try {
+        setSuggestions(await suggestProperties(value, token));
+      } catch (error) {
+        setSuggestions([]);
+      }
+    }, SUGGEST_DEBOUNCE_MS);
+  };
+
   const handlePriceRangeChange = (value: number | number[]) => {
     if (Array.isArray(value) && value.length === 2) {
       setFilters({ ...filters, priceRange: value as [number, number] });
@@ -137,15 +168,20 @@ const PropertySearch: React.FC = () => {
                 <Space direction="vertical" size="large" style={{ width: '100%' }}>
                   <Row gutter={[16, 16]}>
                     <Col span={24}>
-                      <Input
-                        placeholder="Search by title, description, or location"
-                        prefix={<SearchOutlined />}
+                      <AutoComplete
+                        style={{ width: '100%' }}
                         value={filters.query}
-                        onChange={(e) => setFilters({ ...filters, query: e.target.value })}
-                        onPressEnter={handleSearch}
-                        size="large"
-                        style={{ borderRadius: '6px' }}
-                      />
+                        options={suggestions.map((suggestion) => ({ value: suggestion.label, key: suggestion.id }))}
+                        onChange={handleQueryChange}
+                      >
+                        <Input
+                          placeholder="Search by title, description, or location"
+                          prefix={<SearchOutlined />}
+                          onPressEnter={handleSearch}
+                          size="large"
+                          style={{ borderRadius: '6px' }}
+                        />
+                      </AutoComplete>
                     </Col>
                     
                     <Col span={12}>
@@ -254,7 +290,7 @@ const PropertySearch: React.FC = () => {
                         />
                       ) : null
                     }
-                    onClick={() => setSelectedProperty(property)}
+                    onClick={() => handleSelectProperty(property)}
                   >
                     <Card.Meta
                       title={property.title}
@@ -77,10 +77,10 @@ const UserBookings: React.FC = () => {
                 </div>
                 <div className="luxstay-booking-property-info">
                   <div className="luxstay-booking-property-title">
-                    {booking.property_title}
+                    {booking.property?.title ?? booking.property_title}
                   </div>
                   <div className="luxstay-booking-property-location">
-                    {booking.property_location}
+                    {booking.property?.location ?? booking.property_location}
                   </div>
                 </div>
                 {booking.status === 'confirmed' && (
@@ -11,6 +11,14 @@ export interface Booking {
   status: 'pending' | 'confirmed' | 'cancelled';
   property_title: string;
   property_location: string;
+  // Current property data, present when listed with include=property
+  property?: {
+    title?: string;
+    location?: string;
+    price_per_night?: number;
+    bedrooms?: number;
+    bathrooms?: number;
+  };
   guest_details: {
     name: string;
     email: string;
@@ -61,7 +69,7 @@ export const getBookings = async (): Promise<Booking[]> => {
   const user = await getCurrentUser();
   const userId = user.username;
   // I want to use the userIID as a query paramater in the get request
-  const response = await fetch(`${config.apiUrl}/properties/booking?user_id=${userId}`, {
+  const response = await fetch(`${config.apiUrl}/properties/booking?user_id=${userId}&include=property`, {
     headers: {
       'Authorization': token || ''
     }
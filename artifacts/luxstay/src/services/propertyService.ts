@@ -9,6 +9,33 @@ interface SearchFilters {
   bedrooms?: number;
   bathrooms?: number;
   amenities?: string;
+  check_in?: number;
+  check_out?: number;
+  bounding_box?: {
+    top_left: GeoPoint;
+    bottom_right: GeoPoint;
+  };
+  near?: GeoPoint & { radius_km?: number };
+}
+
+interface GeoPoint {
+  lat: number;
+  lon: number;
+}
+
+type FacetName = 'price_per_night' | 'bedrooms' | 'bathrooms' | 'max_guests' | 'amenities' | 'location';
+
+interface FacetBucket {
+  value: string | number;
+  to?: number;
+  count: number;
+}
+
+interface SearchOptions {
+  view?: 'card' | 'detail';
+  sort?: 'distance';
+  clusters?: { precision: number };
+  facets?: true | FacetName[];
 }
 
 interface SearchResponse {
@@ -22,11 +49,18 @@ interface SearchResponse {
     bathrooms: number;
     amenities: string[];
     images: { content: string }[];
+    distance_km?: number;
   }>;
   total: number;
+  clusters?: Array<{
+    geohash: string;
+    count: number;
+    location: GeoPoint;
+  }>;
+  facets?: Partial<Record<FacetName, FacetBucket[]>>;
 }
 
-export const searchProperties = async (query: string, filters: SearchFilters, token: string): Promise<SearchResponse> => {
+export const searchProperties = async (query: string, filters: SearchFilters, token: string, options: SearchOptions = {}): Promise<SearchResponse> => {
   try {
     const response = await fetch(`${config.apiUrl}/properties/search`, {
       method: 'POST',
@@ -36,7 +70,8 @@ export const searchProperties = async (query: string, filters: SearchFilters, to
       },
       body: JSON.stringify({
         query,
-        filters
+        filters,
+        ...options
       })
     });
 
@@ -49,4 +84,38 @@ export const searchProperties = async (query: string, filters: SearchFilters, to
     console.error('Error searching properties:', error);
     throw error;
   }
-}; 
\ No newline at end of file
+}; 
+export interface Suggestion {
+  id: string;
+  label: string;
+}
+
+export const suggestProperties = async (prefix: string, token: string, size = 8): Promise<Suggestion[]> => {
+  const params = new URLSearchParams({ q: prefix, size: String(size) });
+  const response = await fetch(`${config.apiUrl}/properties/suggest?${params}`, {
+    headers: {
+      'Authorization': token
+    }
+  });
+
+  if (!response.ok) {
+    throw new Error('Failed to fetch suggestions');
+  }
+
+  const { suggestions } = await response.json();
+  return suggestions;
+};
+
+export const getProperty = async (propertyId: string, token: string) => {
+  const response = await fetch(`${config.apiUrl}/properties/${encodeURIComponent(propertyId)}`, {
+    headers: {
+      'Authorization': token
+    }
+  });
+
+  if (!response.ok) {
+    throw new Error('Failed to load property');
+  }
+
+  return await response.json();
+};
@@ -0,0 +1,17 @@
+from property_booking import booking
+from property_common import metrics, router
+from property_indexing import index
+from property_search import search
+
+# Single function serving every property API, deployed when the environment
+# sets single_function in cdk.json. Search, booking and indexing then share one
+# pool of warm (optionally provisioned) execution environments instead of
+# each cold starting on its own. Each module's routes and wire format are
+# unchanged, this handler only merges their route tables.
+
+ROUTES = router.merge(search.ROUTES, booking.ROUTES, index.ROUTES)
+
+
+@metrics.instrument('property_api')
+def handler(event, context):
+    return router.dispatch(ROUTES, event, context)
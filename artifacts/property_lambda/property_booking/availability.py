@@ -0,0 +1,19 @@
+import os
+
+# Stay validation for new bookings. Overlapping stays are rejected when the
+# booking is committed, by the per-night claims in property_booking.nights.
+
+SECONDS_PER_NIGHT = 86400
+# Longest stay accepted
+MAX_STAY_NIGHTS = int(os.environ.get('MAX_STAY_NIGHTS', '90'))
+
+
+def parse_stay(check_in, check_out):
+    # check_in / check_out are epoch seconds sent by the booking form
+    check_in = int(check_in)
+    check_out = int(check_out)
+    if round((check_out - check_in) / SECONDS_PER_NIGHT) < 1:
+        raise ValueError('check_out must be at least one night after check_in')
+    if check_out - check_in > MAX_STAY_NIGHTS * SECONDS_PER_NIGHT:
+        raise ValueError(f'Bookings are limited to {MAX_STAY_NIGHTS} nights')
+    return check_in, check_out
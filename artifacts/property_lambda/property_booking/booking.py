@@ -1,79 +1,67 @@
 import json
+import logging
 import os
-import boto3
 from datetime import datetime
-from boto3.dynamodb.conditions import Key
 from decimal import Decimal
+from property_booking import availability, booking_ids, booking_keys, history, nights
+from property_common import clients, http, metrics, property_lookup, router
 
-def handler(event, context):
-    # Get environment variables
-    region = os.environ['REGION']
-    table_name = os.environ['DYNAMODB_TABLE']
-    
-    # Initialize DynamoDB client
-    dynamodb = boto3.resource('dynamodb', region_name=region)
-    table = dynamodb.Table(table_name)
-    
-    # Handle different HTTP methods
-    http_method = event.get('httpMethod', 'POST')
-    
-    if http_method == 'GET':
-        return handle_get_bookings(event, table)
-    elif http_method == 'POST':
-        return handle_create_booking(event, table)
-    else:
-        return respond(None, {
-            'statusCode': 405,
-            'body': json.dumps({
-                'error': 'Method not allowed'
-            })
+LOG = logging.getLogger()
+LOG.setLevel(logging.INFO)
+
+# Current property fields added to bookings listed with include=property
+PROPERTY_SUMMARY_FIELDS = ['title', 'location', 'price_per_night', 'bedrooms', 'bathrooms']
+
+def endpoint(handle):
+    # Route for a handle_* function
+    def route(event, context):
+        # Reuse the DynamoDB table resource across warm invocations
+        with metrics.phase('client_init'):
+            table = clients.get_dynamodb_table(os.environ['DYNAMODB_TABLE'])
+        return handle(event, table)
+    return route
+
+def method_not_allowed(event, context):
+    return http.respond(None, {
+        'statusCode': 405,
+        'body': json.dumps({
+            'error': 'Method not allowed'
         })
+    })
+
+@metrics.instrument('property_booking')
+def handler(event, context):
+    return router.dispatch(ROUTES, event, context, fallback=method_not_allowed)
 
 def handle_get_bookings(event, table):
     try:
         # Get query parameters
         query_params = event.get('queryStringParameters', {}) or {}
-        user_id = query_params.get('user_id')
-        property_id = query_params.get('property_id')
-        
-        if not user_id and not property_id:
-            return respond(None, {
-                'statusCode': 400,
-                'body': json.dumps({
-                    'error': 'Either user_id or property_id must be provided'
-                })
-            })
+        with metrics.phase('dynamodb_query'):
+            bookings, next_token = history.query_bookings(table, query_params)
+        metrics.count('bookings', len(bookings))
+        if query_params.get('include') == 'property':
+            add_property_details(bookings)
         
-        # Build query conditions
-        if user_id and property_id:
-            # Get bookings for specific user and property
-            response = table.query(
-                IndexName='UserPropertyIndex',
-                KeyConditionExpression=Key('user_id').eq(user_id) & Key('property_id').eq(property_id)
-            )
-        elif user_id:
-            # Get all bookings for a user
-            response = table.query(
-                IndexName='UserIndex',
-                KeyConditionExpression=Key('user_id').eq(user_id)
-            )
-        else:
-            # Get all bookings for a property using the PropertyIndex
-            response = table.query(
-                IndexName='PropertyIndex',
-                KeyConditionExpression=Key('property_id').eq(property_id)
-            )
-        
-        return respond(None, {
+        return http.respond(None, {
             'statusCode': 200,
             'body': json.dumps({
-                'bookings': response.get('Items', []),
-                'count': len(response.get('Items', []))
-            }, cls=CustomJsonEncoder)
+                'bookings': bookings,
+                'count': len(bookings),
+                'next_token': next_token
+            }, cls=http.JsonEncoder)
+        })
+    
+    except history.InvalidRequest as e:
+        return http.respond(None, {
+            'statusCode': 400,
+            'body': json.dumps({
+                'error': str(e)
+            })
         })
-        
     except Exception as e:
-        return respond(None, {
+        LOG.exception("error=get_bookings_failed")
+        return http.respond(None, {
             'statusCode': 500,
             'body': json.dumps({
                 'error': str(e)
@@ -81,8 +69,8 @@ def handle_get_bookings(event, table):
         })
 
 def handle_create_booking(event, table):
-    # Parse request body
-    body = json.loads(event['body'])
+    # Parse request body, keeping prices as Decimal for DynamoDB
+    body = http.parse_body(event, parse_float=Decimal)
     property_id = body.get('property_id')
     user_id = body.get('user_id')
     check_in = body.get('check_in')
@@ -97,67 +85,47 @@ def handle_create_booking(event, table):
     
     # Validate input
     if not all([property_id, user_id, check_in, check_out, name, email, phone, total_price]):
-        return respond(None, {
+        return http.respond(None, {
             'statusCode': 400,
             'body': json.dumps({
                 'error': 'Missing required fields'
             })
         })
     
-    # Check for existing bookings
     try:
-        response = table.query(
-            IndexName='PropertyIndex',
-            KeyConditionExpression=Key('property_id').eq(property_id),
-            FilterExpression='#status = :status',
-            ExpressionAttributeNames={
-                '#status': 'status'
-            },
-            ExpressionAttributeValues={
-                ':status': 'confirmed'
-            }
-        )
-        
-        # Check for date conflicts
-        for booking in response.get('Items', []):
-            if (check_in <= booking['check_out'] and check_out >= booking['check_in']):
-                return respond(None, {
-                    'statusCode': 409,
-                    'body': json.dumps({
-                        'error': 'Property is already booked for these dates'
-                    })
-                })
-    except Exception as e:
-        return respond(None, {
-            'statusCode': 500,
+        check_in, check_out = availability.parse_stay(check_in, check_out)
+    except (TypeError, ValueError) as e:
+        return http.respond(None, {
+            'statusCode': 400,
             'body': json.dumps({
                 'error': str(e)
             })
         })
     
-    # Create new booking
-    booking_id = f"booking_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    # Create new booking, claiming every night in the same transaction
+    booking_id = booking_ids.new_booking_id()
     try:
-        table.put_item(
-            Item={
-                'booking_id': booking_id,
-                'property_id': property_id,
-                'user_id': user_id,
-                'check_in': check_in,
-                'check_out': check_out,
-                'guests': guests,
-                'status': 'confirmed',
-                'name': name,
-                'email': email,
-                'phone': phone,
-                'total_price': total_price,
-                'property_title': property_title,
-                'property_location': property_location,
-                'created_at': datetime.now().isoformat()
-            }
-        )
+        booking = booking_keys.with_keys({
+            'booking_id': booking_id,
+            'property_id': property_id,
+            'user_id': user_id,
+            'check_in': check_in,
+            'check_out': check_out,
+            'guests': guests,
+            'status': 'confirmed',
+            'name': name,
+            'email': email,
+            'phone': phone,
+            'total_price': total_price,
+            'property_title': property_title,
+            'property_location': property_location,
+            'created_at': datetime.now().isoformat()
+        })
+        with metrics.phase('commit'):
+            claimed = nights.commit_booking(clients.get_dynamodb_client(), table.name, os.environ['NIGHTS_TABLE'], booking)
+        metrics.count('nights', len(claimed))
         
-        return respond(None, {
+        return http.respond(None, {
             'statusCode': 201,
             'body': json.dumps({
                 'booking_id': booking_id,
@@ -165,31 +133,46 @@ def handle_create_booking(event, table):
             })
         })
     
+    except nights.BookingConflict as e:
+        metrics.count('booking_conflicts')
+        return http.respond(None, {
+            'statusCode': 409,
+            'body': json.dumps({
+                'error': str(e)
+            })
+        })
     except Exception as e:
-        return respond(None, {
+        LOG.exception("error=create_booking_failed")
+        return http.respond(None, {
             'statusCode': 500,
             'body': json.dumps({
                 'error': str(e)
             })
         })
 
-class CustomJsonEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super(CustomJsonEncoder, self).default(obj)
+def lookup_properties(property_ids):
+    # Property documents by id from the search index, {} when it can't be reached
+    if not property_ids or not os.environ.get('INDEX_NAME'):
+        return {}
+    try:
+        with metrics.phase('property_lookup'):
+            return property_lookup.get_properties(clients.get_opensearch_client(), os.environ['INDEX_NAME'], property_ids)
+    except Exception:
+        LOG.exception(f"error=property_lookup_failed , property_ids={len(property_ids)}")
+        return {}
+
+def add_property_details(bookings):
+    # Decorate bookings with the current property data in one _mget. Read
+    # paths only, creating a booking keeps the title and location sent with it
+    # so it never waits on OpenSearch.
+    properties = lookup_properties([booking['property_id'] for booking in bookings if booking.get('property_id')])
+    for booking in bookings:
+        document = properties.get(booking.get('property_id'))
+        if document:
+            booking['property'] = {field: document[field] for field in PROPERTY_SUMMARY_FIELDS if field in document}
+    return bookings
 
-def respond(err, res=None):
-    return {
-        "statusCode": "400" if err else res["statusCode"],
-        "body": json.dumps(err) if err else json.dumps(res, cls=CustomJsonEncoder),
-        "headers": {
-            "Access-Control-Allow-Origin": "*",
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Methods": "*",
-            "Access-Control-Allow-Headers": "Content-Type",
-            "Access-Control-Allow-Credentials": "*",
-        },
-    }
\ No newline at end of file
+ROUTES = {
+    'GET /properties/booking': endpoint(handle_get_bookings),
+    'POST /properties/booking': endpoint(handle_create_booking),
+}
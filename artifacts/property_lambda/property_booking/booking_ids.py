@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+# Booking IDs are ULIDs: a 48 bit millisecond timestamp followed by 80 random
+# bits, Crockford base32 encoded. They stay unique at high write rates, sort by
+# creation time, and hash evenly across DynamoDB partitions as a partition key.
+# IDs created before the switch look like booking_YYYYmmddHHMMSS and are still
+# understood by parse_booking_id.
+
+PREFIX = 'booking_'
+ENCODING = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+DECODING = {c: i for i, c in enumerate(ENCODING)}
+ULID_LENGTH = 26
+LEGACY_FORMAT = '%Y%m%d%H%M%S'
+
+BookingId = namedtuple('BookingId', ['booking_id', 'kind', 'created_at'])
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_random = 0
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        chars.append(ENCODING[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def _decode(text):
+    value = 0
+    for char in text.upper():
+        value = (value << 5) | DECODING[char]
+    return value
+
+
+def new_ulid(now_ms=None):
+    # Monotonic within a process: IDs minted in the same millisecond
+    # increment the random part instead of drawing a new one
+    global _last_ms, _last_random
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    with _lock:
+        if now_ms <= _last_ms:
+            now_ms = _last_ms
+            _last_random = (_last_random + 1) & ((1 << 80) - 1)
+            if _last_random == 0:
+                # The random part wrapped around, move on to the next millisecond
+                now_ms = _last_ms = _last_ms + 1
+        else:
+            _last_ms = now_ms
+            _last_random = int.from_bytes(os.urandom(10), 'big')
+        value = (now_ms << 80) | _last_random
+    return _encode(value, ULID_LENGTH)
+
+
+def new_booking_id():
+    return PREFIX + new_ulid()
+
+
+def min_booking_id(created_at):
+    # Smallest booking ID minted at or after created_at, for range reads
+    return PREFIX + _encode(int(created_at.timestamp() * 1000) << 80, ULID_LENGTH)
+
+
+def parse_booking_id(booking_id):
+    if not booking_id or not booking_id.startswith(PREFIX):
+        raise ValueError(f'Invalid booking id: {booking_id}')
+    value = booking_id[len(PREFIX):]
+    if len(value) == ULID_LENGTH and all(c in DECODING for c in value.upper()):
+        created_ms = _decode(value) >> 80
+        return BookingId(booking_id, 'ulid', datetime.fromtimestamp(created_ms / 1000, tz=timezone.utc))
+    try:
+        # Legacy IDs used the lambda's clock, which runs in UTC
+        created_at = datetime.strptime(value, LEGACY_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise ValueError(f'Invalid booking id: {booking_id}')
+    # strptime also accepts unpadded fields, legacy IDs were always zero padded
+    if created_at.strftime(LEGACY_FORMAT) != value:
+        raise ValueError(f'Invalid booking id: {booking_id}')
+    return BookingId(booking_id, 'legacy', created_at)
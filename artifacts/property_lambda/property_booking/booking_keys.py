@@ -0,0 +1,30 @@
+# Key layout of the bookings table and the access patterns it serves:
+#
+#   booking by id                       table              booking_id + property_id
+#   a user's bookings, newest first     BookingsByUser     user_id + created_at
+#   a user's bookings of one property   BookingsByUser     + property_id filter
+#   a property's bookings by status     BookingsByProperty property_id + stay_key
+#     and check_in range
+#
+# stay_key is the composite "<status>#<check_in>" so status and date range are
+# both answered by the sort key. Both indexes project only the summary
+# attributes used by list views; full bookings are read from the table.
+
+BOOKINGS_BY_USER_INDEX = 'BookingsByUser'
+BOOKINGS_BY_PROPERTY_INDEX = 'BookingsByProperty'
+
+SUMMARY_FIELDS = [
+    'booking_id', 'property_id', 'user_id', 'check_in', 'check_out', 'guests', 'status',
+    'total_price', 'property_title', 'property_location', 'created_at'
+]
+
+
+def stay_key(status, check_in):
+    # Zero padded so string order matches check_in order
+    return f'{status}#{int(check_in):010d}'
+
+
+def with_keys(booking):
+    # Add the derived index attributes to a booking item
+    booking['stay_key'] = stay_key(booking['status'], booking['check_in'])
+    return booking
@@ -0,0 +1,155 @@
+import base64
+import json
+import os
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from property_booking.booking_keys import BOOKINGS_BY_PROPERTY_INDEX, BOOKINGS_BY_USER_INDEX, SUMMARY_FIELDS, stay_key
+from property_common import clients
+
+# Paginated booking history reads. Each request returns at most `limit`
+# bookings plus an opaque next_token wrapping DynamoDB's LastEvaluatedKey.
+# Date ranges and status are applied to the index sort keys where the layout
+# allows it. The indexes only hold the summary attributes used by list views;
+# view=full reads the remaining attributes from the table in one batch.
+
+DEFAULT_LIMIT = int(os.environ.get('BOOKINGS_DEFAULT_LIMIT', '25'))
+MAX_LIMIT = int(os.environ.get('BOOKINGS_MAX_LIMIT', '100'))
+# Upper bound on DynamoDB calls per request when filters drop items
+MAX_QUERY_CALLS = int(os.environ.get('BOOKINGS_MAX_QUERY_CALLS', '5'))
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class InvalidRequest(ValueError):
+    pass
+
+
+def encode_token(last_key):
+    if not last_key:
+        return None
+    serialized = {k: _serializer.serialize(v) for k, v in last_key.items()}
+    return base64.urlsafe_b64encode(json.dumps(serialized, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_token(token):
+    try:
+        serialized = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        return {k: _deserializer.deserialize(v) for k, v in serialized.items()}
+    except (ValueError, TypeError, AttributeError):
+        raise InvalidRequest('Invalid next_token')
+
+
+def _limit(value):
+    if value is None:
+        return DEFAULT_LIMIT
+    try:
+        return max(1, min(int(value), MAX_LIMIT))
+    except ValueError:
+        raise InvalidRequest('limit must be a number')
+
+
+def _epoch(value, name):
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidRequest(f'{name} must be epoch seconds')
+
+
+def _range(key, lower, upper):
+    if lower is not None and upper is not None:
+        return key.between(lower, upper)
+    if lower is not None:
+        return key.gte(lower)
+    if upper is not None:
+        return key.lte(upper)
+    return None
+
+
+def build_query(params):
+    # Pick the index and key condition serving the requested access pattern
+    user_id = params.get('user_id')
+    property_id = params.get('property_id')
+    status = params.get('status')
+    filters = []
+
+    if user_id:
+        # Newest bookings first
+        key_condition = Key('user_id').eq(user_id)
+        created = _range(Key('created_at'), params.get('created_from'), params.get('created_to'))
+        query_args = {
+            'IndexName': BOOKINGS_BY_USER_INDEX,
+            'KeyConditionExpression': key_condition & created if created is not None else key_condition,
+            'ScanIndexForward': False
+        }
+        if property_id:
+            filters.append(Attr('property_id').eq(property_id))
+        if status:
+            filters.append(Attr('status').eq(status))
+    else:
+        key_condition = Key('property_id').eq(property_id)
+        check_in_from = _epoch(params['check_in_from'], 'check_in_from') if params.get('check_in_from') else None
+        check_in_to = _epoch(params['check_in_to'], 'check_in_to') if params.get('check_in_to') else None
+        if status:
+            # stay_key is "<status>#<check_in>", both go into the key condition
+            key_condition = key_condition & Key('stay_key').between(
+                stay_key(status, check_in_from or 0), stay_key(status, check_in_to or 9999999999))
+        else:
+            check_in = _range(Attr('check_in'), check_in_from, check_in_to)
+            if check_in is not None:
+                filters.append(check_in)
+        query_args = {
+            'IndexName': BOOKINGS_BY_PROPERTY_INDEX,
+            'KeyConditionExpression': key_condition
+        }
+
+    if filters:
+        condition = filters[0]
+        for extra in filters[1:]:
+            condition = condition & extra
+        query_args['FilterExpression'] = condition
+
+    names = {f'#f{i}': field for i, field in enumerate(SUMMARY_FIELDS)}
+    query_args['ProjectionExpression'] = ', '.join(names)
+    query_args['ExpressionAttributeNames'] = names
+    return query_args
+
+
+def load_full_bookings(table, bookings):
+    # Replace index summaries with the full table items, keeping their order
+    keys = [{'booking_id': b['booking_id'], 'property_id': b['property_id']} for b in bookings]
+    found = {}
+    # BatchGetItem reads at most 100 keys per call
+    for start in range(0, len(keys), 100):
+        request = {table.name: {'Keys': keys[start:start + 100]}}
+        while request:
+            response = clients.get_dynamodb_resource().batch_get_item(RequestItems=request)
+            for item in response.get('Responses', {}).get(table.name, []):
+                found[(item['booking_id'], item['property_id'])] = item
+            request = response.get('UnprocessedKeys')
+    return [found.get((b['booking_id'], b['property_id']), b) for b in bookings]
+
+
+def query_bookings(table, params):
+    # Return (bookings, next_token) for one page of booking history
+    if not params.get('user_id') and not params.get('property_id'):
+        raise InvalidRequest('Either user_id or property_id must be provided')
+    limit = _limit(params.get('limit'))
+    query_args = build_query(params)
+    if params.get('next_token'):
+        query_args['ExclusiveStartKey'] = decode_token(params['next_token'])
+
+    bookings = []
+    last_key = None
+    for _ in range(MAX_QUERY_CALLS):
+        # Asking only for what is still missing keeps LastEvaluatedKey exact
+        query_args['Limit'] = limit - len(bookings)
+        response = table.query(**query_args)
+        bookings.extend(response.get('Items', []))
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key or len(bookings) >= limit:
+            break
+        query_args['ExclusiveStartKey'] = last_key
+    if bookings and params.get('view') == 'full':
+        bookings = load_full_bookings(table, bookings)
+    return bookings, encode_token(last_key)
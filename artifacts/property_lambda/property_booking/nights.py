@@ -0,0 +1,86 @@
+import random
+import time
+from datetime import datetime, timezone
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from property_booking.availability import SECONDS_PER_NIGHT
+from property_common import metrics
+
+# Bookings are committed with a single TransactWriteItems call: the booking
+# row in the bookings table plus one claim item per night in the nights table,
+# each guarded by attribute_not_exists. Overlapping requests therefore fail in
+# one round trip without reading existing bookings first.
+
+# Retries when a concurrent transaction touched the same nights
+TRANSACTION_RETRIES = 3
+
+_serializer = TypeSerializer()
+
+
+class BookingConflict(Exception):
+    pass
+
+
+def stay_nights(check_in, check_out):
+    # Booking dates are local midnights in epoch seconds, rounding to the
+    # closest UTC midnight recovers the calendar day for any UTC offset.
+    # The check_out day is not claimed so it can be the next guest's check_in.
+    first_night = round(check_in / SECONDS_PER_NIGHT)
+    last_night = round(check_out / SECONDS_PER_NIGHT)
+    return [
+        datetime.fromtimestamp(night * SECONDS_PER_NIGHT, tz=timezone.utc).strftime('%Y-%m-%d')
+        for night in range(first_night, last_night)
+    ]
+
+
+def _serialize(item):
+    return {k: _serializer.serialize(v) for k, v in item.items() if v is not None}
+
+
+def _claims_conflicted(error):
+    # The first cancellation reason belongs to the booking row, the rest to night claims
+    reasons = error.response.get('CancellationReasons', [])
+    return any(reason.get('Code') == 'ConditionalCheckFailed' for reason in reasons[1:])
+
+
+def _transaction_conflicted(error):
+    reasons = error.response.get('CancellationReasons', [])
+    return any(reason.get('Code') == 'TransactionConflict' for reason in reasons)
+
+
+def commit_booking(client, table_name, nights_table_name, booking):
+    # Atomically write the booking and claim each of its nights
+    nights = stay_nights(booking['check_in'], booking['check_out'])
+    transact_items = [{
+        'Put': {
+            'TableName': table_name,
+            'Item': _serialize(booking),
+            'ConditionExpression': 'attribute_not_exists(booking_id)'
+        }
+    }]
+    for night in nights:
+        transact_items.append({
+            'Put': {
+                'TableName': nights_table_name,
+                'Item': _serialize({
+                    'property_id': booking['property_id'],
+                    'night': night,
+                    'booking_id': booking['booking_id']
+                }),
+                'ConditionExpression': 'attribute_not_exists(night)'
+            }
+        })
+
+    for attempt in range(TRANSACTION_RETRIES + 1):
+        try:
+            client.transact_write_items(TransactItems=transact_items)
+            return nights
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            if _claims_conflicted(e):
+                raise BookingConflict('Property is already booked for these dates')
+            if not _transaction_conflicted(e) or attempt == TRANSACTION_RETRIES:
+                raise
+            metrics.count('transaction_retries')
+            time.sleep(random.uniform(0, 0.05 * (2 ** attempt)))
@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from property_common import clients
+
+# Asyncio runtime for handlers that fan out to several downstream services.
+# Each thread gets one event loop that lives as long as the execution
+# environment (Lambda runs invocations on a single thread, so one loop), and
+# async clients bound to it keep their connection pools across invocations
+# like the sync ones in clients. boto3 has no asyncio API, its calls run on
+# the loop's worker pool of AIO_MAX_CONCURRENCY threads, which also bounds
+# how many of them are in flight; native coroutines share a semaphore of the
+# same size. Every downstream call gets a timeout. A timed out thread call is
+# abandoned, not interrupted, and finishes in the background.
+
+AIO_MAX_CONCURRENCY = int(os.environ.get('AIO_MAX_CONCURRENCY', '16'))
+AIO_CALL_TIMEOUT = float(os.environ.get('AIO_CALL_TIMEOUT', '5'))
+
+_local = threading.local()
+
+
+def _runtime():
+    runtime = getattr(_local, 'runtime', None)
+    if runtime is None:
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=AIO_MAX_CONCURRENCY, thread_name_prefix='aio'))
+        runtime = _local.runtime = {'loop': loop, 'semaphore': None}
+    return runtime
+
+
+def run(coroutine):
+    # Run a coroutine to completion on this thread's persistent loop
+    return _runtime()['loop'].run_until_complete(coroutine)
+
+
+def _semaphore():
+    # Created on first use so it belongs to the running loop
+    runtime = _runtime()
+    if runtime['semaphore'] is None:
+        runtime['semaphore'] = asyncio.Semaphore(AIO_MAX_CONCURRENCY)
+    return runtime['semaphore']
+
+
+async def bounded(awaitable, timeout=None):
+    # Await a native coroutine within the concurrency cap and a timeout
+    async with _semaphore():
+        return await asyncio.wait_for(awaitable, timeout or AIO_CALL_TIMEOUT)
+
+
+def submit(fn, *args, **kwargs):
+    # Start a blocking call on a worker thread right away and return its
+    # future, so it runs while the caller keeps going. The request's metrics
+    # context is copied to the thread.
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(None, functools.partial(context.run, fn, *args, **kwargs))
+
+
+async def call(fn, *args, timeout=None, **kwargs):
+    # Run a blocking call on a worker thread and await it with a timeout
+    return await asyncio.wait_for(submit(fn, *args, **kwargs), timeout or AIO_CALL_TIMEOUT)
+
+
+async def settle(futures, timeout=None):
+    # Wait for started calls, giving up on the ones still running after the timeout
+    futures = [future for future in futures if future is not None]
+    if not futures:
+        return 0
+    _, pending = await asyncio.wait(futures, timeout=timeout or AIO_CALL_TIMEOUT)
+    for future in futures:
+        if future.done() and not future.cancelled():
+            # Retrieve failures so the loop doesn't report them, callers log their own
+            future.exception()
+    return len(pending)
+
+
+async def opensearch(method, timeout=None, **kwargs):
+    # Await an OpenSearch API call (search, msearch, ...) on the async client,
+    # or on the sync client in a worker thread without aiohttp
+    timeout = timeout or clients.OPENSEARCH_TIMEOUT
+    client = clients.get_async_opensearch_client()
+    if client is not None:
+        return await bounded(getattr(client, method)(**kwargs), timeout)
+    return await call(getattr(clients.get_opensearch_client(), method), timeout=timeout, **kwargs)
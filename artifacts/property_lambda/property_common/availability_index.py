@@ -0,0 +1,108 @@
+import os
+import time
+from datetime import datetime
+
+# Booked date ranges kept on each property document so search can drop
+# unavailable properties in the same query (see search_filter). Every
+# confirmed booking adds its [check_in, check_out) stay to booked_ranges as an
+# epoch_second date_range, and its id to booked_ids at the same position. The
+# id makes replays idempotent and lets a cancellation remove its own range.
+# Stays that have already ended are pruned whenever the document is updated.
+# Changes arrive from the bookings table stream (property_indexing.booking_sync).
+
+BOOKED_RANGES_FIELD = 'booked_ranges'
+BOOKED_IDS_FIELD = 'booked_ids'
+BOOKING_COUNT_FIELD = 'booking_count'
+AVAILABILITY_FIELDS = [BOOKED_RANGES_FIELD, BOOKED_IDS_FIELD, BOOKING_COUNT_FIELD]
+UPDATE_RETRIES = int(os.environ.get('AVAILABILITY_UPDATE_RETRIES', '3'))
+
+# Applies a batch of stay changes for one property. params.add holds
+# {booking_id, range} for confirmed bookings, params.remove booking ids that
+# were cancelled or deleted. booking_count only grows when an id is recorded
+# for the first time, so replays leave it alone. A change bumps updated_at so
+# index migrations catch up on it.
+APPLY_BOOKINGS_SCRIPT = """
+if (ctx._source.booked_ids == null) { ctx._source.booked_ids = []; ctx._source.booked_ranges = []; }
+if (ctx._source.booking_count == null) { ctx._source.booking_count = 0; }
+boolean changed = false;
+for (int i = ctx._source.booked_ranges.size() - 1; i >= 0; i--) {
+  if (ctx._source.booked_ranges[i].lt <= params.now) { ctx._source.booked_ranges.remove(i); ctx._source.booked_ids.remove(i); changed = true; }
+}
+for (def booking_id : params.remove) {
+  int i = ctx._source.booked_ids.indexOf(booking_id);
+  if (i >= 0) { ctx._source.booked_ids.remove(i); ctx._source.booked_ranges.remove(i); changed = true; }
+}
+for (def stay : params.add) {
+  if (!ctx._source.booked_ids.contains(stay.booking_id) && stay.range.lt > params.now) {
+    ctx._source.booked_ids.add(stay.booking_id); ctx._source.booked_ranges.add(stay.range);
+    ctx._source.booking_count += 1; changed = true;
+  }
+}
+if (changed) { ctx._source.updated_at = params.updated_at; } else { ctx.op = 'noop'; }
+"""
+
+# Replaces a property document but keeps the availability it has built up,
+# used by indexing so a re-import doesn't forget existing bookings
+REPLACE_DOCUMENT_SCRIPT = """
+Map kept = new HashMap();
+for (def field : params.keep) { if (ctx._source.containsKey(field)) { kept.put(field, ctx._source[field]); } }
+ctx._source.clear(); ctx._source.putAll(params.doc); ctx._source.putAll(kept);
+"""
+
+
+class InvalidStay(ValueError):
+    pass
+
+
+def stay_range(check_in, check_out):
+    try:
+        check_in, check_out = int(check_in), int(check_out)
+    except (TypeError, ValueError):
+        raise InvalidStay('check_in and check_out must be epoch seconds')
+    if check_out <= check_in:
+        raise InvalidStay('check_out must be after check_in')
+    return {'gte': check_in, 'lt': check_out}
+
+
+def search_filter(check_in, check_out):
+    # Matches properties with no booked range overlapping the stay. Ranges are
+    # half open so a check_out on the requested check_in day is not a clash.
+    stay = stay_range(check_in, check_out)
+    return {'bool': {'must_not': [{'range': {BOOKED_RANGES_FIELD: {
+        **stay, 'relation': 'intersects', 'format': 'epoch_second'
+    }}}]}}
+
+
+def bookings_script(adds, removes, now=None):
+    # adds are confirmed bookings, removes booking ids
+    now = int(now or time.time())
+    return {'source': APPLY_BOOKINGS_SCRIPT, 'lang': 'painless', 'params': {
+        'now': now,
+        'updated_at': datetime.utcfromtimestamp(now).isoformat(),
+        'add': [{'booking_id': booking['booking_id'],
+                 'range': stay_range(booking['check_in'], booking['check_out'])} for booking in adds],
+        'remove': list(removes)
+    }}
+
+
+def booking_script(booking, now=None):
+    if booking.get('status', 'confirmed') == 'confirmed':
+        return bookings_script([booking], [], now)
+    return bookings_script([], [booking['booking_id']], now)
+
+
+def bookings_action(index_name, property_id, adds, removes, now=None):
+    # Bulk action applying several stay changes to one property document
+    return {'_op_type': 'update', '_index': index_name, '_id': property_id,
+            'script': bookings_script(adds, removes, now), 'retry_on_conflict': UPDATE_RETRIES}
+
+
+def replace_document_action(index_name, doc):
+    # Bulk action indexing doc as a whole, preserving booked ranges. The
+    # script also builds new documents (scripted_upsert from an empty
+    # upsert), so the document is only sent once.
+    return {'_op_type': 'update', '_index': index_name, '_id': doc['property_id'],
+            'script': {'source': REPLACE_DOCUMENT_SCRIPT, 'lang': 'painless',
+                       'params': {'doc': doc, 'keep': AVAILABILITY_FIELDS}},
+            'scripted_upsert': True,
+            'upsert': {}}
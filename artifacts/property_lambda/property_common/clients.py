@@ -0,0 +1,204 @@
+import os
+import threading
+from urllib.parse import urlparse
+from property_common import metrics
+
+# Shared AWS / OpenSearch clients for the property lambdas.
+# Every client is built lazily on first use and kept for the lifetime of the
+# execution environment, so warm invocations skip credential resolution, TLS
+# handshakes and client construction. The SDKs themselves are imported on
+# first use as well, so cold starts only pay for the ones a request touches.
+
+OPENSEARCH_SERVICE = 'aoss'
+OPENSEARCH_POOL_SIZE = int(os.environ.get('OPENSEARCH_POOL_SIZE', '10'))
+OPENSEARCH_TIMEOUT = int(os.environ.get('OPENSEARCH_TIMEOUT', '10'))
+AWS_POOL_SIZE = int(os.environ.get('AWS_POOL_SIZE', '10'))
+
+_LOCK = threading.RLock()
+_CLIENTS = {}
+
+
+def get_region():
+    return os.environ.get('REGION') or os.environ.get('AWS_REGION')
+
+
+def _get_or_create(name, factory):
+    client = _CLIENTS.get(name)
+    if client is None:
+        with _LOCK:
+            client = _CLIENTS.get(name)
+            if client is None:
+                client = factory()
+                _CLIENTS[name] = client
+    return client
+
+
+def reset():
+    # Drop every cached client, the next call rebuilds them
+    with _LOCK:
+        _CLIENTS.clear()
+
+
+def get_session():
+    import boto3
+
+    return _get_or_create('session', lambda: boto3.Session(region_name=get_region()))
+
+
+def _aws_config():
+    from botocore.config import Config
+
+    return Config(max_pool_connections=AWS_POOL_SIZE, tcp_keepalive=True)
+
+
+def _count_calls(parsed=None, model=None, **kwargs):
+    # Calls and SDK retries per service for the current request's metrics
+    service = model.service_model.endpoint_prefix if model else 'aws'
+    metrics.count(f'{service}_calls')
+    retries = ((parsed or {}).get('ResponseMetadata') or {}).get('RetryAttempts', 0)
+    if retries:
+        metrics.count(f'{service}_retries', retries)
+
+
+def _metered(client):
+    client.meta.events.register('after-call', _count_calls)
+    return client
+
+
+def _create_aws_client(service):
+    return _metered(get_session().client(service, config=_aws_config()))
+
+
+def get_s3_client():
+    return _get_or_create('s3', lambda: _create_aws_client('s3'))
+
+
+def get_dynamodb_client():
+    return _get_or_create('dynamodb', lambda: _create_aws_client('dynamodb'))
+
+
+def _create_dynamodb_resource():
+    resource = get_session().resource('dynamodb', config=_aws_config())
+    _metered(resource.meta.client)
+    return resource
+
+
+def get_dynamodb_resource():
+    return _get_or_create('dynamodb_resource', _create_dynamodb_resource)
+
+
+def get_dynamodb_table(table_name):
+    return _get_or_create(f'dynamodb_table/{table_name}', lambda: get_dynamodb_resource().Table(table_name))
+
+
+def get_lambda_client():
+    return _get_or_create('lambda', lambda: _create_aws_client('lambda'))
+
+
+def _opensearch_auth():
+    from requests_aws4auth import AWS4Auth
+
+    # botocore refreshes temporary credentials ahead of their expiry, and
+    # AWS4Auth re-reads the frozen credentials on every request so the
+    # signing key is regenerated whenever they rotate.
+    credentials = get_session().get_credentials()
+    return AWS4Auth(region=get_region(), service=OPENSEARCH_SERVICE, refreshable_credentials=credentials)
+
+
+def _metered_connection_class():
+    from opensearchpy import RequestsHttpConnection
+
+    class MeteredConnection(RequestsHttpConnection):
+        # Every HTTP attempt, the transport's retries after failed attempts included
+        def perform_request(self, *args, **kwargs):
+            metrics.count('opensearch_requests')
+            try:
+                return super().perform_request(*args, **kwargs)
+            except Exception:
+                metrics.count('opensearch_errors')
+                raise
+
+    return MeteredConnection
+
+
+def _create_opensearch_client():
+    from opensearchpy import OpenSearch
+
+    connection_class = _metered_connection_class()
+    endpoint = os.environ['OPENSEARCH_ENDPOINT']
+    if endpoint.startswith('http://'):
+        # Local OpenSearch container (benchmarks), no TLS or request signing
+        local = urlparse(endpoint)
+        return OpenSearch(
+            hosts=[{'host': local.hostname, 'port': local.port or 9200}],
+            use_ssl=False,
+            connection_class=connection_class,
+            pool_maxsize=OPENSEARCH_POOL_SIZE,
+            timeout=OPENSEARCH_TIMEOUT
+        )
+    return OpenSearch(
+        hosts=[{'host': endpoint, 'port': 443}],
+        http_auth=_opensearch_auth(),
+        use_ssl=True,
+        verify_certs=True,
+        connection_class=connection_class,
+        pool_maxsize=OPENSEARCH_POOL_SIZE,
+        timeout=OPENSEARCH_TIMEOUT
+    )
+
+
+def get_opensearch_client():
+    return _get_or_create('opensearch', _create_opensearch_client)
+
+
+def _metered_async_connection_class():
+    from opensearchpy import AsyncHttpConnection
+
+    class MeteredAsyncConnection(AsyncHttpConnection):
+        async def perform_request(self, *args, **kwargs):
+            metrics.count('opensearch_requests')
+            try:
+                return await super().perform_request(*args, **kwargs)
+            except Exception:
+                metrics.count('opensearch_errors')
+                raise
+
+    return MeteredAsyncConnection
+
+
+def _create_async_opensearch_client():
+    try:
+        from opensearchpy import AsyncOpenSearch, AWSV4SignerAsyncAuth
+        connection_class = _metered_async_connection_class()
+    except ImportError:
+        # opensearch-py without its async extra (aiohttp)
+        return False
+
+    endpoint = os.environ['OPENSEARCH_ENDPOINT']
+    if endpoint.startswith('http://'):
+        local = urlparse(endpoint)
+        return AsyncOpenSearch(
+            hosts=[{'host': local.hostname, 'port': local.port or 9200}],
+            use_ssl=False,
+            connection_class=connection_class,
+            pool_maxsize=OPENSEARCH_POOL_SIZE,
+            timeout=OPENSEARCH_TIMEOUT
+        )
+    return AsyncOpenSearch(
+        hosts=[{'host': endpoint, 'port': 443}],
+        http_auth=AWSV4SignerAsyncAuth(get_session().get_credentials(), get_region(), OPENSEARCH_SERVICE),
+        use_ssl=True,
+        verify_certs=True,
+        connection_class=connection_class,
+        pool_maxsize=OPENSEARCH_POOL_SIZE,
+        timeout=OPENSEARCH_TIMEOUT
+    )
+
+
+def get_async_opensearch_client():
+    # AsyncOpenSearch for the running event loop, its aiohttp session can't be
+    # shared across loops. None when the async extra isn't installed.
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    return _get_or_create(f'opensearch_async/{id(loop)}', _create_async_opensearch_client) or None
@@ -0,0 +1,77 @@
+import logging
+import os
+import threading
+
+# Local CPU text embeddings for semantic property search.
+# The model runs in-process through fastembed (ONNX runtime), so indexing and
+# tests need no external inference service. When VECTOR_SEARCH is off or
+# fastembed is not installed, embeddings are skipped and search stays lexical.
+
+LOG = logging.getLogger()
+
+EMBEDDING_MODEL = os.environ.get('EMBEDDING_MODEL', 'BAAI/bge-small-en-v1.5')
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '384'))
+EMBEDDING_BATCH_SIZE = int(os.environ.get('EMBEDDING_BATCH_SIZE', '64'))
+# Lambda can only write to /tmp
+EMBEDDING_CACHE_DIR = os.environ.get('EMBEDDING_CACHE_DIR', '/tmp/fastembed')
+EMBEDDING_FIELD = 'embedding'
+
+_lock = threading.Lock()
+_model = {}
+
+
+def vector_search_enabled():
+    return os.environ.get('VECTOR_SEARCH', 'false').lower() == 'true'
+
+
+def _get_model():
+    if 'model' not in _model:
+        with _lock:
+            if 'model' not in _model:
+                try:
+                    from fastembed import TextEmbedding
+                    _model['model'] = TextEmbedding(model_name=EMBEDDING_MODEL, cache_dir=EMBEDDING_CACHE_DIR)
+                except ImportError:
+                    LOG.warning("error=fastembed_not_installed , action=skip_embeddings")
+                    _model['model'] = None
+    return _model['model']
+
+
+def available():
+    return vector_search_enabled() and _get_model() is not None
+
+
+def property_text(property_data):
+    # Text a property is embedded from
+    amenities = property_data.get('amenities') or []
+    if isinstance(amenities, str):
+        amenities = [amenities]
+    parts = [
+        property_data.get('title'),
+        property_data.get('location'),
+        property_data.get('description'),
+        ', '.join(str(amenity) for amenity in amenities)
+    ]
+    return '. '.join(str(part) for part in parts if part)
+
+
+def embed_texts(texts):
+    # Normalised vectors, one list of floats per text
+    model = _get_model()
+    return [vector.tolist() for vector in model.embed(list(texts), batch_size=EMBEDDING_BATCH_SIZE)]
+
+
+def embed_query(text):
+    model = _get_model()
+    return next(iter(model.query_embed(text))).tolist()
+
+
+def add_embeddings(properties):
+    # Attach an embedding to every property dict in place, batched
+    if not properties or not available():
+        return properties
+    for start in range(0, len(properties), EMBEDDING_BATCH_SIZE):
+        batch = properties[start:start + EMBEDDING_BATCH_SIZE]
+        for property_data, vector in zip(batch, embed_texts(property_text(p) for p in batch)):
+            property_data[EMBEDDING_FIELD] = vector
+    return properties
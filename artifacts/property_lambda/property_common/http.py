@@ -0,0 +1,119 @@
+import base64
+import gzip
+import json
+import os
+from datetime import datetime
+from decimal import Decimal
+from property_common import metrics
+
+# Request and response helpers for the API Gateway proxy integration.
+# The REST API declares */* as a binary media type so compressed bodies reach
+# clients as bytes. As a side effect request bodies may arrive base64 encoded,
+# so handlers read them through request_body. compress() encodes a response
+# body with br or gzip when the client accepts it and the body is large enough
+# to be worth it. respond() and json_response() build the response envelopes
+# the handlers return.
+
+MIN_COMPRESS_BYTES = int(os.environ.get('MIN_COMPRESS_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+
+
+def request_body(event):
+    # Raw request body as text, decoding base64 bodies from API Gateway
+    body = event.get('body')
+    if body and event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+    return body
+
+
+def parse_body(event, **json_kwargs):
+    return json.loads(request_body(event) or '{}', **json_kwargs)
+
+
+class JsonEncoder(json.JSONEncoder):
+    # DynamoDB numbers come back as Decimal
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super(JsonEncoder, self).default(obj)
+
+
+def respond(err, res=None):
+    # Booking and indexing envelope: the whole result, statusCode included, is
+    # serialised into the body, which is what the frontend services parse
+    return {
+        "statusCode": "400" if err else res["statusCode"],
+        "body": json.dumps(err) if err else json.dumps(res, cls=JsonEncoder),
+        "headers": {
+            "Access-Control-Allow-Origin": "*",
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Methods": "*",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Allow-Credentials": "*",
+        },
+    }
+
+
+def json_response(status_code, payload, headers=None):
+    # Search envelope: payload as a compact JSON body
+    with metrics.phase('serialize'):
+        body = json.dumps(payload, separators=(',', ':'))
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Credentials': True,
+            'Content-Type': 'application/json',
+            **(headers or {}),
+        },
+        'body': body
+    }
+
+
+def _header(event, name):
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value or ''
+    return ''
+
+
+def accepted_encodings(event):
+    encodings = set()
+    for part in _header(event, 'accept-encoding').split(','):
+        name, _, params = part.strip().partition(';')
+        if name and params.replace(' ', '') not in ('q=0', 'q=0.0'):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def compress(event, response):
+    # Return response with its body compressed when the client accepts it
+    body = response.get('body')
+    if not isinstance(body, str) or response.get('isBase64Encoded') or len(body) < MIN_COMPRESS_BYTES:
+        return response
+    encodings = accepted_encodings(event)
+    brotli = _brotli() if 'br' in encodings else None
+    if brotli:
+        encoding, data = 'br', brotli.compress(body.encode('utf-8'), quality=BROTLI_QUALITY)
+    elif 'gzip' in encodings:
+        encoding, data = 'gzip', gzip.compress(body.encode('utf-8'), compresslevel=GZIP_LEVEL)
+    else:
+        return response
+    metrics.size('uncompressed_bytes', len(body))
+    return {
+        **response,
+        'headers': {**response.get('headers', {}), 'Content-Encoding': encoding, 'Vary': 'Accept-Encoding'},
+        'body': base64.b64encode(data).decode('ascii'),
+        'isBase64Encoded': True
+    }
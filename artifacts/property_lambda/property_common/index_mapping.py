@@ -0,0 +1,202 @@
+import logging
+from datetime import datetime
+from property_common import embeddings
+
+# Explicit, versioned mapping for the property index.
+# INDEX_NAME is an alias pointing at <INDEX_NAME>_v<PROPERTY_INDEX_VERSION>.
+# Bump PROPERTY_INDEX_VERSION whenever PROPERTY_INDEX_BODY changes, then run
+# scripts/bootstrap_property_index.py to build the new index, copy documents
+# and swap the alias without downtime. opensearchpy is imported inside the
+# functions that call it, the search handler only needs the constants here.
+
+LOG = logging.getLogger()
+
+PROPERTY_INDEX_VERSION = 7
+
+PROPERTY_INDEX_BODY = {
+    'settings': {
+        'analysis': {
+            'normalizer': {
+                'lowercase_normalizer': {'type': 'custom', 'filter': ['lowercase']}
+            }
+        }
+    },
+    'mappings': {
+        # Unknown fields stay in _source but are not indexed
+        'dynamic': False,
+        'properties': {
+            'property_id': {'type': 'keyword'},
+            'title': {'type': 'text'},
+            'description': {'type': 'text'},
+            'location': {
+                'type': 'text',
+                'fields': {
+                    'keyword': {'type': 'keyword', 'normalizer': 'lowercase_normalizer'}
+                }
+            },
+            'amenities': {
+                'type': 'text',
+                'fields': {
+                    'keyword': {'type': 'keyword', 'normalizer': 'lowercase_normalizer'}
+                }
+            },
+            # Typeahead on title and location prefixes, see property_search.suggest
+            'suggest': {'type': 'completion', 'analyzer': 'simple', 'max_input_length': 50},
+            'price_per_night': {'type': 'scaled_float', 'scaling_factor': 100},
+            'bedrooms': {'type': 'short'},
+            'bathrooms': {'type': 'short'},
+            'max_guests': {'type': 'short'},
+            # Built from the property's coordinates by indexing.prepare_property
+            'geo_location': {'type': 'geo_point'},
+            # Confirmed stays, maintained by property_common.availability_index
+            'booked_ranges': {'type': 'date_range', 'format': 'epoch_second'},
+            'booked_ids': {'type': 'keyword', 'index': False},
+            'booking_count': {'type': 'integer'},
+            # Only returned to clients, never searched
+            'image_urls': {'type': 'object', 'enabled': False},
+            'images': {'type': 'object', 'enabled': False},
+            # Sortable through doc_values but not searchable
+            'created_at': {'type': 'date', 'index': False},
+            'updated_at': {'type': 'date'}
+        }
+    }
+}
+
+# Only created when VECTOR_SEARCH is on, k-NN needs a VECTORSEARCH collection
+VECTOR_INDEX_SETTINGS = {'index': {'knn': True}}
+VECTOR_FIELD_MAPPING = {
+    'type': 'knn_vector',
+    'dimension': embeddings.EMBEDDING_DIMENSION,
+    'method': {
+        'name': 'hnsw',
+        'engine': 'faiss',
+        # Embeddings are normalised, inner product ranks like cosine
+        'space_type': 'innerproduct',
+        'parameters': {'m': 16, 'ef_construction': 128}
+    }
+}
+
+GEO_FIELD = 'geo_location'
+
+# Exact-match filters on text fields go to their keyword sub-field
+TERM_FILTER_FIELDS = {
+    'location': 'location.keyword',
+    'amenities': 'amenities.keyword'
+}
+
+_ensured = set()
+
+
+def versioned_index_name(alias, version=PROPERTY_INDEX_VERSION):
+    # Vector enabled indexes get their own name so toggling VECTOR_SEARCH migrates
+    suffix = '_knn' if embeddings.vector_search_enabled() else ''
+    return f'{alias}_v{version}{suffix}'
+
+
+def property_index_body():
+    if not embeddings.vector_search_enabled():
+        return PROPERTY_INDEX_BODY
+    return {
+        'settings': {**PROPERTY_INDEX_BODY['settings'], **VECTOR_INDEX_SETTINGS},
+        'mappings': {
+            **PROPERTY_INDEX_BODY['mappings'],
+            'properties': {
+                **PROPERTY_INDEX_BODY['mappings']['properties'],
+                embeddings.EMBEDDING_FIELD: VECTOR_FIELD_MAPPING
+            }
+        }
+    }
+
+
+def _alias_targets(client, alias):
+    from opensearchpy.exceptions import NotFoundError
+
+    try:
+        return sorted(client.indices.get_alias(name=alias).keys())
+    except NotFoundError:
+        return []
+
+
+def _create_index(client, index_name):
+    from opensearchpy.exceptions import RequestError
+
+    try:
+        client.indices.create(index=index_name, body=property_index_body())
+        LOG.info(f"method=create_index , index={index_name}")
+    except RequestError as e:
+        if e.error != 'resource_already_exists_exception':
+            raise
+
+
+def ensure_property_index(client, alias):
+    # Cheap, idempotent check run once per container before writes.
+    # Creates the current index version and alias on a fresh collection;
+    # migrating an existing index is left to migrate_property_index.
+    if alias in _ensured:
+        return
+    targets = _alias_targets(client, alias)
+    if not targets and not client.indices.exists(index=alias):
+        index_name = versioned_index_name(alias)
+        _create_index(client, index_name)
+        client.indices.put_alias(index=index_name, name=alias)
+        targets = [index_name]
+    if targets != [versioned_index_name(alias)]:
+        LOG.warning(f"method=ensure_property_index , alias={alias} , live={targets or alias} , expected={versioned_index_name(alias)} , action=run_bootstrap_migration")
+    _ensured.add(alias)
+
+
+def _sort_field(client, index_name):
+    # Older indexes were dynamically mapped and only have property_id.keyword
+    mapping = client.indices.get_mapping(index=index_name)[index_name]['mappings']
+    field_type = mapping.get('properties', {}).get('property_id', {}).get('type')
+    return 'property_id' if field_type == 'keyword' else 'property_id.keyword'
+
+
+def copy_documents(client, source, target, since=None, page_size=500):
+    # Page through the source with search_after and bulk-write into target
+    from opensearchpy import helpers
+
+    sort_field = _sort_field(client, source)
+    query = {'range': {'updated_at': {'gte': since}}} if since else {'match_all': {}}
+    search_after = None
+    copied = 0
+    while True:
+        body = {'size': page_size, 'query': query, 'sort': [{sort_field: 'asc'}]}
+        if search_after:
+            body['search_after'] = search_after
+        hits = client.search(index=source, body=body)['hits']['hits']
+        if not hits:
+            return copied
+        actions = ({'_op_type': 'index', '_index': target, '_id': hit['_id'], '_source': hit['_source']} for hit in hits)
+        success, _ = helpers.bulk(client, actions, max_retries=3)
+        copied += success
+        search_after = hits[-1]['sort']
+
+
+def migrate_property_index(client, alias):
+    # Build the current index version and move the alias onto it
+    target = versioned_index_name(alias)
+    targets = _alias_targets(client, alias)
+    if targets == [target]:
+        return {'alias': alias, 'index': target, 'copied': 0, 'migrated': False}
+
+    legacy = not targets and client.indices.exists(index=alias)
+    sources = [alias] if legacy else targets
+    _create_index(client, target)
+
+    started = datetime.utcnow().isoformat()
+    copied = sum(copy_documents(client, source, target) for source in sources if source != target)
+    # Catch up on documents written while the bulk copy ran, booking updates
+    # bump updated_at too (see availability_index.APPLY_BOOKINGS_SCRIPT)
+    copied += sum(copy_documents(client, source, target, since=started) for source in sources if source != target)
+
+    if legacy:
+        # A concrete index can't share its name with an alias, drop it in the same atomic call
+        actions = [{'remove_index': {'index': alias}}]
+    else:
+        actions = [{'remove': {'index': source, 'alias': alias}} for source in sources if source != target]
+    actions.append({'add': {'index': target, 'alias': alias}})
+    client.indices.update_aliases(body={'actions': actions})
+    client.indices.refresh(index=target)
+    LOG.info(f"method=migrate_property_index , alias={alias} , index={target} , copied={copied}")
+    return {'alias': alias, 'index': target, 'sources': sources, 'copied': copied, 'migrated': True}
@@ -0,0 +1,106 @@
+import os
+import uuid
+from datetime import datetime
+from property_common import availability_index, embeddings, metrics
+
+# Bulk indexing of property documents through the OpenSearch _bulk API.
+# Documents are streamed in chunks bounded by both document count and bytes,
+# rejected documents (429) are retried individually with backoff, and one
+# result is returned per input document in input order. Embeddings for
+# semantic search are computed in batches before the documents are sent.
+# Documents are written as scripted upserts so re-indexing a property keeps
+# the booked ranges the booking path has recorded on it.
+
+BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', '500'))
+BULK_MAX_CHUNK_BYTES = int(os.environ.get('BULK_MAX_CHUNK_BYTES', str(5 * 1024 * 1024)))
+BULK_MAX_RETRIES = int(os.environ.get('BULK_MAX_RETRIES', '3'))
+
+
+def geo_point(property_data):
+    # Coordinates are accepted as coordinates: {lat, lon}, or top level
+    # latitude/longitude or lat/lon, None when missing or out of range
+    coordinates = property_data.get('coordinates')
+    if not isinstance(coordinates, dict):
+        coordinates = property_data
+    lat = coordinates.get('lat', coordinates.get('latitude'))
+    lon = coordinates.get('lon', coordinates.get('longitude'))
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        return None
+    return {'lat': lat, 'lon': lon}
+
+
+def prepare_property(property_data, property_id=None):
+    # Add the id, audit timestamps, suggest inputs and geo point every indexed property carries
+    now = datetime.utcnow().isoformat()
+    property_data.update({
+        'property_id': str(uuid.uuid4()) if property_id is None else property_id,
+        'created_at': property_data.get('created_at') or now,
+        'updated_at': now
+    })
+    inputs = [str(property_data[field]) for field in ('title', 'location') if property_data.get(field)]
+    property_data['suggest'] = {'input': inputs}
+    point = geo_point(property_data)
+    if point:
+        property_data['geo_location'] = point
+    else:
+        property_data.pop('geo_location', None)
+    return property_data
+
+
+def validate_property(property_data):
+    # Return an error message for documents that cannot be indexed
+    if not isinstance(property_data, dict):
+        return 'Property must be a JSON object'
+    if not property_data.get('title'):
+        return 'Property title is required'
+    property_id = property_data.get('property_id')
+    if property_id is not None and (not isinstance(property_id, (str, int)) or isinstance(property_id, bool)
+                                    or not str(property_id).strip()):
+        return 'property_id must be a non-empty string or number'
+    return None
+
+
+def bulk_index_properties(client, index_name, properties):
+    from opensearchpy import helpers
+
+    results = []
+    valid = []
+    for position, property_data in enumerate(properties):
+        error = validate_property(property_data)
+        if error:
+            results.append({'position': position, 'status': 400, 'error': error})
+            continue
+        prepare_property(property_data, property_data.get('property_id'))
+        results.append({'position': position, 'property_id': property_data['property_id']})
+        valid.append((position, property_data))
+    with metrics.phase('embed'):
+        embeddings.add_embeddings([doc for _, doc in valid])
+
+    actions = (availability_index.replace_document_action(index_name, doc) for _, doc in valid)
+    outcomes = helpers.streaming_bulk(
+        client,
+        actions,
+        chunk_size=BULK_CHUNK_SIZE,
+        max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+        max_retries=BULK_MAX_RETRIES,
+        raise_on_error=False,
+        raise_on_exception=False,
+        yield_ok=True
+    )
+    # streaming_bulk yields retried (429) actions after the rest of their
+    # chunk, so outcomes are matched to documents by id, not by order.
+    # OpenSearch returns ids as strings whatever type they were sent as.
+    positions = {}
+    for position, doc in valid:
+        positions.setdefault(str(doc['property_id']), []).append(position)
+    for ok, item in outcomes:
+        info = item.get('update', {})
+        result = results[positions[str(info.get('_id'))].pop(0)]
+        result['status'] = info.get('status', 500)
+        if not ok:
+            result['error'] = str(info.get('error') or info.get('exception') or 'bulk_index_failed')
+    return results
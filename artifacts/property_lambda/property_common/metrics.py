@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# Per-request latency instrumentation shared by the API handlers.
+# instrument() wraps a handler and collects, for one invocation, the time
+# spent in each named phase, counters (cache hits, downstream calls and
+# retries), payload sizes and a few tags. Collecting is a perf_counter call
+# and a dict update per phase; only a random METRICS_SAMPLE_RATE share of
+# requests is written out, as one CloudWatch Embedded Metric Format line
+# (METRICS_FORMAT=emf) or one key=value log line (METRICS_FORMAT=log), so the
+# published latencies are an unbiased sample. Errors and requests slower than
+# METRICS_SLOW_MS are also always written as a plain log line with
+# sample_rate 1.0 and no metrics, whether or not they were sampled. Outside
+# an instrumented handler every function here is a no-op.
+
+LOG = logging.getLogger()
+
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'PropertyApp')
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '0.1'))
+METRICS_SLOW_MS = int(os.environ.get('METRICS_SLOW_MS', '1000'))
+METRICS_FORMAT = os.environ.get('METRICS_FORMAT', 'emf')
+
+_current = ContextVar('property_request_metrics', default=None)
+_cold_start = True
+
+
+class RequestMetrics:
+    def __init__(self, function, endpoint):
+        self.function = function
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.counts = {}
+        self.sizes = {}
+        self.tags = {}
+
+
+@contextmanager
+def phase(name):
+    # Add the time spent in the block to the phase, phases can repeat
+    request = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if request is not None:
+            request.timings[name] = request.timings.get(name, 0.0) + (time.perf_counter() - start) * 1000.0
+
+
+def count(name, value=1):
+    request = _current.get()
+    if request is not None:
+        request.counts[name] = request.counts.get(name, 0) + value
+
+
+def size(name, num_bytes):
+    request = _current.get()
+    if request is not None:
+        request.sizes[name] = request.sizes.get(name, 0) + num_bytes
+
+
+def tag(name, value):
+    # Searchable property on the request's record, not a metric
+    request = _current.get()
+    if request is not None:
+        request.tags[name] = value
+
+
+def _endpoint(event):
+    if isinstance(event, dict) and event.get('resource'):
+        return f"{event.get('httpMethod', '')} {event['resource']}"
+    return 'event'
+
+
+def _body_bytes(body, base64_encoded=False):
+    if not isinstance(body, str):
+        return 0
+    return len(body) * 3 // 4 if base64_encoded else len(body.encode('utf-8'))
+
+
+def _forced(duration_ms, status_code):
+    return status_code >= 500 or duration_ms >= METRICS_SLOW_MS
+
+
+def _emf_record(request, duration_ms, status_code, request_id, cold_start, sample_rate):
+    metrics = [{'Name': 'duration_ms', 'Unit': 'Milliseconds'}]
+    values = {'duration_ms': round(duration_ms, 3)}
+    for name, elapsed_ms in request.timings.items():
+        metrics.append({'Name': f'{name}_ms', 'Unit': 'Milliseconds'})
+        values[f'{name}_ms'] = round(elapsed_ms, 3)
+    for name, value in request.counts.items():
+        metrics.append({'Name': name, 'Unit': 'Count'})
+        values[name] = value
+    for name, value in request.sizes.items():
+        metrics.append({'Name': name, 'Unit': 'Bytes'})
+        values[name] = value
+    return {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['function', 'endpoint']],
+                'Metrics': metrics
+            }]
+        },
+        'function': request.function,
+        'endpoint': request.endpoint,
+        'status_code': status_code,
+        'cold_start': cold_start,
+        'request_id': request_id,
+        # Sampled counts are scaled up by 1 / sample_rate when aggregated
+        'sample_rate': sample_rate,
+        **request.tags,
+        **values
+    }
+
+
+def _emit(request, duration_ms, status_code, request_id, cold_start, sampled):
+    record = _emf_record(request, duration_ms, status_code, request_id, cold_start,
+                         METRICS_SAMPLE_RATE if sampled else 1.0)
+    if sampled and METRICS_FORMAT == 'emf':
+        # EMF lines must be bare JSON, the Lambda log formatter would prefix them
+        sys.stdout.write(json.dumps(record, separators=(',', ':'), default=str) + '\n')
+        return
+    fields = ' , '.join(f'{key}={value}' for key, value in record.items() if key != '_aws')
+    LOG.info(f"method=metrics , {fields}")
+
+
+def _finish(request, event, context, response):
+    duration_ms = (time.perf_counter() - request.started) * 1000.0
+    try:
+        status_code = int(response.get('statusCode', 200)) if isinstance(response, dict) else 500
+    except (TypeError, ValueError):
+        status_code = 500
+    sampled = random.random() < METRICS_SAMPLE_RATE
+    forced = _forced(duration_ms, status_code)
+    if not sampled and not forced:
+        return
+    if isinstance(event, dict):
+        request.sizes['request_bytes'] = _body_bytes(event.get('body'), event.get('isBase64Encoded'))
+    if isinstance(response, dict):
+        request.sizes['response_bytes'] = _body_bytes(response.get('body'), response.get('isBase64Encoded'))
+    request_id = getattr(context, 'aws_request_id', None)
+    cold_start = request.tags.pop('cold_start', False)
+    try:
+        if sampled:
+            _emit(request, duration_ms, status_code, request_id, cold_start, True)
+        if forced:
+            _emit(request, duration_ms, status_code, request_id, cold_start, False)
+    except Exception:
+        LOG.exception("error=metrics_emit_failed")
+
+
+def instrument(function):
+    # Decorator for a Lambda handler, function names the metrics' function dimension
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(event, context):
+            global _cold_start
+            request = RequestMetrics(function, _endpoint(event))
+            request.tags['cold_start'], _cold_start = _cold_start, False
+            token = _current.set(request)
+            response = None
+            try:
+                response = handler(event, context)
+                return response
+            finally:
+                _current.reset(token)
+                _finish(request, event, context, response)
+        return wrapper
+    return decorator
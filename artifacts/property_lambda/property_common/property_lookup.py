@@ -0,0 +1,51 @@
+import os
+from property_common import availability_index, embeddings, metrics
+from property_common.cache import TTLCache
+
+# Property documents by id, for the detail endpoints and for decorating
+# bookings. Ids not cached are resolved with a single _mget per call, and
+# documents (including misses) are kept in a short-lived in-process cache so
+# hot properties don't go back to OpenSearch on every request.
+
+PROPERTY_CACHE_TTL = int(os.environ.get('PROPERTY_CACHE_TTL', '30'))
+MAX_LOOKUP_IDS = int(os.environ.get('MAX_LOOKUP_IDS', '100'))
+# Index-only fields, never returned to clients
+EXCLUDED_FIELDS = [embeddings.EMBEDDING_FIELD, 'suggest', availability_index.BOOKED_IDS_FIELD,
+                   availability_index.BOOKED_RANGES_FIELD]
+
+_cache = TTLCache(int(os.environ.get('PROPERTY_CACHE_MAX_ENTRIES', '2000')), PROPERTY_CACHE_TTL)
+_MISSING = {}
+
+
+def get_properties(client, index_name, property_ids):
+    # Return {property_id: document} for the ids that exist, documents are
+    # shared with the cache and must be copied before they are modified
+    found = {}
+    misses = []
+    unique_ids = list(dict.fromkeys(property_ids))
+    for property_id in unique_ids:
+        document = _cache.get(property_id)
+        if document is None:
+            misses.append(property_id)
+        elif document is not _MISSING:
+            found[property_id] = document
+    metrics.count('property_cache_hits', len(unique_ids) - len(misses))
+    metrics.count('property_cache_misses', len(misses))
+    if misses:
+        response = client.mget(index=index_name, body={'ids': misses}, _source_excludes=EXCLUDED_FIELDS)
+        for doc in response['docs']:
+            if doc.get('found'):
+                document = {**doc['_source'], 'id': doc['_id']}
+                found[doc['_id']] = document
+                _cache.put(doc['_id'], document)
+            else:
+                _cache.put(doc['_id'], _MISSING)
+    return found
+
+
+def get_property(client, index_name, property_id):
+    return get_properties(client, index_name, [property_id]).get(property_id)
+
+
+def stats():
+    return _cache.stats()
@@ -0,0 +1,31 @@
+from property_common import http
+
+# Routing for API Gateway proxy events. Every property API module exposes a
+# ROUTES table mapping "<httpMethod> <resource>" to a route(event, context)
+# that returns the finished proxy response. A function deployed for one
+# module dispatches on its own table, the single property_api function
+# dispatches on all of them, so the same routes serve both deployment modes.
+
+
+def route_key(event):
+    return f"{event.get('httpMethod', '')} {event.get('resource', '')}"
+
+
+def not_found(event, context):
+    return http.json_response(404, {'error': 'api_not_supported', 'api': route_key(event)})
+
+
+def dispatch(routes, event, context, fallback=not_found):
+    route = routes.get(route_key(event), fallback)
+    return route(event, context)
+
+
+def merge(*tables):
+    # One table from several modules, a route may only be claimed once
+    routes = {}
+    for table in tables:
+        duplicates = routes.keys() & table.keys()
+        if duplicates:
+            raise ValueError(f"Routes registered twice: {', '.join(sorted(duplicates))}")
+        routes.update(table)
+    return routes
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from decimal import Decimal
+from property_common import clients
+from property_common.cache import TTLCache
+
+# Response cache in front of the property search query.
+# Requests are keyed on a canonical form of query + filters, so equivalent
+# searches share an entry. Entries live in an in-process LRU and, when
+# SEARCH_CACHE_TABLE is set, in a shared DynamoDB table with a TTL attribute.
+# The shared table also holds a generation counter that the indexing paths
+# bump on every write; it is part of every key, so writes invalidate all
+# cached searches across containers.
+
+LOG = logging.getLogger()
+
+SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', '60'))
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', '256'))
+# How long a container trusts its copy of the generation counter
+GENERATION_CHECK_SECONDS = int(os.environ.get('SEARCH_CACHE_GENERATION_SECONDS', '5'))
+# DynamoDB items are capped at 400 KB
+MAX_SHARED_VALUE_BYTES = 350 * 1024
+GENERATION_KEY = '__generation__'
+
+_local = TTLCache(SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_TTL)
+_shared_stats = {'hits': 0, 'misses': 0}
+_generation = {'value': 0, 'checked_at': 0.0}
+
+
+def _shared_table():
+    table_name = os.environ.get('SEARCH_CACHE_TABLE')
+    return clients.get_dynamodb_table(table_name) if table_name else None
+
+
+def _canonical(value):
+    # Drop empty values and collapse whitespace so equivalent requests match
+    if isinstance(value, dict):
+        cleaned = {k: _canonical(v) for k, v in value.items()}
+        return {k: v for k, v in sorted(cleaned.items()) if v not in (None, '', {}, [])}
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    return value
+
+
+def _current_generation(table):
+    now = time.monotonic()
+    if now - _generation['checked_at'] >= GENERATION_CHECK_SECONDS:
+        item = table.get_item(Key={'cache_key': GENERATION_KEY}).get('Item') or {}
+        _generation['value'] = int(item.get('generation', 0))
+        _generation['checked_at'] = now
+    return _generation['value']
+
+
+def cache_key(request):
+    table = _shared_table()
+    generation = _current_generation(table) if table else 0
+    canonical = json.dumps({'request': _canonical(request), 'generation': generation},
+                           sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def get(key):
+    # Return (value, tier) where tier is 'local', 'shared' or None on a miss
+    value = _local.get(key)
+    if value is not None:
+        return value, 'local'
+    table = _shared_table()
+    if table:
+        item = table.get_item(Key={'cache_key': key}).get('Item')
+        if item and int(item['expires_at']) > time.time():
+            _shared_stats['hits'] += 1
+            value = json.loads(item['value'])
+            _local.put(key, value)
+            return value, 'shared'
+        _shared_stats['misses'] += 1
+    return None, None
+
+
+def put(key, value, ttl_seconds=SEARCH_CACHE_TTL):
+    _local.put(key, value, ttl_seconds)
+    table = _shared_table()
+    if not table:
+        return
+    serialized = json.dumps(value, separators=(',', ':'), default=str)
+    if len(serialized) > MAX_SHARED_VALUE_BYTES:
+        return
+    try:
+        table.put_item(Item={
+            'cache_key': key,
+            'value': serialized,
+            'expires_at': int(time.time()) + ttl_seconds
+        })
+    except Exception:
+        # The shared tier is best effort, a failed write only costs a future miss
+        LOG.exception(f"error=search_cache_put_failed , key={key}")
+
+
+def invalidate():
+    # Called after writes to the property index
+    _local.clear()
+    table = _shared_table()
+    if not table:
+        return
+    try:
+        table.update_item(
+            Key={'cache_key': GENERATION_KEY},
+            UpdateExpression='ADD generation :one',
+            ExpressionAttributeValues={':one': Decimal(1)}
+        )
+        _generation['checked_at'] = 0.0
+    except Exception:
+        # Entries still expire after SEARCH_CACHE_TTL
+        LOG.exception("error=search_cache_invalidate_failed")
+
+
+def stats():
+    return {'local': _local.stats(), 'shared': dict(_shared_stats)}
@@ -0,0 +1,83 @@
+import logging
+import os
+import time
+from boto3.dynamodb.types import TypeDeserializer
+from opensearchpy import helpers
+from property_common import availability_index, clients
+
+# Keeps the booked ranges and booking counts on property documents in sync
+# with the bookings table through its DynamoDB stream, off the booking path.
+# Changes in a batch are coalesced per property: the last image of each
+# booking wins and every property gets a single scripted update. The scripts
+# are idempotent on booking_id, so a retried batch is harmless. Properties
+# whose update fails are reported as batch item failures and retried.
+
+LOG = logging.getLogger()
+LOG.setLevel(logging.INFO)
+
+_deserializer = TypeDeserializer()
+
+
+def _image(record, name):
+    image = record['dynamodb'].get(name)
+    if not image:
+        return None
+    return {key: _deserializer.deserialize(value) for key, value in image.items()}
+
+
+def coalesce(records):
+    # Return {property_id: {booking_id: (booking or None, sequence_numbers)}}
+    # where None means the booking no longer holds its stay
+    changes = {}
+    for record in records:
+        new_image = _image(record, 'NewImage')
+        booking = new_image or _image(record, 'OldImage')
+        if not booking or 'property_id' not in booking:
+            continue
+        active = new_image if new_image and new_image.get('status') == 'confirmed' else None
+        bookings = changes.setdefault(booking['property_id'], {})
+        _, sequence_numbers = bookings.get(booking['booking_id'], (None, []))
+        sequence_numbers.append(record['dynamodb']['SequenceNumber'])
+        bookings[booking['booking_id']] = (active, sequence_numbers)
+    return changes
+
+
+def _lag_ms(records, now):
+    created = [record['dynamodb'].get('ApproximateCreationDateTime') for record in records]
+    created = [float(value) for value in created if value]
+    return int((now - min(created)) * 1000) if created else 0
+
+
+def handler(event, context):
+    records = event.get('Records', [])
+    if not records:
+        return {'batchItemFailures': []}
+    index_name = os.environ['INDEX_NAME']
+    now = time.time()
+    changes = coalesce(records)
+
+    actions = []
+    sequence_numbers = {}
+    for property_id, bookings in changes.items():
+        adds = [booking for booking, _ in bookings.values() if booking]
+        removes = [booking_id for booking_id, (booking, _) in bookings.items() if not booking]
+        actions.append(availability_index.bookings_action(index_name, property_id, adds, removes, now))
+        sequence_numbers[property_id] = [number for _, numbers in bookings.values() for number in numbers]
+
+    failures = []
+    failed_properties = 0
+    outcomes = helpers.streaming_bulk(clients.get_opensearch_client(), actions, raise_on_error=False,
+                                      raise_on_exception=False, yield_ok=True, max_retries=3)
+    # Retried (429) updates come back out of order, match them by property id
+    for ok, item in outcomes:
+        info = item.get('update', {})
+        # A property that isn't indexed yet has nothing to filter, skip it
+        if ok or info.get('status') == 404:
+            continue
+        LOG.warning(f"method=booking_sync , property_id={info.get('_id')} , status={info.get('status')} , error={info.get('error')}")
+        failures.extend(sequence_numbers[info.get('_id')])
+        failed_properties += 1
+
+    LOG.info(f"method=booking_sync , records={len(records)} , properties={len(actions)} , failed_properties={failed_properties} , lag_ms={_lag_ms(records, now)}")
+    # Lambda resumes from the lowest reported sequence number
+    return {'batchItemFailures': [{'itemIdentifier': number} for number in failures]}
@@ -0,0 +1,220 @@
+import csv
+import json
+import logging
+import os
+import uuid
+from urllib.parse import unquote_plus
+from botocore.exceptions import ClientError
+from property_common import clients, index_mapping, indexing, search_cache
+
+# Streams large JSONL / CSV catalogs dropped under IMPORT_PREFIX in the images
+# bucket into the property index. The file is read with ranged GETs one chunk
+# at a time and indexed in bulk batches, so memory stays flat whatever the file
+# size. Progress is checkpointed in S3; when the invocation is about to time
+# out the function re-invokes itself and resumes from the last checkpoint.
+
+LOG = logging.getLogger()
+LOG.setLevel(logging.INFO)
+
+IMPORT_PREFIX = os.environ.get('IMPORT_PREFIX', 'properties/imports/')
+CHECKPOINT_PREFIX = os.environ.get('CHECKPOINT_PREFIX', 'properties/import-checkpoints/')
+READ_CHUNK_BYTES = int(os.environ.get('IMPORT_READ_CHUNK_BYTES', str(1024 * 1024)))
+BATCH_DOCUMENTS = int(os.environ.get('IMPORT_BATCH_DOCUMENTS', '500'))
+# Stop and hand over to a fresh invocation when less time than this remains
+TIME_MARGIN_MS = int(os.environ.get('IMPORT_TIME_MARGIN_MS', '60000'))
+MAX_REPORTED_ERRORS = 100
+
+INT_FIELDS = ['bedrooms', 'bathrooms', 'max_guests']
+FLOAT_FIELDS = ['price_per_night', 'latitude', 'longitude']
+LIST_FIELDS = ['amenities', 'image_urls']
+LIST_SEPARATOR = '|'
+
+
+def handler(event, context):
+    if 'import' in event:
+        # Continuation scheduled by a previous invocation
+        run_import(event['import'], context)
+        return
+    for record in event.get('Records', []):
+        key = unquote_plus(record['s3']['object']['key'])
+        if not key.startswith(IMPORT_PREFIX):
+            continue
+        run_import({'bucket': record['s3']['bucket']['name'], 'key': key}, context)
+
+
+def checkpoint_key(key):
+    return CHECKPOINT_PREFIX + key[len(IMPORT_PREFIX):] + '.json'
+
+
+def load_checkpoint(s3_client, job, etag):
+    try:
+        response = s3_client.get_object(Bucket=job['bucket'], Key=checkpoint_key(job['key']))
+        checkpoint = json.loads(response['Body'].read())
+        # A new upload under the same key starts over
+        if checkpoint.get('etag') == etag:
+            return checkpoint
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            raise
+    return {'etag': etag, 'offset': 0, 'line': 0, 'header': None,
+            'indexed': 0, 'failed': 0, 'errors': [], 'done': False}
+
+
+def save_checkpoint(s3_client, job, checkpoint):
+    s3_client.put_object(
+        Bucket=job['bucket'],
+        Key=checkpoint_key(job['key']),
+        Body=json.dumps(checkpoint).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+def iter_lines(s3_client, job, etag, offset, size):
+    # Yield (line, end_offset) reading the object in ranged chunks
+    pending = b''
+    while offset < size:
+        end = min(offset + READ_CHUNK_BYTES, size) - 1
+        response = s3_client.get_object(Bucket=job['bucket'], Key=job['key'], Range=f'bytes={offset}-{end}', IfMatch=etag)
+        chunk = response['Body'].read()
+        offset += len(chunk)
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        consumed = offset - len(pending)
+        # Work back from the end of the chunk to the offset after each line
+        line_ends = []
+        for line in reversed(lines):
+            line_ends.append(consumed)
+            consumed -= len(line) + 1
+        for line, line_end in zip(lines, reversed(line_ends)):
+            yield line, line_end
+    if pending:
+        yield pending, offset
+
+
+def _split_list(value):
+    return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+
+
+def parse_row(line, file_format, header):
+    # Return a property dict from one JSONL or CSV line
+    text = line.decode('utf-8-sig').strip()
+    if file_format == 'jsonl':
+        return json.loads(text)
+    values = next(csv.reader([text]))
+    if len(values) != len(header):
+        raise ValueError(f'expected {len(header)} columns, got {len(values)}')
+    row = {name: value for name, value in zip(header, values) if value != ''}
+    for field in INT_FIELDS:
+        if field in row:
+            row[field] = int(row[field])
+    for field in FLOAT_FIELDS:
+        if field in row:
+            row[field] = float(row[field])
+    for field in LIST_FIELDS:
+        if field in row:
+            row[field] = _split_list(row[field])
+    return row
+
+
+def file_format_for(key):
+    lowered = key.lower()
+    if lowered.endswith('.csv'):
+        return 'csv'
+    if lowered.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    raise ValueError(f'Unsupported catalog format: {key}')
+
+
+def _record_error(checkpoint, line_number, error):
+    checkpoint['failed'] += 1
+    if len(checkpoint['errors']) < MAX_REPORTED_ERRORS:
+        checkpoint['errors'].append({'line': line_number, 'error': str(error)})
+
+
+def _flush(client, index_name, checkpoint, batch):
+    if not batch:
+        return
+    results = indexing.bulk_index_properties(client, index_name, [doc for _, doc in batch])
+    # Every batched line has its property id by now, a line may repeat one
+    line_numbers = {}
+    for line_number, doc in batch:
+        line_numbers.setdefault(doc['property_id'], []).append(line_number)
+    for result in results:
+        if 'property_id' in result:
+            line_number = line_numbers[result['property_id']].pop(0)
+        else:
+            line_number = batch[result['position']][0]
+        if 'error' in result:
+            _record_error(checkpoint, line_number, result['error'])
+        else:
+            checkpoint['indexed'] += 1
+    batch.clear()
+
+
+def _continue_later(context, job):
+    clients.get_lambda_client().invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({'import': job}).encode('utf-8')
+    )
+
+
+def run_import(job, context):
+    s3_client = clients.get_s3_client()
+    opensearch_client = clients.get_opensearch_client()
+    index_name = os.environ['INDEX_NAME']
+    index_mapping.ensure_property_index(opensearch_client, index_name)
+    file_format = file_format_for(job['key'])
+
+    head = s3_client.head_object(Bucket=job['bucket'], Key=job['key'])
+    etag = head['ETag']
+    checkpoint = load_checkpoint(s3_client, job, etag)
+    if checkpoint['done']:
+        LOG.info(f"method=run_import , key={job['key']} , status=already_done")
+        return checkpoint
+
+    LOG.info(f"method=run_import , key={job['key']} , resume_offset={checkpoint['offset']} , size={head['ContentLength']}")
+    batch = []
+    pending_lines = 0
+    for line, line_end in iter_lines(s3_client, job, etag, checkpoint['offset'], head['ContentLength']):
+        pending_lines += 1
+        line_number = checkpoint['line'] + pending_lines
+        if file_format == 'csv' and checkpoint['header'] is None:
+            checkpoint['header'] = [name.strip() for name in next(csv.reader([line.decode('utf-8-sig')]))]
+            checkpoint['line'] += pending_lines
+            checkpoint['offset'] = line_end
+            pending_lines = 0
+            continue
+        if line.strip():
+            try:
+                property_data = parse_row(line, file_format, checkpoint['header'])
+                error = indexing.validate_property(property_data)
+                if error:
+                    raise ValueError(error)
+                # Deterministic ids keep re-processed lines idempotent after a resume
+                property_data.setdefault('property_id', str(uuid.uuid5(uuid.NAMESPACE_URL, f"s3://{job['bucket']}/{job['key']}#{line_number}")))
+                batch.append((line_number, property_data))
+            except (ValueError, TypeError, StopIteration) as e:
+                _record_error(checkpoint, line_number, e)
+
+        if len(batch) >= BATCH_DOCUMENTS:
+            _flush(opensearch_client, index_name, checkpoint, batch)
+            checkpoint['line'] += pending_lines
+            checkpoint['offset'] = line_end
+            pending_lines = 0
+            save_checkpoint(s3_client, job, checkpoint)
+            if context and context.get_remaining_time_in_millis() < TIME_MARGIN_MS:
+                # Cached searches are invalidated once per invocation, not per batch
+                search_cache.invalidate()
+                _continue_later(context, job)
+                LOG.info(f"method=run_import , key={job['key']} , status=continued , offset={line_end}")
+                return checkpoint
+
+    _flush(opensearch_client, index_name, checkpoint, batch)
+    search_cache.invalidate()
+    checkpoint['line'] += pending_lines
+    checkpoint['offset'] = head['ContentLength']
+    checkpoint['done'] = True
+    save_checkpoint(s3_client, job, checkpoint)
+    LOG.info(f"method=run_import , key={job['key']} , status=done , indexed={checkpoint['indexed']} , failed={checkpoint['failed']}")
+    return checkpoint
@@ -1,82 +1,60 @@
 import json
 import os
-import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
-import uuid
-from datetime import datetime
-from decimal import Decimal
 import re
 import logging
+from property_common import clients, embeddings, http, index_mapping, indexing, metrics, router, search_cache
 
 LOG = logging.getLogger()
 LOG.setLevel(logging.INFO)
 
-def handler(event, context):
-    
-    api_map = {
-            'POST/properties': lambda x: index_property(x),
-            'GET/properties/upload-image': lambda x: create_presigned_post(x)
-        }
+def endpoint(api):
+    # Route for an api function returning a statusCode and body result
+    def route(event, context):
+        try:
+            return http.respond(None, api(event))
+        except Exception:
+            LOG.exception(f"error=error_processing_api, api={router.route_key(event)}")
+            return http.respond({"error": 'system_exception'}, None)
+    return route
 
-    http_method = event['httpMethod'] if 'httpMethod' in event else ''
-    api_path = http_method + event['resource']
-    try:
-        if api_path in api_map:
-            LOG.debug(f"method=handler , api_path={api_path}")
-            return respond(None, api_map[api_path](event))
-        else:
-            LOG.info(f"error=api_not_found , api={api_path}")
-            return respond({"error": 'api_not_supported'}, None)
-    except Exception:
-        LOG.exception(f"error=error_processing_api, api={api_path}")
-        return respond({"error": 'system_exception'}, None)
+def api_not_supported(event, context):
+    LOG.info(f"error=api_not_found , api={router.route_key(event)}")
+    return http.respond({"error": 'api_not_supported'}, None)
+
+@metrics.instrument('property_index')
+def handler(event, context):
+    return router.dispatch(ROUTES, event, context, fallback=api_not_supported)
 
 def index_property(event):
     try:
-        # Get environment variables
-        region = os.environ['AWS_REGION']
-        opensearch_endpoint = os.environ['OPENSEARCH_ENDPOINT']
         index_name = os.environ['INDEX_NAME']
-        s3_bucket = os.environ['S3_BUCKET']
         
-        # Initialize AWS clients
-        s3_client = boto3.client('s3')
-        credentials = boto3.Session().get_credentials()
-        awsauth = AWS4Auth(credentials.access_key, credentials.secret_key, region, 'aoss', session_token=credentials.token)
-        
-        # Initialize OpenSearch client
-        opensearch_client = OpenSearch(
-            hosts=[{'host': opensearch_endpoint, 'port': 443}],
-            http_auth=awsauth,
-            use_ssl=True,
-            verify_certs=True,
-            connection_class=RequestsHttpConnection
-        )
+        # Reuse the OpenSearch client across warm invocations
+        with metrics.phase('client_init'):
+            opensearch_client = clients.get_opensearch_client()
+            index_mapping.ensure_property_index(opensearch_client, index_name)
         
         # Parse request body
-        body = json.loads(event['body'])
+        body = http.parse_body(event)
         property_data = body.get('property')
         
         if not property_data:
             return {"error": "Property data is required", "statusCode": 400}
         
-        # Generate unique property ID
-        property_id = str(uuid.uuid4())
-        
-        # Add metadata to property data
-        property_data.update({
-            'property_id': property_id,
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
-        })
+        # Generate unique property ID and add metadata to property data
+        property_id = indexing.prepare_property(property_data)['property_id']
+        with metrics.phase('embed'):
+            embeddings.add_embeddings([property_data])
         
         # Index property in OpenSearch
-        opensearch_client.index(
-            index=index_name,
-            body=property_data,
-            id=property_id
-        )
+        with metrics.phase('opensearch'):
+            opensearch_client.index(
+                index=index_name,
+                body=property_data,
+                id=property_id
+            )
+        with metrics.phase('cache_invalidate'):
+            search_cache.invalidate()
         
         return {
             'statusCode': 200,
@@ -88,16 +66,68 @@ def index_property(event):
         }
         
     except Exception as e:
+        LOG.exception("error=index_property_failed")
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
 
-    
+
+def parse_bulk_body(body):
+    # Accept a JSON array, {"properties": [...]} or newline-delimited JSON
+    body = body or ''
+    try:
+        parsed = json.loads(body)
+    except ValueError:
+        properties = [json.loads(line) for line in body.splitlines() if line.strip()]
+    else:
+        if isinstance(parsed, dict):
+            properties = parsed.get('properties', [parsed])
+        elif isinstance(parsed, list):
+            properties = parsed
+        else:
+            raise ValueError('expected a JSON array, object or newline-delimited JSON')
+    if not isinstance(properties, list) or not all(isinstance(doc, dict) for doc in properties):
+        raise ValueError('expected a list of property objects')
+    return properties
+
+
+def bulk_index_property(event):
+    try:
+        properties = parse_bulk_body(http.request_body(event))
+    except ValueError as e:
+        return {'statusCode': 400, 'body': json.dumps({'error': f'Invalid bulk payload: {e}'})}
+    if not properties:
+        return {'statusCode': 400, 'body': json.dumps({'error': 'At least one property is required'})}
+
+    try:
+        with metrics.phase('client_init'):
+            opensearch_client = clients.get_opensearch_client()
+            index_mapping.ensure_property_index(opensearch_client, os.environ['INDEX_NAME'])
+        with metrics.phase('bulk_index'):
+            results = indexing.bulk_index_properties(opensearch_client, os.environ['INDEX_NAME'], properties)
+    except Exception as e:
+        LOG.exception("error=bulk_index_failed")
+        return {'statusCode': 500, 'body': json.dumps({'error': str(e)})}
+
+    failed = sum(1 for result in results if 'error' in result)
+    if failed < len(results):
+        with metrics.phase('cache_invalidate'):
+            search_cache.invalidate()
+    metrics.count('documents', len(results))
+    metrics.count('failed_documents', failed)
+    return {
+        'statusCode': 207 if failed else 200,
+        'body': json.dumps({
+            'indexed': len(results) - failed,
+            'failed': failed,
+            'results': results
+        })
+    }
+
             
 def create_presigned_post(event):
     # Generate a presigned S3 POST URL
-    LOG.info(f"method=create_presigned_post , event={event}")
     query_params = {}
     if 'queryStringParameters' in event:
         query_params = event['queryStringParameters']
@@ -113,8 +143,7 @@ def create_presigned_post(event):
         # remove special characters from file name
         file_name = re.sub(r'[^a-zA-Z0-9_\-\.]','',file_name)
 
-        session = boto3.Session()
-        s3_client = session.client('s3', region_name=os.environ['AWS_REGION'])
+        s3_client = clients.get_s3_client()
         file_name = file_name.replace(' ', '_')
         s3_key = f"properties/data/{file_name}.{extension}"
         response = s3_client.generate_presigned_post(Bucket=os.environ['S3_BUCKET'], Key=s3_key)
@@ -122,26 +151,8 @@ def create_presigned_post(event):
     else:
         return {'statusCode': 400, 'body': json.dumps({'error': 'Missing file_extension field cannot generate signed url'})}
 
-
-class CustomJsonEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            if float(obj).is_integer():
-                return int(float(obj))
-            else:
-                return float(obj)
-        return super(CustomJsonEncoder, self).default(obj)
-
-# JSON REST output builder method
-def respond(err, res=None):
-    return {
-        "statusCode": "400" if err else res["statusCode"],
-        "body": json.dumps(err) if err else json.dumps(res, cls=CustomJsonEncoder),
-        "headers": {
-            "Access-Control-Allow-Origin": "*",
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Methods": "*",
-            "Access-Control-Allow-Headers": "Content-Type",
-            "Access-Control-Allow-Credentials": "*",
-        },
-    }
\ No newline at end of file
+ROUTES = {
+    'POST /properties': endpoint(index_property),
+    'POST /properties/bulk': endpoint(bulk_index_property),
+    'GET /properties/upload-image': endpoint(create_presigned_post),
+}
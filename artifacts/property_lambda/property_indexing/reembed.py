@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+from opensearchpy import helpers
+from property_common import clients, embeddings, index_mapping, search_cache
+
+# Batch job that (re)computes embeddings for documents already in the property
+# index, e.g. after switching VECTOR_SEARCH on or changing EMBEDDING_MODEL.
+# Documents are paged with search_after on property_id and updated in place
+# with partial bulk updates. Invoke it with {"reembed": {}} to embed everything
+# or {"reembed": {"only_missing": true}} to fill the gaps; like the catalog
+# import it hands over to a fresh invocation before the Lambda times out.
+
+LOG = logging.getLogger()
+LOG.setLevel(logging.INFO)
+
+REEMBED_PAGE_SIZE = int(os.environ.get('REEMBED_PAGE_SIZE', '200'))
+TIME_MARGIN_MS = int(os.environ.get('REEMBED_TIME_MARGIN_MS', '60000'))
+TEXT_FIELDS = ['property_id', 'title', 'description', 'location', 'amenities']
+
+
+def handler(event, context):
+    job = event.get('reembed', {})
+    if not embeddings.available():
+        LOG.warning("method=reembed , status=skipped , reason=vector_search_unavailable")
+        return {'status': 'skipped'}
+    return run_reembed(job, context)
+
+
+def _continue_later(context, job):
+    clients.get_lambda_client().invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType='Event',
+        Payload=json.dumps({'reembed': job}).encode('utf-8')
+    )
+
+
+def reembed_page(client, index_name, job):
+    # Embed and update one page, returns the number of documents seen
+    query = {'match_all': {}}
+    if job.get('only_missing'):
+        query = {'bool': {'must_not': [{'exists': {'field': embeddings.EMBEDDING_FIELD}}]}}
+    body = {
+        'size': REEMBED_PAGE_SIZE,
+        '_source': TEXT_FIELDS,
+        'query': query,
+        'sort': [{'property_id': 'asc'}]
+    }
+    if job.get('search_after'):
+        body['search_after'] = job['search_after']
+    hits = client.search(index=index_name, body=body)['hits']['hits']
+    if not hits:
+        return 0
+
+    vectors = embeddings.embed_texts(embeddings.property_text(hit['_source']) for hit in hits)
+    actions = (
+        {'_op_type': 'update', '_index': index_name, '_id': hit['_id'],
+         'doc': {embeddings.EMBEDDING_FIELD: vector}}
+        for hit, vector in zip(hits, vectors)
+    )
+    updated, errors = helpers.bulk(client, actions, max_retries=3, raise_on_error=False)
+    job['updated'] = job.get('updated', 0) + updated
+    job['failed'] = job.get('failed', 0) + len(errors)
+    job['search_after'] = hits[-1]['sort']
+    return len(hits)
+
+
+def run_reembed(job, context):
+    client = clients.get_opensearch_client()
+    index_name = os.environ['INDEX_NAME']
+    index_mapping.ensure_property_index(client, index_name)
+    LOG.info(f"method=run_reembed , resume_after={job.get('search_after')} , only_missing={bool(job.get('only_missing'))}")
+
+    while reembed_page(client, index_name, job):
+        if context and context.get_remaining_time_in_millis() < TIME_MARGIN_MS:
+            _continue_later(context, job)
+            LOG.info(f"method=run_reembed , status=continued , updated={job['updated']} , failed={job['failed']}")
+            return job
+
+    search_cache.invalidate()
+    job['done'] = True
+    LOG.info(f"method=run_reembed , status=done , updated={job.get('updated', 0)} , failed={job.get('failed', 0)}")
+    return job
@@ -0,0 +1,66 @@
+import os
+from property_common import index_mapping
+
+# Facet counts returned with search results so the UI can show which filter
+# values still match. Facets are aggregations on the same search request and
+# are only computed for the first page. They are cached on their own under
+# (query, filters, facet names), so later page sizes, sorts and repeated
+# empty-query browses reuse them without aggregating again.
+
+PRICE_FACET_INTERVAL = int(os.environ.get('SEARCH_PRICE_FACET_INTERVAL', '250'))
+FACET_TERMS_SIZE = int(os.environ.get('SEARCH_FACET_TERMS_SIZE', '20'))
+
+NUMERIC_FACETS = ['bedrooms', 'bathrooms', 'max_guests']
+TERM_FACETS = ['amenities', 'location']
+FACETS = ['price_per_night'] + NUMERIC_FACETS + TERM_FACETS
+AGGREGATION_PREFIX = 'facet_'
+
+
+class InvalidFacet(ValueError):
+    pass
+
+
+def requested(value):
+    # facets: true for every facet, or a list of facet names
+    if not value:
+        return []
+    if value is True:
+        return list(FACETS)
+    if not isinstance(value, list):
+        raise InvalidFacet('facets must be true or a list of facet names')
+    unknown = [name for name in value if name not in FACETS]
+    if unknown:
+        raise InvalidFacet(f"Unknown facets: {', '.join(map(str, unknown))}")
+    return sorted(set(value))
+
+
+def _aggregation(name):
+    if name == 'price_per_night':
+        return {'histogram': {'field': name, 'interval': PRICE_FACET_INTERVAL, 'min_doc_count': 1}}
+    if name in NUMERIC_FACETS:
+        return {'terms': {'field': name, 'size': FACET_TERMS_SIZE, 'order': {'_key': 'asc'}}}
+    return {'terms': {'field': index_mapping.TERM_FILTER_FIELDS.get(name, name), 'size': FACET_TERMS_SIZE}}
+
+
+def aggregations(names):
+    return {AGGREGATION_PREFIX + name: _aggregation(name) for name in names}
+
+
+def aggregated(response, names):
+    # Whether a search response carries the aggregations for these facets
+    aggs = response.get('aggregations', {})
+    return all(AGGREGATION_PREFIX + name in aggs for name in names)
+
+
+def parse(response, names):
+    # {name: [{value, count}]}, price buckets also carry their upper bound
+    aggs = response.get('aggregations', {})
+    result = {}
+    for name in names:
+        buckets = aggs.get(AGGREGATION_PREFIX + name, {}).get('buckets', [])
+        if name == 'price_per_night':
+            result[name] = [{'value': bucket['key'], 'to': bucket['key'] + PRICE_FACET_INTERVAL,
+                             'count': bucket['doc_count']} for bucket in buckets]
+        else:
+            result[name] = [{'value': bucket['key'], 'count': bucket['doc_count']} for bucket in buckets]
+    return result
@@ -0,0 +1,92 @@
+import os
+from property_common import index_mapping
+
+# Spatial filters, distance sorting and map clustering for property search.
+# Properties carry an indexed geo_point (see index_mapping.GEO_FIELD), so "near
+# X" becomes a geo_distance filter on the index instead of fuzzy matching on
+# the location text.
+#
+#   filters.bounding_box: {"top_left": {"lat", "lon"}, "bottom_right": {"lat", "lon"}}
+#   filters.near:         {"lat", "lon", "radius_km"}
+#   sort: "distance"      nearest first, needs filters.near
+#   clusters:             {"precision": 1-12} geohash_grid buckets for the map view
+
+MAX_RADIUS_KM = float(os.environ.get('SEARCH_MAX_RADIUS_KM', '500'))
+DEFAULT_CLUSTER_PRECISION = int(os.environ.get('SEARCH_CLUSTER_PRECISION', '5'))
+MAX_CLUSTER_BUCKETS = int(os.environ.get('SEARCH_MAX_CLUSTER_BUCKETS', '1000'))
+GEO_FILTERS = ['bounding_box', 'near']
+
+
+class InvalidGeoQuery(ValueError):
+    pass
+
+
+def _point(value, name):
+    try:
+        lat, lon = float(value['lat']), float(value['lon'])
+    except (KeyError, TypeError, ValueError):
+        raise InvalidGeoQuery(f'{name} needs numeric lat and lon')
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        raise InvalidGeoQuery(f'{name} is out of range')
+    return {'lat': lat, 'lon': lon}
+
+
+def _radius_km(near):
+    try:
+        radius = float(near.get('radius_km', 25))
+    except (TypeError, ValueError):
+        raise InvalidGeoQuery('radius_km must be a number')
+    if radius <= 0:
+        raise InvalidGeoQuery('radius_km must be positive')
+    return min(radius, MAX_RADIUS_KM)
+
+
+def build_geo_filter(key, value):
+    if not isinstance(value, dict):
+        raise InvalidGeoQuery(f'{key} must be an object')
+    if key == 'bounding_box':
+        return {'geo_bounding_box': {index_mapping.GEO_FIELD: {
+            'top_left': _point(value.get('top_left'), 'top_left'),
+            'bottom_right': _point(value.get('bottom_right'), 'bottom_right')
+        }}}
+    return {'geo_distance': {
+        'distance': f'{_radius_km(value)}km',
+        index_mapping.GEO_FIELD: _point(value, 'near')
+    }}
+
+
+def distance_sort(filters):
+    # Nearest first with property_id as the unique tiebreaker
+    near = (filters or {}).get('near')
+    if not near:
+        raise InvalidGeoQuery('sort by distance needs filters.near')
+    return [
+        {'_geo_distance': {index_mapping.GEO_FIELD: _point(near, 'near'), 'order': 'asc', 'unit': 'km'}},
+        {'property_id': {'order': 'asc'}}
+    ]
+
+
+def cluster_aggregation(clusters):
+    # clusters: true for the default precision, or {precision}
+    if clusters is True:
+        clusters = {}
+    if not isinstance(clusters, dict):
+        raise InvalidGeoQuery('clusters must be true or an object')
+    try:
+        precision = int(clusters.get('precision', DEFAULT_CLUSTER_PRECISION))
+    except (TypeError, ValueError):
+        raise InvalidGeoQuery('precision must be a number')
+    return {'clusters': {
+        'geohash_grid': {'field': index_mapping.GEO_FIELD, 'precision': max(1, min(precision, 12)),
+                         'size': MAX_CLUSTER_BUCKETS},
+        # Place the marker where the properties are, not at the cell centre
+        'aggs': {'centre': {'geo_centroid': {'field': index_mapping.GEO_FIELD}}}
+    }}
+
+
+def clusters(response):
+    buckets = response.get('aggregations', {}).get('clusters', {}).get('buckets', [])
+    return [
+        {'geohash': bucket['key'], 'count': bucket['doc_count'], 'location': bucket['centre']['location']}
+        for bucket in buckets
+    ]
@@ -0,0 +1,90 @@
+import os
+from property_common import embeddings, metrics
+from property_search import views
+
+# Hybrid search runs a BM25 query and a k-NN query in one _msearch round trip
+# and fuses the two ranked lists with reciprocal rank fusion (RRF). RRF only
+# uses ranks, so the unbounded BM25 scores and the inner product scores never
+# have to be normalised against each other. The lexical leg has no fuzziness:
+# typos and paraphrases are what the vector leg is for, and fuzzy expansion is
+# the expensive part of the old query on large indexes.
+
+RRF_K = int(os.environ.get('RRF_K', '60'))
+# Candidates pulled from each leg before fusion
+HYBRID_CANDIDATES = int(os.environ.get('HYBRID_CANDIDATES', '50'))
+
+
+def lexical_query(query, filter_conditions, size, source=None):
+    return {
+        'size': size,
+        '_source': source or views.source_filter(views.DETAIL),
+        'query': {
+            'bool': {
+                'must': [{
+                    'multi_match': {
+                        'query': query,
+                        'fields': ['title^3', 'description^2', 'location', 'amenities'],
+                        'type': 'best_fields'
+                    }
+                }],
+                'filter': filter_conditions
+            }
+        }
+    }
+
+
+def knn_query(vector, filter_conditions, size, source=None):
+    knn = {'vector': vector, 'k': size}
+    if filter_conditions:
+        # Efficient filtering, the filter is applied during the graph search
+        knn['filter'] = {'bool': {'filter': filter_conditions}}
+    return {
+        'size': size,
+        '_source': source or views.source_filter(views.DETAIL),
+        'query': {'knn': {embeddings.EMBEDDING_FIELD: knn}}
+    }
+
+
+def fuse(result_lists, size, k=RRF_K):
+    # Reciprocal rank fusion over lists of hits, best first
+    scores = {}
+    hits = {}
+    for result in result_lists:
+        for rank, hit in enumerate(result, start=1):
+            scores[hit['_id']] = scores.get(hit['_id'], 0.0) + 1.0 / (k + rank)
+            hits.setdefault(hit['_id'], hit)
+    ranked = sorted(scores, key=lambda hit_id: scores[hit_id], reverse=True)[:size]
+    return [{**hits[hit_id], '_score': round(scores[hit_id], 6)} for hit_id in ranked]
+
+
+def msearch_body(query, filter_conditions, size, source=None):
+    # Both legs in one _msearch body, embedding the query on the way
+    candidates = max(size, HYBRID_CANDIDATES)
+    with metrics.phase('embed'):
+        vector = embeddings.embed_query(query)
+    return [
+        {}, lexical_query(query, filter_conditions, candidates, source),
+        {}, knn_query(vector, filter_conditions, candidates, source)
+    ]
+
+
+def fused_response(response, size):
+    # Fuse an _msearch response into one shaped like a regular _search response
+    legs = []
+    for leg in response['responses']:
+        if 'error' in leg:
+            raise RuntimeError(f"hybrid search leg failed: {leg['error']}")
+        legs.append(leg['hits']['hits'])
+    fused = fuse(legs, size)
+    return {
+        'hits': {
+            # Distinct candidates across both legs, the fused list is capped at size
+            'total': {'value': len({hit['_id'] for leg in legs for hit in leg}), 'relation': 'gte'},
+            'hits': fused
+        }
+    }
+
+
+def search(client, index_name, query, filter_conditions, size, source=None):
+    response = client.msearch(index=index_name, body=msearch_body(query, filter_conditions, size, source))
+    return fused_response(response, size)
@@ -0,0 +1,68 @@
+import os
+import time
+
+# Presigned image URLs cached per S3 key in time buckets. Within one bucket
+# every search returns the same URL for the same image, so browsers and CDNs
+# can cache the image, and each key is signed once per bucket instead of once
+# per hit per request.
+
+SIGNED_URL_TTL = int(os.environ.get('SIGNED_URL_TTL', '3600'))
+SIGNED_URL_BUCKET_SECONDS = int(os.environ.get('SIGNED_URL_BUCKET_SECONDS', '900'))
+MAX_CACHED_URLS = int(os.environ.get('MAX_CACHED_URLS', '10000'))
+
+# s3 key -> (time bucket, presigned url)
+_cache = {}
+
+
+def image_key(property_data):
+    # S3 key of the first image of a property, if any
+    image_urls = property_data.get('image_urls') or []
+    if not image_urls:
+        return None
+    image_url = image_urls[0]
+    return (image_url.get('content', '') if isinstance(image_url, dict) else image_url) or None
+
+
+def _evict(window):
+    # Drop URLs from earlier buckets, or everything if one bucket overflows
+    for key in [key for key, (cached_window, _) in _cache.items() if cached_window != window]:
+        del _cache[key]
+    if len(_cache) >= MAX_CACHED_URLS:
+        _cache.clear()
+
+
+def presign_batch(s3_client, bucket, keys, now=None):
+    # Return ({s3 key: url}, stats) signing only keys not cached in this bucket
+    window = int((now or time.time()) // SIGNED_URL_BUCKET_SECONDS)
+    urls = {}
+    misses = []
+    for key in set(keys):
+        cached = _cache.get(key)
+        if cached and cached[0] == window:
+            urls[key] = cached[1]
+        else:
+            misses.append(key)
+
+    start = time.perf_counter()
+    if misses and len(_cache) + len(misses) > MAX_CACHED_URLS:
+        _evict(window)
+    for key in misses:
+        url = s3_client.generate_presigned_url(
+            ClientMethod='get_object',
+            Params={
+                'Bucket': bucket,
+                'Key': key,
+                # Let browsers keep the image for as long as the URL is reused
+                'ResponseCacheControl': f'private, max-age={SIGNED_URL_BUCKET_SECONDS}'
+            },
+            ExpiresIn=SIGNED_URL_TTL
+        )
+        _cache[key] = (window, url)
+        urls[key] = url
+
+    stats = {
+        'hits': len(urls) - len(misses),
+        'misses': len(misses),
+        'sign_ms': round((time.perf_counter() - start) * 1000, 3)
+    }
+    return urls, stats
@@ -0,0 +1,78 @@
+import base64
+import json
+import os
+
+# Cursor based paging for property search. Results are sorted on
+# price_per_night with property_id as a unique tiebreaker, and the next page
+# starts search_after the last hit's sort values, so every page costs the same
+# however deep the client goes. The cursor is an opaque url-safe token.
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('SEARCH_DEFAULT_PAGE_SIZE', '10'))
+MAX_PAGE_SIZE = int(os.environ.get('SEARCH_MAX_PAGE_SIZE', '50'))
+PIT_KEEP_ALIVE = os.environ.get('SEARCH_PIT_KEEP_ALIVE', '2m')
+
+SORT = [
+    {'price_per_night': {'order': 'asc'}},
+    {'property_id': {'order': 'asc'}}
+]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def page_size(value):
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor('page_size must be a number')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(search_after, pit_id=None):
+    payload = {'after': search_after}
+    if pit_id:
+        payload['pit'] = pit_id
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    # Return (search_after, pit_id) from a cursor, (None, None) for the first page
+    if not cursor:
+        return None, None
+    if not isinstance(cursor, str):
+        raise InvalidCursor('Invalid cursor')
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        search_after = payload['after']
+        if not isinstance(search_after, list):
+            raise ValueError('after must be a list')
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    return search_after, payload.get('pit')
+
+
+def open_point_in_time(client, index_name):
+    return client.create_point_in_time(index=index_name, keep_alive=PIT_KEEP_ALIVE)['pit_id']
+
+
+def apply_page(search_query, size, search_after=None, pit_id=None, sort=None):
+    # Add size, sort, search_after and point in time to a search body. Any sort
+    # works as long as it ends on a unique tiebreaker like property_id.
+    search_query['size'] = size
+    search_query['sort'] = sort or SORT
+    if search_after:
+        search_query['search_after'] = search_after
+    if pit_id:
+        search_query['pit'] = {'id': pit_id, 'keep_alive': PIT_KEEP_ALIVE}
+    return search_query
+
+
+def next_cursor(response, size, pit_id=None):
+    # Cursor for the page after this one, None when this was the last page
+    hits = response['hits']['hits']
+    if len(hits) < size:
+        return None
+    return encode_cursor(hits[-1]['sort'], response.get('pit_id') or pit_id)
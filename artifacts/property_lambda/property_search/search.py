@@ -1,45 +1,261 @@
-import json
+import asyncio
 import os
-import boto3
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
+import logging
+from property_common import aio, availability_index, clients, embeddings, http, index_mapping, metrics, property_lookup, router, search_cache
+from property_search import facets, geo, hybrid, image_urls, pagination, suggest, views
 
+LOG = logging.getLogger()
+LOG.setLevel(logging.INFO)
+
+# Bookings don't invalidate the search cache, so searches filtered on
+# availability are only cached briefly
+AVAILABILITY_CACHE_TTL = int(os.environ.get('SEARCH_AVAILABILITY_CACHE_TTL', '30'))
+STAY_FILTERS = ['check_in', 'check_out']
+NUMERIC_FILTERS = ['price_per_night', 'bedrooms', 'bathrooms', 'max_guests']
+# Exact-match filters, on keyword fields or their keyword sub-fields. The
+# index isn't dynamically mapped, a term on any other field matches nothing.
+TERM_FILTERS = ['property_id', 'location', 'amenities']
+FILTERS = STAY_FILTERS + geo.GEO_FILTERS + NUMERIC_FILTERS + TERM_FILTERS
+# A slow cache lookup counts as a miss rather than holding up the search
+SEARCH_CACHE_TIMEOUT = float(os.environ.get('SEARCH_CACHE_TIMEOUT', '0.5'))
+
+def endpoint(handle):
+    # Route for a handle_* function: the shared client in, a compressed response
+    # out. Coroutine handlers run on the persistent event loop.
+    def route(event, context):
+        # Reuse the OpenSearch client across warm invocations
+        with metrics.phase('client_init'):
+            client = clients.get_opensearch_client()
+        if asyncio.iscoroutinefunction(handle):
+            response = aio.run(handle(event, client, os.environ['INDEX_NAME']))
+        else:
+            response = handle(event, client, os.environ['INDEX_NAME'])
+        # Compress large bodies for clients that accept it
+        with metrics.phase('compress'):
+            return http.compress(event, response)
+    return route
+
+@metrics.instrument('property_search')
 def handler(event, context):
-    # Get environment variables
-    region = os.environ['REGION']
-    service = 'aoss'
-    credentials = boto3.Session().get_credentials()
-    awsauth = AWS4Auth(credentials.access_key, credentials.secret_key, region, service, session_token=credentials.token)
-    s3_client = boto3.client('s3')
-    # Get OpenSearch endpoint and index name
-    host = os.environ['OPENSEARCH_ENDPOINT']
-    index_name = os.environ['INDEX_NAME']
-    
-    # Create OpenSearch client
-    client = OpenSearch(
-        hosts=[{'host': host, 'port': 443}],
-        http_auth=awsauth,
-        use_ssl=True,
-        verify_certs=True,
-        connection_class=RequestsHttpConnection
-    )
-    
+    # Anything else this function receives is a search, as before routing
+    return router.dispatch(ROUTES, event, context, fallback=ROUTES['POST /properties/search'])
+
+async def search_properties(event, client, index_name):
     # Parse request body
-    body = json.loads(event['body'])
+    body = http.parse_body(event)
     query = body.get('query', '')
-    filters = body.get('filters', {})
+    filters = body.get('filters') or {}
+    # Hybrid mode fuses BM25 and k-NN rankings, it needs a query and embeddings
+    # and returns a single fused page without a cursor
+    mode = body.get('mode', 'lexical')
+    use_hybrid = mode == 'hybrid' and bool(query) and embeddings.available()
+    if mode == 'hybrid' and not use_hybrid:
+        metrics.tag('hybrid_fallback', True)
+    by_distance = body.get('sort') == 'distance'
+    try:
+        size = pagination.page_size(body.get('page_size'))
+        search_after, pit_id = pagination.decode_cursor(body.get('cursor'))
+        view = views.parse_view(body.get('view'))
+        search_query = build_search_query(query, filters)
+        sort = geo.distance_sort(filters) if by_distance else pagination.SORT
+        search_query['_source'] = views.source_filter(view)
+        # Map clusters cover the whole result set, only the first page needs them
+        clusters = body.get('clusters') if not search_after else None
+        if clusters:
+            search_query['aggs'] = geo.cluster_aggregation(clusters)
+        # Facets too, hybrid results are a fused top list without aggregations
+        facet_names = facets.requested(body.get('facets')) if not search_after and not use_hybrid else []
+    except (InvalidFilter, pagination.InvalidCursor, geo.InvalidGeoQuery, availability_index.InvalidStay,
+            facets.InvalidFacet, views.InvalidView) as e:
+        return http.json_response(400, {'error': str(e)})
+    by_stay = any(filters.get(key) for key in STAY_FILTERS)
+    cache_ttl = AVAILABILITY_CACHE_TTL if by_stay else search_cache.SEARCH_CACHE_TTL
+    
+    # Browsing with a point in time keeps every page on the same snapshot
+    if use_hybrid:
+        search_after, pit_id = None, None
+    if body.get('consistent') and not pit_id and not use_hybrid:
+        try:
+            pit_id = await aio.call(pagination.open_point_in_time, client, index_name)
+        except asyncio.TimeoutError:
+            return http.json_response(504, {'error': 'Search timed out'})
+    search_query = pagination.apply_page(search_query, size, search_after, pit_id, sort)
+    
+    # Serve repeated searches from the cache, keyed on the normalised request.
+    # The query text is analysed case-insensitively so its case is dropped too.
+    # Point in time pages are tied to a snapshot and never cached. Facets
+    # depend only on the query and filters and are cached on their own, so
+    # they're reused across page sizes and sorts. Both lookups run concurrently.
+    page_request, facet_request = None, None
+    if not pit_id:
+        page_request = {'query': query.lower(), 'filters': filters,
+                        'size': size, 'after': search_after,
+                        'mode': 'hybrid' if use_hybrid else None,
+                        'sort': 'distance' if by_distance else None,
+                        'aggs': search_query.get('aggs'), 'facets': facet_names,
+                        'view': view}
+    if facet_names:
+        facet_request = {'facets': facet_names, 'query': query.lower(), 'filters': filters}
+    with metrics.phase('cache_get'):
+        (cache_key, response, cache_tier), (facet_key, facet_values, _) = await asyncio.gather(
+            cached(page_request), cached(facet_request))
+    if facet_names and facet_values is None:
+        # Only aggregate facets when they aren't cached
+        search_query.setdefault('aggs', {}).update(facets.aggregations(facet_names))
+        if response is not None and not facets.aggregated(response, facet_names):
+            # The page was cached along with its facets, so it has no aggregations
+            response, cache_tier = None, None
+    if response is None:
+        try:
+            with metrics.phase('opensearch'):
+                response = await run_search(index_name, query, filters, size, search_query, use_hybrid, pit_id)
+        except asyncio.TimeoutError:
+            return http.json_response(504, {'error': 'Search timed out'})
+    
+    # Write new cache entries while the response is built
+    writes = []
+    if cache_key and not cache_tier:
+        writes.append(aio.submit(search_cache.put, cache_key, response, cache_ttl))
+    if facet_names and facet_values is None:
+        facet_values = facets.parse(response, facet_names)
+        if facet_key:
+            writes.append(aio.submit(search_cache.put, facet_key, facet_values, cache_ttl))
+    metrics.tag('cache', cache_tier or 'miss')
+    metrics.tag('mode', 'hybrid' if use_hybrid else 'lexical')
+    metrics.count('hits', len(response['hits']['hits']))
     
+    # Format response, copying hits so cached responses stay untouched
+    properties = []
+    for hit in response['hits']['hits']:
+        property_data = dict(hit['_source'])
+        property_data['id'] = hit['_id']
+        property_data['score'] = hit['_score']
+        if by_distance and not use_hybrid:
+            property_data['distance_km'] = round(hit['sort'][0], 3)
+        properties.append(property_data)
+    
+    # Sign the first image of every hit in one batch, reusing cached URLs
+    sign_images(properties)
+    for property_data in properties:
+        views.present(property_data, view)
+    
+    payload = {
+        'properties': properties,
+        'total': response['hits']['total']['value'],
+        'page_size': size,
+        'next_cursor': None if use_hybrid else pagination.next_cursor(response, size, pit_id),
+        'mode': 'hybrid' if use_hybrid else 'lexical',
+        'view': view
+    }
+    if clusters and not use_hybrid:
+        payload['clusters'] = geo.clusters(response)
+    if facet_names:
+        payload['facets'] = facet_values
+    result = http.json_response(200, payload, {'X-Cache': 'HIT' if cache_tier else 'MISS'})
+    with metrics.phase('cache_put'):
+        metrics.count('cache_put_timeouts', await aio.settle(writes, SEARCH_CACHE_TIMEOUT))
+    return result
+
+async def cached(request):
+    # (key, value, tier) for a cacheable request. Both the key, which reads
+    # the shared generation counter, and the entry are looked up off the
+    # loop; a slow lookup is a miss, and a slow key leaves nothing to cache.
+    if request is None:
+        return None, None, None
+    try:
+        key = await aio.call(search_cache.cache_key, request, timeout=SEARCH_CACHE_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.count('cache_get_timeouts')
+        return None, None, None
+    try:
+        value, tier = await aio.call(search_cache.get, key, timeout=SEARCH_CACHE_TIMEOUT)
+    except asyncio.TimeoutError:
+        metrics.count('cache_get_timeouts')
+        return key, None, None
+    return key, value, tier
+
+async def run_search(index_name, query, filters, size, search_query, use_hybrid, pit_id):
+    if use_hybrid:
+        # Embedding the query is CPU bound, it runs on a worker thread
+        body = await aio.call(hybrid.msearch_body, query, build_filters(filters), size, search_query['_source'])
+        return hybrid.fused_response(await aio.opensearch('msearch', index=index_name, body=body), size)
+    if pit_id:
+        # The point in time already pins the index
+        return await aio.opensearch('search', body=search_query)
+    return await aio.opensearch('search', body=search_query, index=index_name)
+
+def handle_suggest(event, client, index_name):
+    # GET /properties/suggest?q=<prefix>&size=<n>
+    params = event.get('queryStringParameters') or {}
+    size = suggest.suggest_size(params.get('size'))
+    with metrics.phase('opensearch'):
+        results, cached = suggest.suggestions(client, index_name, params.get('q'), size)
+    metrics.tag('cache', 'local' if cached else 'miss')
+    metrics.count('hits', len(results))
+    return http.json_response(200, {'suggestions': results}, {
+        'Cache-Control': f'public, max-age={suggest.SUGGEST_BROWSER_MAX_AGE}',
+        'X-Cache': 'HIT' if cached else 'MISS'
+    })
+
+def sign_images(properties):
+    # Sign the first image of every property in one batch, the S3 client is
+    # reused across warm invocations
+    image_keys = [image_urls.image_key(property_data) for property_data in properties]
+    with metrics.phase('presign'):
+        signed_urls, stats = image_urls.presign_batch(
+            clients.get_s3_client(), os.environ['S3_BUCKET_NAME'], [key for key in image_keys if key])
+    metrics.count('presign_cache_hits', stats['hits'])
+    metrics.count('presign_cache_misses', stats['misses'])
+    for property_data, key in zip(properties, image_keys):
+        if key:
+            property_data['image_url'] = signed_urls[key]
+    return stats
+
+def handle_get_property(event, client, index_name):
+    # GET /properties/{property_id}, the full document for the detail page
+    property_id = (event.get('pathParameters') or {}).get('property_id')
+    with metrics.phase('opensearch'):
+        document = property_lookup.get_property(client, index_name, property_id)
+    if not document:
+        return http.json_response(404, {'error': 'Property not found'})
+    property_data = views.project(document, views.DETAIL)
+    sign_images([property_data])
+    return http.json_response(200, property_data)
+
+def handle_batch_properties(event, client, index_name):
+    # POST /properties/batch {"ids": [...], "view": "card"|"detail"}, one _mget
+    body = http.parse_body(event)
+    property_ids = body.get('ids')
+    try:
+        view = views.parse_view(body.get('view'))
+    except views.InvalidView as e:
+        return http.json_response(400, {'error': str(e)})
+    if not isinstance(property_ids, list) or not all(isinstance(i, str) for i in property_ids):
+        return http.json_response(400, {'error': 'ids must be a list of property ids'})
+    if len(property_ids) > property_lookup.MAX_LOOKUP_IDS:
+        return http.json_response(400, {'error': f'At most {property_lookup.MAX_LOOKUP_IDS} ids per request'})
+    with metrics.phase('opensearch'):
+        documents = property_lookup.get_properties(client, index_name, property_ids)
+    properties = [views.project(documents[i], view) for i in dict.fromkeys(property_ids) if i in documents]
+    sign_images(properties)
+    for property_data in properties:
+        views.present(property_data, view)
+    metrics.count('hits', len(properties))
+    return http.json_response(200, {
+        'properties': properties,
+        'missing': [i for i in dict.fromkeys(property_ids) if i not in documents]
+    })
+
+def build_search_query(query, filters):
     # Construct search query with multi-match for better search results
     search_query = {
-        "size": 10,
+        # Index-only fields are never returned
+        "_source": views.source_filter(views.DETAIL),
         "query": {
             "bool": {
                 "must": []
             }
-        },
-        "sort": [
-            {"price_per_night": {"order": "asc"}}
-        ]
+        }
     }
     
     # Add query if provided, otherwise use match_all
@@ -59,84 +275,53 @@ def handler(event, context):
     
     # Add filters if provided
     if filters:
-        filter_conditions = []
-        for key, value in filters.items():
-            if key in ['price_per_night', 'bedrooms', 'bathrooms', 'max_guests']:
-                # Range queries for numeric fields
-                if isinstance(value, dict) and 'min' in value and 'max' in value:
-                    filter_conditions.append({
-                        "range": {
-                            key: {
-                                "gte": value['min'],
-                                "lte": value['max']
-                            }
-                        }
-                    })
-            else:
-                # Term queries for categorical fields
-                if isinstance(value, int) and value > 0:
-                    filter_conditions.append({"term": {key: value}})
-                if isinstance(value, str) and value != "":
-                    filter_conditions.append({"term": {key: value}})
-        search_query["query"]["bool"]["filter"] = filter_conditions
+        search_query["query"]["bool"]["filter"] = build_filters(filters)
     
-    # Execute search
-    response = client.search(
-        body=search_query,
-        index=index_name
-    )
-    
-    # Format response
-    properties = []
-    for hit in response['hits']['hits']:
-        property_data = hit['_source']
-        property_data['id'] = hit['_id']
-        property_data['score'] = hit['_score']
-        
-        if 'image_urls' in property_data and len(property_data['image_urls']) > 0:
-            image_url = property_data['image_urls'][0]
-            # Extract the key from the URL or use the content directly
-            s3_key = image_url.get('content', '') if isinstance(image_url, dict) else image_url
-            if s3_key:
-                presigned_url = s3_client.generate_presigned_url(
-                    ClientMethod='get_object',
-                    Params={'Bucket': os.environ['S3_BUCKET_NAME'], 'Key': s3_key},
-                    ExpiresIn=3600
-                )
-                property_data['image_url'] = presigned_url
-        properties.append(property_data)
-    
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Credentials': True,
-        },
-        'body': json.dumps({
-            'properties': properties,
-            'total': response['hits']['total']['value']
-        })
-    } 
+    return search_query
 
-class CustomJsonEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            if float(obj).is_integer():
-                return int(float(obj))
-            else:
-                return float(obj)
-        return super(CustomJsonEncoder, self).default(obj)
+class InvalidFilter(ValueError):
+    pass
+
+def build_filters(filters):
+    filter_conditions = []
+    filters = filters or {}
+    if not isinstance(filters, dict):
+        raise InvalidFilter('filters must be an object')
+    unknown = [key for key in filters if key not in FILTERS]
+    if unknown:
+        raise InvalidFilter(f"Unknown filters: {', '.join(sorted(unknown))}")
+    if any(filters.get(key) for key in STAY_FILTERS):
+        # Drop properties with a confirmed stay overlapping the requested one
+        filter_conditions.append(availability_index.search_filter(filters.get('check_in'), filters.get('check_out')))
+    for key, value in filters.items():
+        if key in STAY_FILTERS:
+            continue
+        if key in geo.GEO_FILTERS:
+            # Spatial filters on the indexed geo point
+            filter_conditions.append(geo.build_geo_filter(key, value))
+        elif key in NUMERIC_FILTERS:
+            # Range queries for numeric fields
+            if isinstance(value, dict) and 'min' in value and 'max' in value:
+                filter_conditions.append({
+                    "range": {
+                        key: {
+                            "gte": value['min'],
+                            "lte": value['max']
+                        }
+                    }
+                })
+        else:
+            # Term queries for categorical fields
+            field = index_mapping.TERM_FILTER_FIELDS.get(key, key)
+            if isinstance(value, int) and value > 0:
+                filter_conditions.append({"term": {field: value}})
+            if isinstance(value, str) and value != "":
+                filter_conditions.append({"term": {field: value}})
+    return filter_conditions
 
-# JSON REST output builder method
-def respond(err, res=None):
-    return {
-        "statusCode": "400" if err else res["statusCode"],
-        "body": json.dumps(err) if err else json.dumps(res, cls=CustomJsonEncoder),
-        "headers": {
-            "Access-Control-Allow-Origin": "*",
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Methods": "*",
-            "Access-Control-Allow-Headers": "Content-Type",
-            "Access-Control-Allow-Credentials": "*",
-        },
-    }
\ No newline at end of file
+ROUTES = {
+    'POST /properties/search': endpoint(search_properties),
+    'GET /properties/suggest': endpoint(handle_suggest),
+    'GET /properties/{property_id}': endpoint(handle_get_property),
+    'POST /properties/batch': endpoint(handle_batch_properties),
+}
@@ -0,0 +1,57 @@
+import os
+from property_common.cache import TTLCache
+
+# Typeahead suggestions for the search box, served by the completion
+# suggester on the `suggest` field (property titles and locations, see
+# indexing.prepare_property). The completion FST is held in memory by
+# OpenSearch, so lookups avoid the scoring and fuzzy expansion of a full
+# search. Responses carry only ids and labels and are cached per container
+# and by the browser, since keystroke traffic repeats the same prefixes.
+
+SUGGEST_FIELD = 'suggest'
+DEFAULT_SUGGESTIONS = int(os.environ.get('SUGGEST_DEFAULT_SIZE', '8'))
+MAX_SUGGESTIONS = int(os.environ.get('SUGGEST_MAX_SIZE', '20'))
+MAX_PREFIX_LENGTH = 50
+SUGGEST_CACHE_TTL = int(os.environ.get('SUGGEST_CACHE_TTL', '300'))
+SUGGEST_BROWSER_MAX_AGE = int(os.environ.get('SUGGEST_BROWSER_MAX_AGE', '60'))
+
+_cache = TTLCache(int(os.environ.get('SUGGEST_CACHE_MAX_ENTRIES', '5000')), SUGGEST_CACHE_TTL)
+
+
+def suggest_size(value):
+    try:
+        size = int(value) if value else DEFAULT_SUGGESTIONS
+    except (TypeError, ValueError):
+        size = DEFAULT_SUGGESTIONS
+    return max(1, min(size, MAX_SUGGESTIONS))
+
+
+def normalise_prefix(prefix):
+    return ' '.join((prefix or '').lower().split())[:MAX_PREFIX_LENGTH]
+
+
+def suggestions(client, index_name, prefix, size):
+    # Returns ([{id, label}], cached)
+    key = (normalise_prefix(prefix), size)
+    if not key[0]:
+        return [], False
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached, True
+    response = client.search(index=index_name, body={
+        '_source': False,
+        'suggest': {
+            'properties': {
+                'prefix': key[0],
+                'completion': {'field': SUGGEST_FIELD, 'size': size, 'skip_duplicates': True}
+            }
+        }
+    })
+    options = response.get('suggest', {}).get('properties', [{}])[0].get('options', [])
+    result = [{'id': option['_id'], 'label': option['text']} for option in options]
+    _cache.put(key, result)
+    return result, False
+
+
+def stats():
+    return _cache.stats()
@@ -0,0 +1,44 @@
+from property_common import property_lookup
+
+# Response views for property documents. List pages ask for the "card" view,
+# the fields a result card shows, so descriptions and image lists stay out of
+# the response; the "detail" view returns the whole document for the
+# property page. Index-only fields are never returned.
+
+INTERNAL_FIELDS = property_lookup.EXCLUDED_FIELDS
+CARD_FIELDS = ['property_id', 'title', 'location', 'price_per_night', 'bedrooms', 'bathrooms',
+               'max_guests', 'amenities', 'image_urls', 'geo_location']
+CARD = 'card'
+DETAIL = 'detail'
+VIEWS = [CARD, DETAIL]
+
+
+class InvalidView(ValueError):
+    pass
+
+
+def parse_view(value, default=DETAIL):
+    view = value or default
+    if view not in VIEWS:
+        raise InvalidView(f"view must be one of {', '.join(VIEWS)}")
+    return view
+
+
+def source_filter(view):
+    if view == CARD:
+        return {'includes': CARD_FIELDS}
+    return {'excludes': INTERNAL_FIELDS}
+
+
+def present(property_data, view):
+    # Cards only need the signed first image, not the list of image keys
+    if view == CARD:
+        property_data.pop('image_urls', None)
+    return property_data
+
+
+def project(document, view):
+    # Copy of a full document trimmed to a view, for documents fetched by id
+    if view == CARD:
+        return {key: value for key, value in document.items() if key in CARD_FIELDS or key == 'id'}
+    return dict(document)
@@ -0,0 +1,59 @@
+"""Property indexing throughput: one index call per document vs the bulk path.
+
+Runs against a local OpenSearch container with the security plugin disabled:
+
+    docker run -p 9200:9200 -e discovery.type=single-node \\
+        -e DISABLE_SECURITY_PLUGIN=true opensearchproject/opensearch:2.11.1
+    python benchmarks/bench_bulk_index.py --documents 50000
+"""
+import argparse
+import time
+import uuid
+
+import common
+from catalog import generate_catalog
+from opensearchpy import OpenSearch
+
+from property_common import indexing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9200)
+    parser.add_argument('--documents', type=int, default=50000)
+    parser.add_argument('--single-documents', type=int, default=1000,
+                        help='documents indexed one call at a time, the baseline')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    client = OpenSearch(hosts=[{'host': args.host, 'port': args.port}], use_ssl=False, timeout=60)
+    index_name = f'bench_bulk_{uuid.uuid4().hex[:8]}'
+    client.indices.create(index=index_name)
+    results = []
+    try:
+        start = time.perf_counter()
+        for property_data in generate_catalog(args.single_documents, seed=1):
+            indexing.prepare_property(property_data)
+            client.index(index=index_name, body=property_data, id=property_data['property_id'])
+        elapsed = time.perf_counter() - start
+        results.append({'strategy': 'single', 'documents': args.single_documents, 'seconds': round(elapsed, 3),
+                        'docs_per_second': round(args.single_documents / elapsed, 1)})
+
+        start = time.perf_counter()
+        outcomes = indexing.bulk_index_properties(client, index_name, generate_catalog(args.documents, seed=2))
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for outcome in outcomes if 'error' in outcome)
+        results.append({'strategy': 'bulk', 'documents': args.documents, 'failed': failed, 'seconds': round(elapsed, 3),
+                        'docs_per_second': round(args.documents / elapsed, 1),
+                        'chunk_size': indexing.BULK_CHUNK_SIZE, 'max_chunk_bytes': indexing.BULK_MAX_CHUNK_BYTES})
+    finally:
+        client.indices.delete(index=index_name)
+
+    for row in results:
+        print(f"strategy={row['strategy']:<7} documents={row['documents']:>8} docs/s={row['docs_per_second']:>10}")
+    common.write_results(args.output, {'benchmark': 'bulk_index', 'results': results})
+
+
+if __name__ == '__main__':
+    main()
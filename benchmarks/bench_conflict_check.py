@@ -0,0 +1,151 @@
+"""Booking conflict check latency as a property's booking history grows.
+
+Compares a range read on the BookingsByProperty index with the previous
+approach of reading every confirmed booking of the property from
+PropertyIndex and scanning in Python. Neither is the booking path's guard
+any more, bookings claim their nights in a transaction (property_booking.nights).
+
+Runs against DynamoDB Local:
+
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python benchmarks/bench_conflict_check.py --histories 100,1000,10000
+"""
+import argparse
+import uuid
+
+import common  # noqa: F401  (puts the lambda code on sys.path)
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+
+from property_booking import availability, booking_keys
+
+DAY = availability.SECONDS_PER_NIGHT
+START = 1577836800  # 2020-01-01
+
+
+def create_table(dynamodb, table_name):
+    table = dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[
+            {'AttributeName': 'booking_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'property_id', 'KeyType': 'RANGE'},
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'booking_id', 'AttributeType': 'S'},
+            {'AttributeName': 'property_id', 'AttributeType': 'S'},
+            {'AttributeName': 'stay_key', 'AttributeType': 'S'},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                'IndexName': booking_keys.BOOKINGS_BY_PROPERTY_INDEX,
+                'KeySchema': [
+                    {'AttributeName': 'property_id', 'KeyType': 'HASH'},
+                    {'AttributeName': 'stay_key', 'KeyType': 'RANGE'},
+                ],
+                'Projection': {'ProjectionType': 'ALL'},
+            },
+            {
+                'IndexName': 'PropertyIndex',
+                'KeySchema': [{'AttributeName': 'property_id', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'},
+            },
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    table.wait_until_exists()
+    return table
+
+
+def seed_history(table, property_id, count):
+    # Back-to-back three night stays, all in the past
+    with table.batch_writer() as batch:
+        for i in range(count):
+            check_in = START + i * 4 * DAY
+            batch.put_item(Item=booking_keys.with_keys({
+                'booking_id': f'bench_{uuid.uuid4().hex}',
+                'property_id': property_id,
+                'user_id': 'bench-user',
+                'check_in': check_in,
+                'check_out': check_in + 3 * DAY,
+                'status': 'confirmed',
+                'name': 'Bench', 'email': 'bench@example.com', 'phone': '0',
+                'total_price': 300,
+            }))
+    return START + count * 4 * DAY
+
+
+def range_conflict(table, property_id, check_in, check_out, status='confirmed'):
+    # First booking overlapping [check_in, check_out] read from BookingsByProperty
+    # (property_id + stay_key), only stays that could overlap are fetched
+    earliest_check_in = check_in - availability.MAX_STAY_NIGHTS * DAY
+    query_args = {
+        'IndexName': booking_keys.BOOKINGS_BY_PROPERTY_INDEX,
+        'KeyConditionExpression': Key('property_id').eq(property_id) & Key('stay_key').between(
+            booking_keys.stay_key(status, max(earliest_check_in, 0)), booking_keys.stay_key(status, check_out)),
+        'FilterExpression': Attr('check_out').gte(check_in),
+        'ProjectionExpression': 'booking_id, check_in, check_out'
+    }
+    while True:
+        response = table.query(**query_args)
+        if response.get('Items'):
+            return response['Items'][0]
+        if 'LastEvaluatedKey' not in response:
+            return None
+        query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def legacy_conflict(table, property_id, check_in, check_out):
+    query_args = {
+        'IndexName': 'PropertyIndex',
+        'KeyConditionExpression': Key('property_id').eq(property_id),
+        'FilterExpression': '#status = :status',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {':status': 'confirmed'},
+    }
+    while True:
+        response = table.query(**query_args)
+        for booking in response.get('Items', []):
+            if check_in <= booking['check_out'] and check_out >= booking['check_in']:
+                return booking
+        if 'LastEvaluatedKey' not in response:
+            return None
+        query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint-url', default='http://localhost:8000')
+    parser.add_argument('--region', default='us-east-1')
+    parser.add_argument('--histories', default='100,1000,10000')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource('dynamodb', endpoint_url=args.endpoint_url, region_name=args.region,
+                              aws_access_key_id='local', aws_secret_access_key='local')
+    table = create_table(dynamodb, f'bench_bookings_{uuid.uuid4().hex[:8]}')
+
+    results = []
+    try:
+        for history in [int(h) for h in args.histories.split(',')]:
+            property_id = f'property_{history}'
+            next_free = seed_history(table, property_id, history)
+            # Free window right after the history, the worst case for a scan
+            check_in, check_out = next_free + DAY, next_free + 3 * DAY
+            for name, fn in (('range_index', range_conflict), ('legacy_scan', legacy_conflict)):
+                samples = []
+                for _ in range(args.iterations):
+                    conflict, elapsed = common.timed(fn, table, property_id, check_in, check_out)
+                    assert conflict is None
+                    samples.append(elapsed)
+                row = {'history': history, 'strategy': name, **common.summarize(samples)}
+                results.append(row)
+                print(f"history={history:>8} strategy={name:<12} p50={row['p50_ms']:>9.3f}ms p99={row['p99_ms']:>9.3f}ms")
+    finally:
+        table.delete()
+
+    common.write_results(args.output, {'benchmark': 'conflict_check', 'results': results})
+
+
+if __name__ == '__main__':
+    main()
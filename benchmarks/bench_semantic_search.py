@@ -0,0 +1,111 @@
+"""Search quality and latency: fuzzy multi_match vs BM25, k-NN and hybrid (RRF).
+
+Needs fastembed and a local OpenSearch container with the k-NN plugin (the
+default image ships it) and the security plugin disabled:
+
+    pip install fastembed
+    docker run -p 9200:9200 -e discovery.type=single-node \\
+        -e DISABLE_SECURITY_PLUGIN=true opensearchproject/opensearch:2.11.1
+    python benchmarks/bench_semantic_search.py --documents 20000
+
+Queries are paraphrases and typos of the synthetic catalog attributes, a hit
+is relevant when the document matches the query's judgement predicate.
+"""
+import argparse
+import os
+import uuid
+
+os.environ.setdefault('VECTOR_SEARCH', 'true')
+
+import common
+from catalog import generate_catalog
+from opensearchpy import OpenSearch
+
+from property_common import embeddings, index_mapping, indexing
+from property_search import hybrid, search
+
+QUERIES = [
+    ('seaside villa with a swimming pool',
+     lambda p: 'Villa' in p['title'] and 'pool' in p['amenities'] and 'sea' in p['description']),
+    ('ski chalet in colorado', lambda p: 'Chalet' in p['title'] and p['location'] == 'Aspen'),
+    ('greek island retreat', lambda p: p['location'] in ('Santorini', 'Mykonos')),
+    ('penthuose with gym', lambda p: 'Penthouse' in p['title'] and 'gym' in p['amenities']),
+    ('quiet japanese getaway with sauna', lambda p: p['location'] == 'Kyoto' and 'sauna' in p['amenities']),
+    ('beach house near the ocean with private chef',
+     lambda p: 'Beach House' in p['title'] and 'chef' in p['amenities']),
+    ('italian lakeside estate', lambda p: 'Estate' in p['title'] and p['location'] == 'Lake Como'),
+    ('mountain view bungalow new zealand',
+     lambda p: 'Bungalow' in p['title'] and p['location'] == 'Queenstown' and 'mountains' in p['description']),
+]
+
+
+def _fuzzy(client, index_name, query, size):
+    body = search.build_search_query(query, {})
+    body['size'] = size
+    return client.search(index=index_name, body=body)
+
+
+def _bm25(client, index_name, query, size):
+    return client.search(index=index_name, body=hybrid.lexical_query(query, [], size))
+
+
+def _knn(client, index_name, query, size):
+    return client.search(index=index_name, body=hybrid.knn_query(embeddings.embed_query(query), [], size))
+
+
+def _hybrid(client, index_name, query, size):
+    return hybrid.search(client, index_name, query, [], size)
+
+
+STRATEGIES = {'fuzzy_multi_match': _fuzzy, 'bm25': _bm25, 'knn': _knn, 'hybrid_rrf': _hybrid}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9200)
+    parser.add_argument('--documents', type=int, default=20000)
+    parser.add_argument('--repeats', type=int, default=20, help='timed runs per query and strategy')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    if not embeddings.available():
+        raise SystemExit('fastembed is required: pip install fastembed')
+
+    client = OpenSearch(hosts=[{'host': args.host, 'port': args.port}], use_ssl=False, timeout=120)
+    index_name = f'bench_semantic_{uuid.uuid4().hex[:8]}'
+    client.indices.create(index=index_name, body=index_mapping.property_index_body())
+    results = []
+    try:
+        catalog = list(generate_catalog(args.documents, seed=7))
+        _, index_ms = common.timed(indexing.bulk_index_properties, client, index_name, catalog)
+        client.indices.refresh(index=index_name)
+        by_id = {doc['property_id']: doc for doc in catalog}
+
+        for name, strategy in STRATEGIES.items():
+            recalls = []
+            latencies = []
+            for text, relevant in QUERIES:
+                relevant_ids = {doc['property_id'] for doc in catalog if relevant(doc)}
+                response, _ = common.timed(strategy, client, index_name, text, args.k)
+                found = [hit['_id'] for hit in response['hits']['hits']]
+                if relevant_ids:
+                    recalls.append(len(relevant_ids.intersection(found)) / min(args.k, len(relevant_ids)))
+                for _ in range(args.repeats):
+                    latencies.append(common.timed(strategy, client, index_name, text, args.k)[1])
+            results.append({'strategy': name, f'recall_at_{args.k}': round(sum(recalls) / len(recalls), 3),
+                            **common.summarize(latencies)})
+    finally:
+        client.indices.delete(index=index_name)
+
+    print(f"documents={len(by_id)} index_seconds={index_ms / 1000.0:.1f} (includes embedding)")
+    for row in results:
+        print(f"strategy={row['strategy']:<18} recall@{args.k}={row[f'recall_at_{args.k}']:<6} "
+              f"p50_ms={row['p50_ms']:>8} p95_ms={row['p95_ms']:>8}")
+    common.write_results(args.output, {'benchmark': 'semantic_search', 'documents': len(by_id),
+                                       'index_ms': round(index_ms, 1), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
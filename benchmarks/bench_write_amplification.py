@@ -0,0 +1,120 @@
+"""Write capacity consumed per booking, legacy vs consolidated index layout.
+
+DynamoDB charges one WCU per started KB written to the table and to every
+index the item is projected into. This computes item and projection sizes
+with DynamoDB's size rules for a realistic booking and compares the legacy
+table (five ALL-projection indexes) with the layout in
+property_booking/booking_keys.py. Runs offline:
+
+    python benchmarks/bench_write_amplification.py
+"""
+import argparse
+import math
+from decimal import Decimal
+
+import common
+
+from property_booking import booking_ids, booking_keys, nights
+
+LEGACY_INDEXES = {
+    # name: (keys, projected attributes, None = ALL)
+    'UserBookingsIndex': (['user_id', 'created_at'], None),
+    'PropertyBookingsIndex': (['property_id', 'check_in'], None),
+    'UserIndex': (['user_id'], None),
+    'UserPropertyIndex': (['user_id', 'property_id'], None),
+    'PropertyIndex': (['property_id'], None),
+}
+INDEXES = {
+    booking_keys.BOOKINGS_BY_USER_INDEX: (
+        ['user_id', 'created_at'],
+        ['check_in', 'check_out', 'guests', 'status', 'total_price', 'property_title', 'property_location']),
+    booking_keys.BOOKINGS_BY_PROPERTY_INDEX: (
+        ['property_id', 'stay_key'],
+        ['user_id', 'created_at', 'check_in', 'check_out', 'guests', 'status', 'total_price',
+         'property_title', 'property_location']),
+}
+TABLE_KEYS = ['booking_id', 'property_id']
+
+
+def value_size(value):
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (int, Decimal)):
+        digits = len(str(abs(value)).replace('.', '').lstrip('0')) or 1
+        return math.ceil(digits / 2) + 1
+    if isinstance(value, bool) or value is None:
+        return 1
+    raise TypeError(type(value))
+
+
+def item_size(item, attributes=None):
+    names = item.keys() if attributes is None else [a for a in attributes if a in item]
+    return sum(len(name.encode('utf-8')) + value_size(item[name]) for name in names)
+
+
+def wcu(size_bytes):
+    return max(1, math.ceil(size_bytes / 1024))
+
+
+def layout_cost(item, indexes):
+    rows = [{'target': 'table', 'bytes': item_size(item), 'wcu': wcu(item_size(item))}]
+    for name, (keys, projected) in indexes.items():
+        if not all(key in item for key in keys):
+            continue  # sparse: not written to the index
+        attributes = None if projected is None else list(dict.fromkeys(TABLE_KEYS + keys + projected))
+        size = item_size(item, attributes)
+        rows.append({'target': name, 'bytes': size, 'wcu': wcu(size)})
+    return rows
+
+
+def sample_booking(nights_count):
+    check_in = 1893456000
+    return {
+        'booking_id': booking_ids.new_booking_id(),
+        'property_id': 'c5a1e7a2-2f5e-4c43-9d3b-0c2b7d7b91a4',
+        'user_id': 'd4e8a4b8-70b1-7072-1ad7-5c0f3e1f2a11',
+        'check_in': check_in,
+        'check_out': check_in + nights_count * nights.SECONDS_PER_NIGHT,
+        'guests': 4,
+        'status': 'confirmed',
+        'name': 'Alexandra Fitzgerald-Montgomery',
+        'email': 'alexandra.fitzgerald@example.com',
+        'phone': '+44 20 7946 0958',
+        'total_price': Decimal('4250.50'),
+        'property_title': 'Oceanfront Villa with Infinity Pool and Private Beach Access',
+        'property_location': 'Uluwatu, Bali, Indonesia',
+        'created_at': '2030-01-01T10:15:30.123456',
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nights', type=int, default=3)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    legacy_item = sample_booking(args.nights)
+    item = booking_keys.with_keys(dict(legacy_item))
+    claim = {'property_id': item['property_id'], 'night': '2030-01-01', 'booking_id': item['booking_id']}
+    claims = len(nights.stay_nights(item['check_in'], item['check_out']))
+
+    legacy = layout_cost(legacy_item, LEGACY_INDEXES)
+    current = layout_cost(item, INDEXES)
+    results = {
+        'benchmark': 'write_amplification',
+        'nights': args.nights,
+        'legacy': {'writes': legacy, 'wcu_per_booking': sum(r['wcu'] for r in legacy)},
+        'consolidated': {'writes': current, 'wcu_per_booking': sum(r['wcu'] for r in current)},
+        # Transactional writes cost twice the standard WCU
+        'night_claims': {'items': claims, 'wcu_per_booking': 2 * claims * wcu(item_size(claim)),
+                         'booking_row_transaction_wcu': 2 * wcu(item_size(item))},
+    }
+    for layout in ('legacy', 'consolidated'):
+        print(f"{layout:<13} wcu/booking={results[layout]['wcu_per_booking']:>3}  " +
+              '  '.join(f"{r['target']}={r['bytes']}B" for r in results[layout]['writes']))
+    print(f"night claims  wcu/booking={results['night_claims']['wcu_per_booking']:>3}  ({claims} nights, transactional)")
+    common.write_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import random
+import time
+
+# Synthetic property catalog shared by the benchmarks.
+
+LOCATIONS = [
+    ('Maldives', 3.2028, 73.2207), ('Bali', -8.3405, 115.0920), ('Santorini', 36.3932, 25.4615),
+    ('Amalfi Coast', 40.6333, 14.6029), ('Aspen', 39.1911, -106.8175), ('Tulum', 20.2114, -87.4654),
+    ('Kyoto', 35.0116, 135.7681), ('Cape Town', -33.9249, 18.4241), ('Provence', 43.9352, 6.0679),
+    ('Queenstown', -45.0312, 168.6626), ('Mykonos', 37.4467, 25.3289), ('Lake Como', 46.0160, 9.2572),
+]
+STYLES = ['Villa', 'Chalet', 'Penthouse', 'Beach House', 'Estate', 'Retreat', 'Loft', 'Bungalow']
+ADJECTIVES = ['Luxury', 'Secluded', 'Oceanfront', 'Modern', 'Historic', 'Hilltop', 'Private', 'Grand']
+AMENITIES = ['pool', 'wifi', 'parking', 'spa', 'gym', 'chef', 'beach access', 'hot tub', 'sauna', 'cinema']
+
+
+def generate_property(rng, number):
+    location, lat, lon = rng.choice(LOCATIONS)
+    title = f"{rng.choice(ADJECTIVES)} {rng.choice(STYLES)} {number}"
+    bedrooms = rng.randint(1, 8)
+    return {
+        'title': title,
+        'description': f"{title} in {location} with {bedrooms} bedrooms and views over the {rng.choice(['sea', 'mountains', 'valley', 'lake', 'city'])}.",
+        'location': location,
+        'coordinates': {'lat': round(lat + rng.uniform(-0.2, 0.2), 5), 'lon': round(lon + rng.uniform(-0.2, 0.2), 5)},
+        'price_per_night': rng.randrange(150, 5000, 25),
+        'bedrooms': bedrooms,
+        'bathrooms': rng.randint(1, bedrooms),
+        'max_guests': bedrooms * 2,
+        'amenities': rng.sample(AMENITIES, rng.randint(2, 6)),
+        'image_urls': [f"properties/data/bench_{number}_{i}.jpg" for i in range(3)],
+    }
+
+
+def generate_catalog(count, seed=42):
+    rng = random.Random(seed)
+    for number in range(count):
+        yield generate_property(rng, number)
+
+
+def property_id_for(number):
+    # Stable ids so booking histories can refer to catalog entries
+    return f'bench_property_{number:07d}'
+
+
+DAY = 86400
+HISTORY_START = 1672531200  # 2023-01-01
+
+
+def generate_bookings(property_count, count, users=1000, seed=42):
+    # Booking items as the booking lambda stores them, mostly past stays with
+    # a few upcoming ones, a tenth of them cancelled
+    rng = random.Random(seed)
+    for number in range(count):
+        check_in = HISTORY_START + rng.randrange(0, 3 * 365) * DAY
+        nights = rng.randint(1, 10)
+        created = check_in - rng.randrange(1, 120) * DAY
+        yield {
+            'booking_id': f'bench_booking_{number:08d}',
+            'property_id': property_id_for(rng.randrange(property_count)),
+            'user_id': f'bench_user_{rng.randrange(users)}',
+            'check_in': check_in,
+            'check_out': check_in + nights * DAY,
+            'guests': rng.randint(1, 8),
+            'status': 'cancelled' if rng.random() < 0.1 else 'confirmed',
+            'name': 'Bench Guest', 'email': 'guest@example.com', 'phone': '0',
+            'total_price': nights * rng.randrange(150, 5000, 25),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(created)),
+        }
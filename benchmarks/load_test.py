@@ -0,0 +1,333 @@
+"""End-to-end load test of the search, booking and index Lambda handlers.
+
+Drives the handlers in-process with synthetic API Gateway proxy events against
+local stand-ins of OpenSearch, DynamoDB and S3, after seeding a synthetic
+catalog and booking history:
+
+    docker compose -f benchmarks/docker-compose.yml up -d
+    python benchmarks/load_test.py --properties 100000 --bookings 200000 --output results.json
+
+Reports p50/p95/p99 latency, throughput and status codes per endpoint, plus
+cold start (fresh interpreter: import and first call) against warm timings.
+Pass --baseline with an earlier results file to fail on p95 regressions.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+from catalog import AMENITIES, ADJECTIVES, LOCATIONS, STYLES, DAY, generate_bookings, generate_catalog, property_id_for
+
+HANDLERS = {
+    'search': 'property_search.search',
+    'suggest': 'property_search.search',
+    'property_detail': 'property_search.search',
+    'property_batch': 'property_search.search',
+    'booking_history': 'property_booking.booking',
+    'booking_create': 'property_booking.booking',
+    'index_single': 'property_indexing.index',
+    'index_bulk': 'property_indexing.index',
+}
+# Reads first, writes last: every index write invalidates the search cache
+DEFAULT_ENDPOINTS = list(HANDLERS)
+SINGLE_FUNCTION_HANDLER = 'property_api.api'
+FUTURE_START = 1893456000  # 2030-01-01
+SEED_CHUNK = 5000
+
+
+def _proxy_event(method, resource, body=None, query=None, path=None):
+    return {
+        'httpMethod': method,
+        'resource': resource,
+        'headers': {'Accept-Encoding': 'gzip, br'},
+        'queryStringParameters': query,
+        'pathParameters': path,
+        'body': json.dumps(body) if body is not None else None,
+        'isBase64Encoded': False,
+    }
+
+
+def make_event(endpoint, rng, args):
+    if endpoint == 'search':
+        filters = {}
+        if rng.random() < 0.5:
+            filters['location'] = rng.choice(LOCATIONS)[0]
+        if rng.random() < 0.5:
+            low = rng.randrange(0, 4000, 250)
+            filters['price_per_night'] = {'min': low, 'max': low + 1000}
+        if rng.random() < 0.3:
+            check_in = FUTURE_START + rng.randrange(0, 60) * DAY
+            filters.update({'check_in': check_in, 'check_out': check_in + 3 * DAY})
+        query = ' '.join(rng.sample([rng.choice(STYLES), rng.choice(ADJECTIVES), rng.choice(AMENITIES)], rng.randint(0, 2)))
+        return _proxy_event('POST', '/properties/search', {
+            'query': query, 'filters': filters, 'view': 'card', 'facets': rng.random() < 0.2})
+    if endpoint == 'suggest':
+        word = rng.choice([location for location, _, _ in LOCATIONS] + ADJECTIVES)
+        return _proxy_event('GET', '/properties/suggest', query={'q': word[:rng.randint(1, 5)]})
+    if endpoint == 'property_detail':
+        property_id = property_id_for(rng.randrange(args.properties))
+        return _proxy_event('GET', '/properties/{property_id}', path={'property_id': property_id})
+    if endpoint == 'property_batch':
+        ids = [property_id_for(rng.randrange(args.properties)) for _ in range(20)]
+        return _proxy_event('POST', '/properties/batch', {'ids': ids, 'view': 'card'})
+    if endpoint == 'booking_history':
+        return _proxy_event('GET', '/properties/booking', query={
+            'user_id': f'bench_user_{rng.randrange(args.users)}', 'include': 'property'})
+    if endpoint == 'booking_create':
+        check_in = FUTURE_START + rng.randrange(0, 365) * DAY
+        return _proxy_event('POST', '/properties/booking', {
+            'property_id': property_id_for(rng.randrange(args.properties)),
+            'user_id': f'bench_user_{rng.randrange(args.users)}',
+            'check_in': check_in, 'check_out': check_in + rng.randint(1, 7) * DAY,
+            'name': 'Load Test', 'email': 'load@example.com', 'phone': '0', 'total_price': 1000})
+    if endpoint == 'index_single':
+        return _proxy_event('POST', '/properties', {'property': next(generate_catalog(1, seed=rng.randrange(10 ** 9)))})
+    if endpoint == 'index_bulk':
+        return _proxy_event('POST', '/properties/bulk', list(generate_catalog(100, seed=rng.randrange(10 ** 9))))
+    raise ValueError(endpoint)
+
+
+def configure_environment(args, suffix):
+    os.environ.update({
+        'AWS_REGION': args.region,
+        'AWS_ACCESS_KEY_ID': 'local',
+        'AWS_SECRET_ACCESS_KEY': 'localsecret',
+        'AWS_ENDPOINT_URL_DYNAMODB': args.dynamodb_url,
+        'AWS_ENDPOINT_URL_S3': args.s3_url,
+        'OPENSEARCH_ENDPOINT': args.opensearch_url,
+        'INDEX_NAME': f'bench_properties_{suffix}',
+        'DYNAMODB_TABLE': f'bench_bookings_{suffix}',
+        'NIGHTS_TABLE': f'bench_nights_{suffix}',
+        'SEARCH_CACHE_TABLE': f'bench_search_cache_{suffix}',
+        'S3_BUCKET_NAME': f'bench-images-{suffix}',
+        'S3_BUCKET': f'bench-images-{suffix}',
+        'AWS_POOL_SIZE': str(args.concurrency),
+        'OPENSEARCH_POOL_SIZE': str(args.concurrency),
+    })
+
+
+def create_tables(dynamodb):
+    from property_booking import booking_keys
+
+    string = lambda name: {'AttributeName': name, 'AttributeType': 'S'}  # noqa: E731
+    key = lambda name, kind: {'AttributeName': name, 'KeyType': kind}  # noqa: E731
+    tables = [
+        dynamodb.create_table(
+            TableName=os.environ['DYNAMODB_TABLE'],
+            KeySchema=[key('booking_id', 'HASH'), key('property_id', 'RANGE')],
+            AttributeDefinitions=[string('booking_id'), string('property_id'), string('user_id'),
+                                  string('created_at'), string('stay_key')],
+            GlobalSecondaryIndexes=[
+                {'IndexName': booking_keys.BOOKINGS_BY_USER_INDEX,
+                 'KeySchema': [key('user_id', 'HASH'), key('created_at', 'RANGE')],
+                 'Projection': {'ProjectionType': 'ALL'}},
+                {'IndexName': booking_keys.BOOKINGS_BY_PROPERTY_INDEX,
+                 'KeySchema': [key('property_id', 'HASH'), key('stay_key', 'RANGE')],
+                 'Projection': {'ProjectionType': 'ALL'}},
+            ],
+            BillingMode='PAY_PER_REQUEST'),
+        dynamodb.create_table(
+            TableName=os.environ['NIGHTS_TABLE'],
+            KeySchema=[key('property_id', 'HASH'), key('night', 'RANGE')],
+            AttributeDefinitions=[string('property_id'), string('night')],
+            BillingMode='PAY_PER_REQUEST'),
+        dynamodb.create_table(
+            TableName=os.environ['SEARCH_CACHE_TABLE'],
+            KeySchema=[key('cache_key', 'HASH')],
+            AttributeDefinitions=[string('cache_key')],
+            BillingMode='PAY_PER_REQUEST'),
+    ]
+    for table in tables:
+        table.wait_until_exists()
+    return tables
+
+
+def seed(args):
+    from property_booking import booking_keys
+    from property_common import clients, index_mapping, indexing
+
+    client = clients.get_opensearch_client()
+    index_mapping.ensure_property_index(client, os.environ['INDEX_NAME'])
+    start = time.perf_counter()
+    failed = 0
+    batch = []
+    for number, property_data in enumerate(generate_catalog(args.properties, seed=args.seed)):
+        property_data['property_id'] = property_id_for(number)
+        batch.append(property_data)
+        if len(batch) >= SEED_CHUNK or number == args.properties - 1:
+            failed += sum(1 for result in indexing.bulk_index_properties(client, os.environ['INDEX_NAME'], batch)
+                          if 'error' in result)
+            batch = []
+    client.indices.refresh(index=os.environ['INDEX_NAME'])
+    catalog_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table = clients.get_dynamodb_table(os.environ['DYNAMODB_TABLE'])
+    with table.batch_writer() as writer:
+        for booking in generate_bookings(args.properties, args.bookings, users=args.users, seed=args.seed):
+            writer.put_item(Item=booking_keys.with_keys(booking))
+    bookings_seconds = time.perf_counter() - start
+    return {
+        'properties': args.properties, 'failed_properties': failed,
+        'catalog_docs_per_second': round(args.properties / catalog_seconds, 1),
+        'bookings': args.bookings, 'bookings_per_second': round(args.bookings / bookings_seconds, 1),
+    }
+
+
+def handler_module(endpoint, single_function):
+    return SINGLE_FUNCTION_HANDLER if single_function else HANDLERS[endpoint]
+
+
+def run_endpoint(endpoint, args, rng):
+    import importlib
+
+    handler = importlib.import_module(handler_module(endpoint, args.single_function)).handler
+    events = [make_event(endpoint, rng, args) for _ in range(args.requests)]
+    # The first in-process call pays for client creation and index checks
+    _, first_call_ms = common.timed(handler, make_event(endpoint, rng, args), None)
+
+    def call(event):
+        response, elapsed_ms = common.timed(handler, event, None)
+        return int(response['statusCode']), elapsed_ms
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        outcomes = list(pool.map(call, events))
+    elapsed = time.perf_counter() - start
+    latencies = [elapsed_ms for _, elapsed_ms in outcomes]
+    statuses = Counter(status for status, _ in outcomes)
+    return {
+        'endpoint': endpoint,
+        'requests': len(events),
+        'concurrency': args.concurrency,
+        'throughput_rps': round(len(events) / elapsed, 1),
+        'first_call_ms': round(first_call_ms, 3),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'server_errors': sum(count for status, count in statuses.items() if status >= 500),
+        **common.summarize(latencies),
+    }
+
+
+def cold_probe(endpoint):
+    # Runs in a fresh interpreter: time the handler import and first call
+    import importlib
+
+    args = argparse.Namespace(**json.loads(os.environ['BENCH_PROBE_ARGS']))
+    start = time.perf_counter()
+    module = importlib.import_module(handler_module(endpoint, args.single_function))
+    import_ms = (time.perf_counter() - start) * 1000.0
+    _, first_call_ms = common.timed(module.handler, make_event(endpoint, random.Random(), args), None)
+    print(json.dumps({'import_ms': import_ms, 'first_call_ms': first_call_ms}))
+
+
+def measure_cold_starts(endpoint, args):
+    probe_args = {'properties': args.properties, 'users': args.users, 'single_function': args.single_function}
+    env = {**os.environ, 'BENCH_PROBE_ARGS': json.dumps(probe_args)}
+    samples = []
+    for _ in range(args.cold_samples):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--cold-probe', endpoint],
+                                env=env, capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    imports = [sample['import_ms'] for sample in samples]
+    first_calls = [sample['first_call_ms'] for sample in samples]
+    return {
+        'endpoint': endpoint,
+        'samples': len(samples),
+        'import_p50_ms': round(common.percentile(imports, 50), 3),
+        'first_call_p50_ms': round(common.percentile(first_calls, 50), 3),
+        'cold_total_p50_ms': round(common.percentile([a + b for a, b in zip(imports, first_calls)], 50), 3),
+    }
+
+
+def regressions(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = {row['endpoint']: row for row in json.load(f)['endpoints']}
+    found = []
+    for row in results['endpoints']:
+        before = baseline.get(row['endpoint'])
+        if before and row['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            found.append(f"{row['endpoint']}: p95 {before['p95_ms']}ms -> {row['p95_ms']}ms")
+    return found
+
+
+def cleanup():
+    from property_common import clients
+
+    for name in ('DYNAMODB_TABLE', 'NIGHTS_TABLE', 'SEARCH_CACHE_TABLE'):
+        clients.get_dynamodb_table(os.environ[name]).delete()
+    client = clients.get_opensearch_client()
+    for index_name in client.indices.get_alias(name=os.environ['INDEX_NAME']):
+        client.indices.delete(index=index_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--opensearch-url', default='http://localhost:9200')
+    parser.add_argument('--dynamodb-url', default='http://localhost:8000')
+    parser.add_argument('--s3-url', default='http://localhost:9000')
+    parser.add_argument('--region', default='us-east-1')
+    parser.add_argument('--properties', type=int, default=10000, help='catalog size, 10k to 1M')
+    parser.add_argument('--bookings', type=int, default=20000, help='booking history size')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--endpoints', default=','.join(DEFAULT_ENDPOINTS))
+    parser.add_argument('--cold-samples', type=int, default=5, help='fresh interpreters per endpoint, 0 to skip')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', help='earlier results file, fail when a p95 regresses')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 regression ratio')
+    parser.add_argument('--single-function', action='store_true',
+                        help='drive every endpoint through the combined property_api handler')
+    parser.add_argument('--keep', action='store_true', help='keep the seeded tables and index')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--cold-probe', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_probe:
+        cold_probe(args.cold_probe)
+        return
+
+    endpoints = [endpoint for endpoint in args.endpoints.split(',') if endpoint]
+    unknown = [endpoint for endpoint in endpoints if endpoint not in HANDLERS]
+    if unknown:
+        raise SystemExit(f"unknown endpoints: {', '.join(unknown)}")
+
+    configure_environment(args, uuid.uuid4().hex[:8])
+    from property_common import clients
+    create_tables(clients.get_dynamodb_resource())
+    rng = random.Random(args.seed)
+    results = {'benchmark': 'load_test', 'single_function': args.single_function, 'endpoints': [], 'cold_starts': []}
+    try:
+        results['seed'] = seed(args)
+        print(json.dumps(results['seed']))
+        for endpoint in endpoints:
+            row = run_endpoint(endpoint, args, rng)
+            results['endpoints'].append(row)
+            print(f"endpoint={endpoint:<16} rps={row['throughput_rps']:>8} p50_ms={row['p50_ms']:>9} "
+                  f"p95_ms={row['p95_ms']:>9} p99_ms={row['p99_ms']:>9} 5xx={row['server_errors']}")
+        # One cold start measurement per handler module
+        for endpoint in {handler_module(endpoint, args.single_function): endpoint for endpoint in endpoints}.values():
+            if args.cold_samples > 0:
+                row = measure_cold_starts(endpoint, args)
+                results['cold_starts'].append(row)
+                print(f"cold_start={endpoint:<16} import_ms={row['import_p50_ms']:>9} first_call_ms={row['first_call_p50_ms']:>9}")
+    finally:
+        if not args.keep:
+            cleanup()
+
+    common.write_results(args.output, results)
+    if args.baseline:
+        found = regressions(results, args.baseline, args.tolerance)
+        if found:
+            raise SystemExit('p95 regressions:\n' + '\n'.join(found))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Import-time profile of every Lambda handler module.
+
+Imports each handler in a fresh interpreter with `python -X importtime`, the
+same work a cold start does before the first invocation, and reports the
+total import time, the slowest packages and which heavy SDKs were loaded:
+
+    python benchmarks/profile_imports.py --repeat 5 --output imports.json
+
+Run it with the layer's dependencies installed (requirements-dev.txt). Heavy
+modules should only show up for handlers that need them at import time.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+import common
+
+HANDLERS = [
+    'property_search.search',
+    'property_booking.booking',
+    'property_indexing.index',
+    'property_indexing.catalog_import',
+    'property_indexing.booking_sync',
+    'property_indexing.reembed',
+    'property_api.api',
+]
+HEAVY_PACKAGES = ['boto3', 'botocore', 'opensearchpy', 'requests', 'requests_aws4auth', 'fastembed', 'brotli']
+
+
+def import_profile(module):
+    # Returns ({root package: self_us}, total_us, loaded root packages) for one fresh import
+    env = {**os.environ, 'PYTHONPATH': common.LAMBDA_DIR, 'AWS_REGION': os.environ.get('AWS_REGION', 'us-east-1')}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    packages = defaultdict(int)
+    total = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        loaded.add(package)
+        # Self time attributes every module to its own package
+        packages[package] += int(self_us)
+        # Nested imports are indented and already in their parent's cumulative time
+        if not name.startswith('  '):
+            total += int(cumulative)
+    return packages, total, loaded
+
+
+def profile_handler(module, repeat, top):
+    runs = [import_profile(module) for _ in range(repeat)]
+    totals_ms = [total / 1000.0 for _, total, _ in runs]
+    loaded = set().union(*(run_loaded for _, _, run_loaded in runs))
+    packages = defaultdict(list)
+    for run, _, _ in runs:
+        for name, self_us in run.items():
+            packages[name].append(self_us / 1000.0)
+    slowest = sorted(((statistics.median(samples), name) for name, samples in packages.items()), reverse=True)[:top]
+    return {
+        'handler': module,
+        'import_p50_ms': round(statistics.median(totals_ms), 3),
+        'import_max_ms': round(max(totals_ms), 3),
+        'heavy_packages': [name for name in HEAVY_PACKAGES if name in loaded],
+        'slowest_packages': [{'package': name, 'self_ms': round(ms, 3)} for ms, name in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--handlers', default=','.join(HANDLERS))
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per handler')
+    parser.add_argument('--top', type=int, default=8, help='slowest packages listed per handler')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    for module in [module for module in args.handlers.split(',') if module]:
+        try:
+            row = profile_handler(module, args.repeat, args.top)
+        except RuntimeError as e:
+            print(f"handler={module:<34} error={e}")
+            results.append({'handler': module, 'error': str(e)})
+            continue
+        results.append(row)
+        slowest = ' '.join(f"{p['package']}={p['self_ms']}" for p in row['slowest_packages'][:4])
+        print(f"handler={module:<34} import_p50_ms={row['import_p50_ms']:>9} "
+              f"heavy={','.join(row['heavy_packages']) or '-'} slowest: {slowest}")
+    common.write_results(args.output, {'benchmark': 'profile_imports', 'results': results})
+
+
+if __name__ == '__main__':
+    main()
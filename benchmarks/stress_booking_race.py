@@ -0,0 +1,144 @@
+"""Concurrency stress test for booking creation.
+
+Fires many overlapping booking requests through property_booking.booking.handler
+in parallel and verifies that no night of any property ends up confirmed for
+more than one booking.
+
+Runs against DynamoDB Local:
+
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python benchmarks/stress_booking_race.py --workers 64 --requests 2000
+"""
+import argparse
+import json
+import os
+import random
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+import boto3
+
+DAY = 86400
+START = 1893456000  # 2030-01-01
+
+
+def create_tables(dynamodb, table_name, nights_table_name):
+    dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[
+            {'AttributeName': 'booking_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'property_id', 'KeyType': 'RANGE'},
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'booking_id', 'AttributeType': 'S'},
+            {'AttributeName': 'property_id', 'AttributeType': 'S'},
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    ).wait_until_exists()
+    dynamodb.create_table(
+        TableName=nights_table_name,
+        KeySchema=[
+            {'AttributeName': 'property_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'night', 'KeyType': 'RANGE'},
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'property_id', 'AttributeType': 'S'},
+            {'AttributeName': 'night', 'AttributeType': 'S'},
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    ).wait_until_exists()
+
+
+def booking_event(property_id, rng):
+    check_in = START + rng.randrange(0, 30) * DAY
+    return {
+        'httpMethod': 'POST',
+        'body': json.dumps({
+            'property_id': property_id,
+            'user_id': f'user_{rng.randrange(1000)}',
+            'check_in': check_in,
+            'check_out': check_in + rng.randrange(1, 6) * DAY,
+            'name': 'Stress', 'email': 'stress@example.com', 'phone': '0',
+            'total_price': 100,
+        })
+    }
+
+
+def scan_all(table):
+    scan_args = {}
+    while True:
+        response = table.scan(**scan_args)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint-url', default='http://localhost:8000')
+    parser.add_argument('--region', default='us-east-1')
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--properties', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    suffix = uuid.uuid4().hex[:8]
+    table_name, nights_table_name = f'stress_bookings_{suffix}', f'stress_nights_{suffix}'
+    os.environ.update({
+        'AWS_ENDPOINT_URL': args.endpoint_url,
+        'AWS_REGION': args.region,
+        'AWS_ACCESS_KEY_ID': 'local',
+        'AWS_SECRET_ACCESS_KEY': 'local',
+        'DYNAMODB_TABLE': table_name,
+        'NIGHTS_TABLE': nights_table_name,
+        'AWS_POOL_SIZE': str(args.workers),
+    })
+    from property_booking import booking, nights
+
+    dynamodb = boto3.resource('dynamodb', endpoint_url=args.endpoint_url, region_name=args.region)
+    create_tables(dynamodb, table_name, nights_table_name)
+    table = dynamodb.Table(table_name)
+
+    rng = random.Random(args.seed)
+    properties = [f'property_{i}' for i in range(args.properties)]
+    events = [booking_event(rng.choice(properties), rng) for _ in range(args.requests)]
+    # Resolve the shared clients before the threads start
+    booking.handler({'httpMethod': 'PUT'}, None)
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        responses = list(pool.map(lambda event: booking.handler(event, None), events))
+    statuses = Counter(r['statusCode'] for r in responses)
+
+    # Every confirmed night must belong to exactly one booking
+    night_owners = defaultdict(set)
+    for item in scan_all(table):
+        if item['status'] != 'confirmed':
+            continue
+        for night in nights.stay_nights(int(item['check_in']), int(item['check_out'])):
+            night_owners[(item['property_id'], night)].add(item['booking_id'])
+    double_booked = sorted(key for key, owners in night_owners.items() if len(owners) > 1)
+
+    dynamodb.Table(table_name).delete()
+    dynamodb.Table(nights_table_name).delete()
+
+    results = {
+        'benchmark': 'booking_race',
+        'workers': args.workers,
+        'requests': args.requests,
+        'statuses': {str(k): v for k, v in statuses.items()},
+        'booked_nights': len(night_owners),
+        'double_booked_nights': len(double_booked),
+    }
+    print(json.dumps(results, indent=2))
+    common.write_results(args.output, results)
+    if double_booked:
+        raise SystemExit(f'double bookings detected: {double_booked[:10]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,8 @@ from aws_cdk import (
     aws_lambda as _lambda,
     aws_ecr as _ecr, 
     aws_s3 as _s3,
+    aws_s3_notifications as _s3n,
+    aws_lambda_event_sources as _lambda_event_sources,
     aws_cognito as _cognito,
     aws_apigateway as _apigw,
     RemovalPolicy,
@@ -119,6 +121,9 @@ class ApiGw_Stack(Stack):
                 "description": env_name + " stage deployment",
             },
             description=api_description,
+            # Lets Lambda return gzip/br compressed bodies, request bodies may
+            # then arrive base64 encoded (see property_common/http.py)
+            binary_media_types=["*/*"],
         )
 
         parent_path='properties'
@@ -151,58 +156,111 @@ class ApiGw_Stack(Stack):
             layer_version_arn=f"arn:aws:lambda:{self.region}:{self.account}:layer:{self.node.try_get_context(f'{env_name}')['addtional_libs_layer_name']}:1"
         )
 
-        # Add property search Lambda function
-        property_search_lambda = _lambda.Function(self, f'property-search-{env_name}',
-                              function_name=f'property-search-{env_name}',
-                              code = _cdk.aws_lambda.Code.from_asset(os.path.join(os.getcwd(), 'artifacts/property_lambda/property_search/')),
-                              runtime=_lambda.Runtime.PYTHON_3_10,
-                              handler="search.handler",
-                              role=custom_lambda_role,
-                              timeout=_cdk.Duration.seconds(300),
-                              description="Search luxury properties",
-                              environment={ 
-                                'OPENSEARCH_ENDPOINT': collection_endpoint,
-                                'REGION': region,
-                                'S3_BUCKET_NAME': bucket_name,
-                                'INDEX_NAME': env_params['index_name']
-                              },
-                              memory_size=1024,
-                              layers= [additional_libs_layer]
-                            )
-
-        # Add property booking Lambda function
-        property_booking_lambda = _lambda.Function(self, f'property-booking-{env_name}',
-                              function_name=f'property-booking-{env_name}',
-                              code = _cdk.aws_lambda.Code.from_asset(os.path.join(os.getcwd(), 'artifacts/property_lambda/property_booking/')),
-                              runtime=_lambda.Runtime.PYTHON_3_10,
-                              handler="booking.handler",
-                              role=custom_lambda_role,
-                              timeout=_cdk.Duration.seconds(300),
-                              description="Handle property bookings",
-                              environment={ 
-                                'REGION': region,
-                                'DYNAMODB_TABLE': env_params['bookings_table_name']
-                              },
-                              memory_size=1024
-                            )
-
-        # Add Lambda integrations
-        property_search_integration = _cdk.aws_apigateway.LambdaIntegration(
-            property_search_lambda, proxy=True, allow_test_invoke=True)
+        # single_function serves search, booking and indexing from one function so
+        # they share a warm pool, provisioned_concurrency keeps that many environments
+        # initialised. Otherwise each API gets its own function.
+        single_function = env_params.get('single_function', 'false') == 'true'
+        if single_function:
+            property_api_lambda = _lambda.Function(self, f'property-api-{env_name}',
+                                  function_name=f'property-api-{env_name}',
+                                  code = _cdk.aws_lambda.Code.from_asset(os.path.join(os.getcwd(), 'artifacts/property_lambda/')),
+                                  runtime=_lambda.Runtime.PYTHON_3_10,
+                                  handler="property_api.api.handler",
+                                  role=custom_lambda_role,
+                                  timeout=_cdk.Duration.seconds(300),
+                                  description="Search, book and index luxury properties",
+                                  environment={
+                                    'OPENSEARCH_ENDPOINT': collection_endpoint,
+                                    'REGION': region,
+                                    'S3_BUCKET_NAME': bucket_name,
+                                    'S3_BUCKET': bucket_name,
+                                    'INDEX_NAME': env_params['index_name'],
+                                    'SEARCH_CACHE_TABLE': env_params['search_cache_table_name'],
+                                    'DYNAMODB_TABLE': env_params['bookings_table_name'],
+                                    'NIGHTS_TABLE': env_params['booking_nights_table_name'],
+                                    'VECTOR_SEARCH': env_params.get('vector_search', 'false')
+                                  },
+                                  memory_size=1024,
+                                  layers= [additional_libs_layer]
+                                )
+            provisioned_concurrency = int(env_params.get('provisioned_concurrency', '0'))
+            property_api_alias = _lambda.Alias(self, f'property-api-live-{env_name}',
+                                  alias_name='live',
+                                  version=property_api_lambda.current_version,
+                                  provisioned_concurrent_executions=provisioned_concurrency or None
+                                )
+            property_api_integration = _cdk.aws_apigateway.LambdaIntegration(
+                property_api_alias, proxy=True, allow_test_invoke=True)
+            property_search_integration = property_api_integration
+            property_booking_integration = property_api_integration
+        else:
+            # Add property search Lambda function
+            property_search_lambda = _lambda.Function(self, f'property-search-{env_name}',
+                                  function_name=f'property-search-{env_name}',
+                                  code = _cdk.aws_lambda.Code.from_asset(os.path.join(os.getcwd(), 'artifacts/property_lambda/')),
+                                  runtime=_lambda.Runtime.PYTHON_3_10,
+                                  handler="property_search.search.handler",
+                                  role=custom_lambda_role,
+                                  timeout=_cdk.Duration.seconds(300),
+                                  description="Search luxury properties",
+                                  environment={ 
+                                    'OPENSEARCH_ENDPOINT': collection_endpoint,
+                                    'REGION': region,
+                                    'S3_BUCKET_NAME': bucket_name,
+                                    'INDEX_NAME': env_params['index_name'],
+                                    'SEARCH_CACHE_TABLE': env_params['search_cache_table_name'],
+                                    'VECTOR_SEARCH': env_params.get('vector_search', 'false')
+                                  },
+                                  memory_size=1024,
+                                  layers= [additional_libs_layer]
+                                )
+
+            # Add property booking Lambda function
+            property_booking_lambda = _lambda.Function(self, f'property-booking-{env_name}',
+                                  function_name=f'property-booking-{env_name}',
+                                  code = _cdk.aws_lambda.Code.from_asset(os.path.join(os.getcwd(), 'artifacts/property_lambda/')),
+                                  runtime=_lambda.Runtime.PYTHON_3_10,
+                                  handler="property_booking.booking.handler",
+                                  role=custom_lambda_role,
+                                  timeout=_cdk.Duration.seconds(300),
+                                  description="Handle property bookings",
+                                  environment={ 
+                                    'REGION': region,
+                                    'DYNAMODB_TABLE': env_params['bookings_table_name'],
+                                    'NIGHTS_TABLE': env_params['booking_nights_table_name'],
+                                    'OPENSEARCH_ENDPOINT': collection_endpoint,
+                                    'INDEX_NAME': env_params['index_name']
+                                  },
+                                  memory_size=1024,
+                                  layers= [additional_libs_layer]
+                                )
+
+            # Add Lambda integrations
+            property_search_integration = _cdk.aws_apigateway.LambdaIntegration(
+                property_search_lambda, proxy=True, allow_test_invoke=True)
         
-        property_booking_integration = _cdk.aws_apigateway.LambdaIntegration(
-            property_booking_lambda, proxy=True, allow_test_invoke=True)
+            property_booking_integration = _cdk.aws_apigateway.LambdaIntegration(
+                property_booking_lambda, proxy=True, allow_test_invoke=True)
 
         # Add API endpoints
         search_api = properties_api.add_resource("search")
+        suggest_api = properties_api.add_resource("suggest")
         booking_api = properties_api.add_resource("booking")
 
         search_api.add_method("POST", property_search_integration)
+        suggest_api.add_method("GET", property_search_integration)
+        property_batch_api = properties_api.add_resource("batch")
+        property_batch_api.add_method("POST", property_search_integration)
+        property_detail_api = properties_api.add_resource("{property_id}")
+        property_detail_api.add_method("GET", property_search_integration)
         booking_api.add_method("POST", property_booking_integration)
         booking_api.add_method("GET", property_booking_integration)
 
         # Add CORS options
         self.add_cors_options(search_api)
+        self.add_cors_options(suggest_api)
+        self.add_cors_options(property_batch_api)
+        self.add_cors_options(property_detail_api)
         self.add_cors_options(booking_api)
 
         # Output user pool details
@@ -222,23 +280,121 @@ class ApiGw_Stack(Stack):
         storage_stack = Storage_Stack(self, f"Storage{env_name}Stack")
         self.tag_my_stack(storage_stack)
 
-        # Create property indexing Lambda function
-        property_indexing_lambda = _lambda.Function(
-            self, 'PropertyIndexingLambda',
-            function_name=f'property-index-{env_name}',
+        # Indexing routes go to the shared function in single_function mode
+        if single_function:
+            property_indexing_integration = property_api_integration
+        else:
+            # Create property indexing Lambda function
+            property_indexing_lambda = _lambda.Function(
+                self, 'PropertyIndexingLambda',
+                function_name=f'property-index-{env_name}',
+                runtime=_lambda.Runtime.PYTHON_3_10,
+                handler='property_indexing.index.handler',
+                code=_lambda.Code.from_asset('artifacts/property_lambda'),
+                environment={
+                    'REGION': region,
+                    'OPENSEARCH_ENDPOINT': collection_endpoint,
+                    'INDEX_NAME': env_params['index_name'],
+                    'S3_BUCKET': bucket_name,
+                    'SEARCH_CACHE_TABLE': env_params['search_cache_table_name'],
+                    'VECTOR_SEARCH': env_params.get('vector_search', 'false')
+                },
+                role=custom_lambda_role,
+                timeout=_cdk.Duration.seconds(300),
+                layers=[additional_libs_layer]
+            )
+            property_indexing_integration = _apigw.LambdaIntegration(property_indexing_lambda)
+
+        # Create catalog import Lambda function, streams large JSONL/CSV
+        # catalogs dropped under properties/imports/ into the property index
+        catalog_import_function_name = f'property-catalog-import-{env_name}'
+        catalog_import_lambda = _lambda.Function(
+            self, 'PropertyCatalogImportLambda',
+            function_name=catalog_import_function_name,
             runtime=_lambda.Runtime.PYTHON_3_10,
-            handler='index.handler',
-            code=_lambda.Code.from_asset('artifacts/property_lambda/property_indexing'),
+            handler='property_indexing.catalog_import.handler',
+            code=_lambda.Code.from_asset('artifacts/property_lambda'),
             environment={
                 'REGION': region,
                 'OPENSEARCH_ENDPOINT': collection_endpoint,
                 'INDEX_NAME': env_params['index_name'],
-                'S3_BUCKET': bucket_name
+                'SEARCH_CACHE_TABLE': env_params['search_cache_table_name'],
+                'VECTOR_SEARCH': env_params.get('vector_search', 'false'),
+                'IMPORT_PREFIX': 'properties/imports/',
+                'CHECKPOINT_PREFIX': 'properties/import-checkpoints/'
+            },
+            role=custom_lambda_role,
+            timeout=_cdk.Duration.seconds(900),
+            memory_size=512,
+            layers=[additional_libs_layer]
+        )
+        images_bucket.add_event_notification(
+            _s3.EventType.OBJECT_CREATED,
+            _s3n.LambdaDestination(catalog_import_lambda),
+            _s3.NotificationKeyFilter(prefix='properties/imports/')
+        )
+
+        # Create booking sync Lambda function, applies bookings table stream
+        # changes to the booked ranges of the property documents
+        booking_sync_lambda = _lambda.Function(
+            self, 'PropertyBookingSyncLambda',
+            function_name=f'property-booking-sync-{env_name}',
+            runtime=_lambda.Runtime.PYTHON_3_10,
+            handler='property_indexing.booking_sync.handler',
+            code=_lambda.Code.from_asset('artifacts/property_lambda'),
+            environment={
+                'REGION': region,
+                'OPENSEARCH_ENDPOINT': collection_endpoint,
+                'INDEX_NAME': env_params['index_name']
             },
             role=custom_lambda_role,
-            timeout=_cdk.Duration.seconds(300),
+            timeout=_cdk.Duration.seconds(60),
             layers=[additional_libs_layer]
         )
+        booking_sync_lambda.add_event_source(
+            _lambda_event_sources.DynamoEventSource(
+                storage_stack.bookings_table,
+                starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+                batch_size=500,
+                # Wait for a fuller batch so more changes coalesce per property
+                max_batching_window=Duration.seconds(2),
+                report_batch_item_failures=True,
+                retry_attempts=10
+            )
+        )
+
+        # Create re-embedding Lambda function, invoked manually with {"reembed": {}}
+        # to compute embeddings for documents already in the index
+        reembed_function_name = f'property-reembed-{env_name}'
+        _lambda.Function(
+            self, 'PropertyReembedLambda',
+            function_name=reembed_function_name,
+            runtime=_lambda.Runtime.PYTHON_3_10,
+            handler='property_indexing.reembed.handler',
+            code=_lambda.Code.from_asset('artifacts/property_lambda'),
+            environment={
+                'REGION': region,
+                'OPENSEARCH_ENDPOINT': collection_endpoint,
+                'INDEX_NAME': env_params['index_name'],
+                'SEARCH_CACHE_TABLE': env_params['search_cache_table_name'],
+                'VECTOR_SEARCH': env_params.get('vector_search', 'false')
+            },
+            role=custom_lambda_role,
+            timeout=_cdk.Duration.seconds(900),
+            memory_size=2048,
+            layers=[additional_libs_layer]
+        )
+
+        # Allow the import and re-embed Lambdas to hand over to a fresh invocation before timing out
+        custom_lambda_role.add_to_policy(
+            _iam.PolicyStatement(
+                actions=['lambda:InvokeFunction'],
+                resources=[
+                    f"arn:aws:lambda:{region}:{account_id}:function:{catalog_import_function_name}",
+                    f"arn:aws:lambda:{region}:{account_id}:function:{reembed_function_name}"
+                ]
+            )
+        )
 
         # Add S3 permissions to the Lambda role
         custom_lambda_role.add_to_policy(
@@ -246,6 +402,7 @@ class ApiGw_Stack(Stack):
                 actions=[
                     's3:PutObject',
                     's3:GetObject',
+                    's3:ListBucket',
                     's3:GeneratePresignedUrl'
                 ],
                 resources=[
@@ -268,17 +425,27 @@ class ApiGw_Stack(Stack):
         # Add property indexing endpoint
         properties_api.add_method(
             'POST',
-            _apigw.LambdaIntegration(property_indexing_lambda),
+            property_indexing_integration,
             authorizer=cognito_authorizer,
             authorization_type=_apigw.AuthorizationType.COGNITO
         )
         self.add_cors_options(properties_api)
 
+        # Add bulk property indexing endpoint
+        bulk_index_api = properties_api.add_resource("bulk")
+        bulk_index_api.add_method(
+            'POST',
+            property_indexing_integration,
+            authorizer=cognito_authorizer,
+            authorization_type=_apigw.AuthorizationType.COGNITO
+        )
+        self.add_cors_options(bulk_index_api)
+
         # Add property upload endpoint
         upload_image_api = properties_api.add_resource("upload-image")
         upload_image_api.add_method(
             'GET',
-            _apigw.LambdaIntegration(property_indexing_lambda),
+            property_indexing_integration,
             authorizer=cognito_authorizer,
             authorization_type=_apigw.AuthorizationType.COGNITO
         )
@@ -305,6 +472,8 @@ class ApiGw_Stack(Stack):
                     }
                 ],
                 passthrough_behavior=_cdk.aws_apigateway.PassthroughBehavior.NEVER,
+                # Every media type is binary on this API, the template needs text
+                content_handling=_cdk.aws_apigateway.ContentHandling.CONVERT_TO_TEXT,
                 request_templates={"application/json": '{"statusCode": 200}'},
             ),
             method_responses=[
@@ -18,6 +18,9 @@ class OpensearchVectorDbStack(Stack):
         region=os.getenv('CDK_DEFAULT_REGION')
         account_id = os.getenv('CDK_DEFAULT_ACCOUNT')
         collection_name = env_params['collection_name']
+        # k-NN indexes (VECTOR_SEARCH) need a VECTORSEARCH collection, the type
+        # can't be changed in place so switching it replaces the collection
+        collection_type = env_params.get('collection_type', 'SEARCH')
         lambda_role_arn = f"arn:aws:iam::{account_id}:role/{env_params['lambda_role_name']}_{region}"
         
         # Create OpenSearch collection
@@ -25,7 +28,7 @@ class OpensearchVectorDbStack(Stack):
             self, 
             f"property-collection-{env_name}",
             name=collection_name,
-            type="SEARCH",
+            type=collection_type,
             description="Collection for storing luxury property data"
         )
 
@@ -44,6 +44,7 @@ class PropLayerStack(Stack):
                 "addtional_libs_layer_name": _codebuild.BuildEnvironmentVariable(value = addtional_libs_layer_name),
                 "account_id" : _codebuild.BuildEnvironmentVariable(value = account_id),
                 "region": _codebuild.BuildEnvironmentVariable(value = region),
+                "vector_search": _codebuild.BuildEnvironmentVariable(value = config_details.get("vector_search", "false")),
                 
             })
         )
@@ -0,0 +1,76 @@
+"""Record the stays of existing confirmed bookings on their property documents.
+
+Search filters on check_in/check_out use the booked_ranges kept on each
+property document (property_common.availability_index). New bookings record
+their stay when they are made; run this once per environment after deploying
+that change, and after migrating to a new index version, so bookings made
+before it also hide their properties from search:
+
+    python scripts/backfill_booked_ranges.py --env dev --endpoint <collection endpoint> [--dry-run]
+
+Only bookings that have not ended yet are recorded. Re-running is safe, a
+stay is recorded at most once per booking id.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from opensearchpy import helpers
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'artifacts', 'property_lambda'))
+
+from property_common import availability_index, clients  # noqa: E402
+
+
+def upcoming_bookings(table, now):
+    scan_args = {
+        'FilterExpression': Attr('status').eq('confirmed') & Attr('check_out').gt(now),
+        'ProjectionExpression': 'booking_id, property_id, check_in, check_out, #s',
+        'ExpressionAttributeNames': {'#s': 'status'}
+    }
+    while True:
+        response = table.scan(**scan_args)
+        for booking in response.get('Items', []):
+            yield booking
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--env', required=True, help='environment name from cdk.json')
+    parser.add_argument('--endpoint', required=True, help='OpenSearch collection endpoint')
+    parser.add_argument('--region', default=os.getenv('CDK_DEFAULT_REGION'))
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT_DIR, 'cdk.json')) as f:
+        env_params = json.load(f)['context'][args.env]
+    os.environ['OPENSEARCH_ENDPOINT'] = args.endpoint.replace('https://', '')
+    if args.region:
+        os.environ['REGION'] = args.region
+
+    now = int(time.time())
+    table = boto3.resource('dynamodb', region_name=args.region).Table(env_params['bookings_table_name'])
+    actions = [
+        {'_op_type': 'update', '_index': env_params['index_name'], '_id': booking['property_id'],
+         'script': availability_index.booking_script(booking, now), 'retry_on_conflict': availability_index.UPDATE_RETRIES}
+        for booking in upcoming_bookings(table, now)
+    ]
+    print(f"found {len(actions)} upcoming confirmed bookings")
+    if args.dry_run or not actions:
+        return
+    recorded, errors = helpers.bulk(clients.get_opensearch_client(), actions, raise_on_error=False)
+    for error in errors:
+        print(f"failed: {json.dumps(error, default=str)}")
+    print(f"recorded {recorded} bookings, {len(errors)} failed")
+
+
+if __name__ == '__main__':
+    main()
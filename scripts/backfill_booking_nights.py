@@ -0,0 +1,81 @@
+"""Claim the nights of bookings created before the nights table existed.
+
+New bookings claim their nights transactionally in property_booking.nights.
+Run this once per environment after deploying that change so older confirmed
+bookings also block their dates:
+
+    python scripts/backfill_booking_nights.py --env dev [--dry-run]
+"""
+import argparse
+import json
+import os
+import sys
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'artifacts', 'property_lambda'))
+
+from property_booking.nights import stay_nights  # noqa: E402
+
+
+def load_env_params(env_name):
+    with open(os.path.join(ROOT_DIR, 'cdk.json')) as f:
+        return json.load(f)['context'][env_name]
+
+
+def confirmed_bookings(table):
+    scan_args = {'FilterExpression': Attr('status').eq('confirmed')}
+    while True:
+        response = table.scan(**scan_args)
+        for booking in response.get('Items', []):
+            yield booking
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def claim_nights(nights_table, booking, dry_run):
+    # Returns the nights already claimed by a different booking
+    conflicts = []
+    for night in stay_nights(int(booking['check_in']), int(booking['check_out'])):
+        if dry_run:
+            continue
+        try:
+            nights_table.put_item(
+                Item={'property_id': booking['property_id'], 'night': night, 'booking_id': booking['booking_id']},
+                ConditionExpression='attribute_not_exists(night) OR booking_id = :booking_id',
+                ExpressionAttributeValues={':booking_id': booking['booking_id']}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            conflicts.append(night)
+    return conflicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--env', required=True, help='environment name from cdk.json')
+    parser.add_argument('--region', default=os.getenv('CDK_DEFAULT_REGION'))
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    env_params = load_env_params(args.env)
+    dynamodb = boto3.resource('dynamodb', region_name=args.region)
+    table = dynamodb.Table(env_params['bookings_table_name'])
+    nights_table = dynamodb.Table(env_params['booking_nights_table_name'])
+
+    claimed = 0
+    for booking in confirmed_bookings(table):
+        conflicts = claim_nights(nights_table, booking, args.dry_run)
+        claimed += 1
+        if conflicts:
+            print(f"booking={booking['booking_id']} property={booking['property_id']} double_booked_nights={conflicts}")
+    print(f"processed {claimed} confirmed bookings")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Create or migrate the property index behind the INDEX_NAME alias.
+
+Creates <index_name>_v<PROPERTY_INDEX_VERSION> with the explicit mapping from
+property_common.index_mapping. Documents are copied from whatever the alias
+(or a legacy concrete index of the same name) currently points at, then the
+alias is swapped atomically. Safe to re-run; it does nothing once the alias
+points at the current version.
+
+    python scripts/bootstrap_property_index.py --env dev --endpoint <collection endpoint>
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'artifacts', 'property_lambda'))
+
+from property_common import clients, index_mapping  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--env', required=True, help='environment name from cdk.json')
+    parser.add_argument('--endpoint', required=True, help='OpenSearch collection endpoint')
+    parser.add_argument('--region', default=os.getenv('CDK_DEFAULT_REGION'))
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT_DIR, 'cdk.json')) as f:
+        env_params = json.load(f)['context'][args.env]
+    os.environ['OPENSEARCH_ENDPOINT'] = args.endpoint.replace('https://', '')
+    if args.region:
+        os.environ['REGION'] = args.region
+
+    result = index_mapping.migrate_property_index(clients.get_opensearch_client(), env_params['index_name'])
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
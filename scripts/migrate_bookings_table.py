@@ -0,0 +1,78 @@
+"""Copy bookings from the legacy table into the consolidated bookings table.
+
+The legacy table carried five ALL-projection indexes. The new table uses the
+two-index layout in property_booking/booking_keys.py, and every item needs
+numeric check_in/check_out plus the derived stay_key. Items already present in
+the new table are left untouched, so the script can be re-run safely.
+
+    python scripts/migrate_bookings_table.py --env dev [--dry-run]
+"""
+import argparse
+import json
+import os
+import sys
+from decimal import Decimal
+
+import boto3
+from botocore.exceptions import ClientError
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'artifacts', 'property_lambda'))
+
+from property_booking.booking_keys import with_keys  # noqa: E402
+
+
+def scan_all(table):
+    scan_args = {}
+    while True:
+        response = table.scan(**scan_args)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def migrate_item(item):
+    # Older items may carry string dates, the new index keys need numbers
+    for field in ('check_in', 'check_out'):
+        item[field] = Decimal(int(Decimal(str(item[field]))))
+    item.setdefault('status', 'confirmed')
+    return with_keys(item)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--env', required=True, help='environment name from cdk.json')
+    parser.add_argument('--region', default=os.getenv('CDK_DEFAULT_REGION'))
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT_DIR, 'cdk.json')) as f:
+        env_params = json.load(f)['context'][args.env]
+    dynamodb = boto3.resource('dynamodb', region_name=args.region)
+    legacy_table = dynamodb.Table(env_params['legacy_bookings_table_name'])
+    table = dynamodb.Table(env_params['bookings_table_name'])
+
+    counts = {'copied': 0, 'existing': 0, 'invalid': 0}
+    for item in scan_all(legacy_table):
+        try:
+            item = migrate_item(item)
+        except (KeyError, ValueError, ArithmeticError) as e:
+            counts['invalid'] += 1
+            print(f"skipping booking={item.get('booking_id')} error={e!r}")
+            continue
+        if args.dry_run:
+            counts['copied'] += 1
+            continue
+        try:
+            table.put_item(Item=item, ConditionExpression='attribute_not_exists(booking_id)')
+            counts['copied'] += 1
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            counts['existing'] += 1
+    print(json.dumps(counts))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Tests import the Lambda packages the way the Lambda runtime does, from
+# artifacts/property_lambda.
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT_DIR, 'artifacts', 'property_lambda')
+
+if LAMBDA_DIR not in sys.path:
+    sys.path.insert(0, LAMBDA_DIR)
+
+
+class BulkClient:
+    # Stands in for the OpenSearch client in helpers.streaming_bulk. statuses
+    # maps a document id to the statuses it gets on successive attempts, the
+    # last one repeating, and every request body is recorded.
+    def __init__(self, statuses):
+        from opensearchpy.serializer import JSONSerializer
+
+        self.statuses = {doc_id: list(values) for doc_id, values in statuses.items()}
+        self.transport = type('Transport', (), {'serializer': JSONSerializer()})()
+        self.requests = []
+
+    def _status(self, doc_id):
+        values = self.statuses.get(doc_id, [200])
+        return values.pop(0) if len(values) > 1 else values[0]
+
+    def bulk(self, body, **kwargs):
+        lines = [json.loads(line) for line in body.splitlines() if line]
+        self.requests.append(lines)
+        items = []
+        # Action lines alternate with their sources
+        for action in lines[::2]:
+            op_type, meta = next(iter(action.items()))
+            status = self._status(str(meta['_id']))
+            item = {'_index': meta.get('_index'), '_id': str(meta['_id']), 'status': status}
+            if status >= 300:
+                item['error'] = {'type': 'rejected' if status == 429 else 'mapper_parsing_exception'}
+            items.append({op_type: item})
+        return {'errors': any(item[next(iter(item))]['status'] >= 300 for item in items), 'items': items}
+
+
+@pytest.fixture
+def bulk_client(monkeypatch):
+    # Factory for BulkClient, with streaming_bulk's retry backoff disabled
+    from opensearchpy.helpers import actions
+
+    monkeypatch.setattr(actions.time, 'sleep', lambda seconds: None)
+    return BulkClient
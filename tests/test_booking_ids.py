@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from property_booking import booking_ids
+
+NOW_MS = 1767225600000  # 2026-01-01T00:00:00Z
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(booking_ids, '_last_ms', 0)
+    monkeypatch.setattr(booking_ids, '_last_random', 0)
+
+
+def test_encode_decode_round_trip():
+    for value in [0, 1, 31, 32, NOW_MS << 80, (1 << 128) - 1]:
+        encoded = booking_ids._encode(value, booking_ids.ULID_LENGTH)
+        assert len(encoded) == booking_ids.ULID_LENGTH
+        assert set(encoded) <= set(booking_ids.ENCODING)
+        assert booking_ids._decode(encoded) == value
+        assert booking_ids._decode(encoded.lower()) == value
+
+
+def test_ulid_carries_its_timestamp():
+    ulid = booking_ids.new_ulid(NOW_MS)
+
+    assert len(ulid) == booking_ids.ULID_LENGTH
+    assert booking_ids._decode(ulid) >> 80 == NOW_MS
+    parsed = booking_ids.parse_booking_id(booking_ids.PREFIX + ulid)
+    assert parsed.kind == 'ulid'
+    assert parsed.created_at == datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_ulids_increase_within_a_millisecond_and_when_the_clock_goes_back():
+    ids = [booking_ids.new_ulid(NOW_MS) for _ in range(1000)]
+    ids += [booking_ids.new_ulid(NOW_MS - 5) for _ in range(10)]
+    ids.append(booking_ids.new_ulid(NOW_MS + 1))
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert {booking_ids._decode(ulid) >> 80 for ulid in ids[:-1]} == {NOW_MS}
+
+
+def test_ulid_random_overflow_moves_to_the_next_millisecond(monkeypatch):
+    monkeypatch.setattr(booking_ids, '_last_ms', NOW_MS)
+    monkeypatch.setattr(booking_ids, '_last_random', (1 << 80) - 2)
+    last = booking_ids.new_ulid(NOW_MS)
+
+    wrapped = booking_ids.new_ulid(NOW_MS)
+
+    assert wrapped > last
+    assert booking_ids._decode(wrapped) >> 80 == NOW_MS + 1
+
+
+def test_min_booking_id_bounds_ids_from_that_time():
+    created_at = datetime.fromtimestamp(NOW_MS / 1000, tz=timezone.utc)
+    before = booking_ids.PREFIX + booking_ids.new_ulid(NOW_MS - 1)
+    at = booking_ids.PREFIX + booking_ids.new_ulid(NOW_MS)
+
+    assert before < booking_ids.min_booking_id(created_at) <= at
+    assert booking_ids.min_booking_id(created_at + timedelta(milliseconds=1)) > at
+
+
+def test_parse_legacy_id():
+    parsed = booking_ids.parse_booking_id('booking_20240131235959')
+
+    assert parsed.kind == 'legacy'
+    assert parsed.created_at == datetime(2024, 1, 31, 23, 59, 59, tzinfo=timezone.utc)
+
+
+def test_new_booking_id_is_prefixed():
+    booking_id = booking_ids.new_booking_id()
+
+    assert booking_id.startswith(booking_ids.PREFIX)
+    assert booking_ids.parse_booking_id(booking_id).kind == 'ulid'
+
+
+@pytest.mark.parametrize('booking_id', [None, '', 'reservation_20240131235959', 'booking_',
+                                        'booking_2024013123595', 'booking_20241331235959',
+                                        'booking_01ARZ3NDEKTSV4RRFFQ69G5FAU', 'booking_01ARZ3NDEKTSV4RRFFQ69G5FA'])
+def test_parse_rejects_invalid_ids(booking_id):
+    with pytest.raises(ValueError):
+        booking_ids.parse_booking_id(booking_id)
@@ -0,0 +1,20 @@
+from property_indexing import booking_sync
+
+
+def _record(sequence_number, property_id, booking_id):
+    image = {'property_id': {'S': property_id}, 'booking_id': {'S': booking_id}, 'status': {'S': 'confirmed'},
+             'check_in': {'N': '1893456000'}, 'check_out': {'N': '1893628800'}}
+    return {'eventName': 'INSERT', 'dynamodb': {'SequenceNumber': sequence_number, 'NewImage': image}}
+
+
+def test_failures_name_the_failed_property_after_a_retry(bulk_client, monkeypatch):
+    # p1 is rejected once and retried after the others, p3 fails for good
+    client = bulk_client({'p1': [429, 200], 'p3': [400]})
+    monkeypatch.setattr(booking_sync.clients, 'get_opensearch_client', lambda: client)
+    monkeypatch.setenv('INDEX_NAME', 'properties')
+    records = [_record('100', 'p1', 'b1'), _record('200', 'p2', 'b2'), _record('300', 'p3', 'b3'),
+               _record('400', 'p3', 'b4')]
+
+    response = booking_sync.handler({'Records': records}, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': '300'}, {'itemIdentifier': '400'}]}
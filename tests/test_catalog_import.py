@@ -0,0 +1,127 @@
+import io
+
+import pytest
+from botocore.exceptions import ClientError
+
+from property_indexing import catalog_import
+
+CATALOG = (b'title,location,bedrooms\r\n'
+           b'Villa,Nice,3\r\n'
+           b'Loft,Paris,x\r\n'
+           b'\r\n'
+           b'Chalet,Zermatt,4\n'
+           b'Cabin,Oslo,2\n'
+           b'Riad,Marrakesh,5')
+
+
+class S3:
+    # In-memory S3 with the calls catalog_import makes
+    def __init__(self, objects):
+        self.objects = dict(objects)
+        self.ranges = []
+
+    def head_object(self, Bucket, Key):
+        return {'ETag': '"v1"', 'ContentLength': len(self.objects[Key])}
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        body = self.objects[Key]
+        if Range:
+            start, end = (int(value) for value in Range[len('bytes='):].split('-'))
+            self.ranges.append((start, end))
+            body = body[start:end + 1]
+        return {'Body': io.BytesIO(body)}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.objects[Key] = Body
+
+
+class Context:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def _lines(data, offset, chunk_bytes, monkeypatch):
+    monkeypatch.setattr(catalog_import, 'READ_CHUNK_BYTES', chunk_bytes)
+    s3 = S3({'catalog.csv': data})
+    return list(catalog_import.iter_lines(s3, {'bucket': 'b', 'key': 'catalog.csv'}, '"v1"', offset, len(data)))
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 3, 7, 16, 1024])
+def test_iter_lines_ends_at_the_offset_after_each_line(chunk_bytes, monkeypatch):
+    lines = _lines(CATALOG, 0, chunk_bytes, monkeypatch)
+
+    assert [line for line, _ in lines] == CATALOG.split(b'\n')
+    for line, line_end in lines[:-1]:
+        assert CATALOG[line_end - len(line) - 1:line_end] == line + b'\n'
+    assert lines[-1][1] == len(CATALOG)
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 5, 1024])
+def test_iter_lines_resumes_from_a_line_end(chunk_bytes, monkeypatch):
+    lines = _lines(CATALOG, 0, chunk_bytes, monkeypatch)
+
+    for position, (_, line_end) in enumerate(lines):
+        assert _lines(CATALOG, line_end, chunk_bytes, monkeypatch) == lines[position + 1:]
+
+
+def test_iter_lines_with_trailing_newline(monkeypatch):
+    assert _lines(b'a\nbc\n', 0, 2, monkeypatch) == [(b'a', 2), (b'bc', 5)]
+
+
+def test_flush_reports_errors_against_their_line(bulk_client):
+    # Line 2 is rejected once and reported after line 3, line 3 fails
+    client = bulk_client({'p2': [429, 200], 'p3': [400]})
+    checkpoint = {'indexed': 0, 'failed': 0, 'errors': []}
+    batch = [(2, {'property_id': 'p2', 'title': 'A'}), (3, {'property_id': 'p3', 'title': 'B'}),
+             (5, {'property_id': 'p5', 'title': 'C'})]
+
+    catalog_import._flush(client, 'properties', checkpoint, batch)
+
+    assert checkpoint['indexed'] == 2
+    assert checkpoint['failed'] == 1
+    assert [error['line'] for error in checkpoint['errors']] == [3]
+    assert batch == []
+
+
+def test_import_resumes_from_its_checkpoint(bulk_client, monkeypatch):
+    s3 = S3({'properties/imports/catalog.csv': CATALOG})
+    client = bulk_client({})
+    continued = []
+    invalidations = []
+    monkeypatch.setattr(catalog_import, 'READ_CHUNK_BYTES', 8)
+    monkeypatch.setattr(catalog_import, 'BATCH_DOCUMENTS', 2)
+    monkeypatch.setattr(catalog_import.clients, 'get_s3_client', lambda: s3)
+    monkeypatch.setattr(catalog_import.clients, 'get_opensearch_client', lambda: client)
+    monkeypatch.setattr(catalog_import.index_mapping, 'ensure_property_index', lambda client, index_name: None)
+    monkeypatch.setattr(catalog_import.search_cache, 'invalidate', lambda: invalidations.append(len(client.requests)))
+    monkeypatch.setattr(catalog_import, '_continue_later', lambda context, job: continued.append(job))
+    monkeypatch.setenv('INDEX_NAME', 'properties')
+    job = {'bucket': 'b', 'key': 'properties/imports/catalog.csv'}
+
+    # Out of time after the first batch: the import checkpoints and hands over
+    first = catalog_import.run_import(job, Context(0))
+    assert continued == [job]
+    assert not first['done']
+    assert first['indexed'] == 2
+    assert first['offset'] == CATALOG.index(b'Cabin')
+    # Searches see the first batch before the next invocation starts
+    assert invalidations == [1]
+
+    last = catalog_import.run_import(job, Context(10 ** 6))
+    assert last['done']
+    assert last['indexed'] == 4
+    assert last['failed'] == 1
+    assert last['errors'][0]['line'] == 3
+    assert last['line'] == 7
+    # Once per invocation, not once per batch
+    assert invalidations == [1, 2]
+    indexed = [source['script']['params']['doc']['title'] for request in client.requests for source in request[1::2]]
+    assert indexed == ['Villa', 'Chalet', 'Cabin', 'Riad']
+
+    # A finished import isn't run again
+    assert catalog_import.run_import(job, None) == last
@@ -0,0 +1,20 @@
+import pytest
+
+from property_search import geo
+
+
+def _precision(aggregation):
+    return aggregation['clusters']['geohash_grid']['precision']
+
+
+def test_cluster_aggregation_precision():
+    assert _precision(geo.cluster_aggregation(True)) == geo.DEFAULT_CLUSTER_PRECISION
+    assert _precision(geo.cluster_aggregation({})) == geo.DEFAULT_CLUSTER_PRECISION
+    assert _precision(geo.cluster_aggregation({'precision': '7'})) == 7
+    assert _precision(geo.cluster_aggregation({'precision': 40})) == 12
+
+
+@pytest.mark.parametrize('clusters', [1, 'yes', ['precision'], {'precision': 'fine'}, {'precision': None}])
+def test_cluster_aggregation_rejects_invalid_input(clusters):
+    with pytest.raises(geo.InvalidGeoQuery):
+        geo.cluster_aggregation(clusters)
@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from property_indexing import index
+
+
+@pytest.mark.parametrize('body,expected', [
+    ('[{"title": "A"}, {"title": "B"}]', [{'title': 'A'}, {'title': 'B'}]),
+    ('{"properties": [{"title": "A"}]}', [{'title': 'A'}]),
+    ('{"title": "A"}', [{'title': 'A'}]),
+    ('{"title": "A"}\n\n{"title": "B"}\n', [{'title': 'A'}, {'title': 'B'}]),
+])
+def test_parse_bulk_body_formats(body, expected):
+    assert index.parse_bulk_body(body) == expected
+
+
+@pytest.mark.parametrize('body', ['{"properties": {"title": "A"}}', '{"properties": "villa"}', '["A", "B"]',
+                                  '[{"title": "A"}, 5]', '42', '{"title": "A"}\n5', 'not json'])
+def test_parse_bulk_body_rejects_non_objects(body):
+    with pytest.raises(ValueError):
+        index.parse_bulk_body(body)
+
+
+def test_bulk_index_rejects_a_non_list_payload_with_a_400():
+    response = index.bulk_index_property({'body': json.dumps({'properties': {'title': 'A'}})})
+
+    assert response['statusCode'] == 400
+    assert 'Invalid bulk payload' in json.loads(response['body'])['error']
@@ -0,0 +1,55 @@
+from property_common import indexing
+
+
+def test_bulk_index_matches_retried_outcomes_by_id(bulk_client):
+    # a is rejected once and retried after the rest of the chunk, c fails
+    client = bulk_client({'a': [429, 200], 'c': [400]})
+    properties = [{'property_id': 'a', 'title': 'A'}, {'property_id': 'b', 'title': 'B'},
+                  {'property_id': 'c', 'title': 'C'}, {'title': ''}]
+
+    results = indexing.bulk_index_properties(client, 'properties', properties)
+
+    assert len(client.requests) == 2
+    assert [result['position'] for result in results] == [0, 1, 2, 3]
+    assert results[0] == {'position': 0, 'property_id': 'a', 'status': 200}
+    assert results[1] == {'position': 1, 'property_id': 'b', 'status': 200}
+    assert results[2]['property_id'] == 'c'
+    assert results[2]['status'] == 400
+    assert 'mapper_parsing_exception' in results[2]['error']
+    assert results[3] == {'position': 3, 'status': 400, 'error': 'Property title is required'}
+
+
+
+def test_bulk_index_matches_numeric_ids(bulk_client):
+    client = bulk_client({'7': [429, 400]})
+    properties = [{'property_id': 7, 'title': 'Seven'}, {'property_id': 8, 'title': 'Eight'}]
+
+    results = indexing.bulk_index_properties(client, 'properties', properties)
+
+    assert [(result['property_id'], result['status']) for result in results] == [(7, 400), (8, 200)]
+
+
+def test_bulk_index_sends_each_document_once(bulk_client):
+    client = bulk_client({})
+
+    indexing.bulk_index_properties(client, 'properties', [{'property_id': 'a', 'title': 'A'}])
+
+    action, source = client.requests[0]
+    assert action['update']['_id'] == 'a'
+    assert source['scripted_upsert'] is True
+    assert source['upsert'] == {}
+    assert source['script']['params']['doc']['title'] == 'A'
+
+
+def test_bulk_index_keeps_falsy_ids_and_rejects_empty_ones(bulk_client):
+    client = bulk_client({})
+    properties = [{'property_id': 0, 'title': 'Zero'}, {'property_id': '', 'title': 'Empty'},
+                  {'property_id': ' ', 'title': 'Blank'}, {'property_id': ['a'], 'title': 'List'},
+                  {'title': 'New'}]
+
+    results = indexing.bulk_index_properties(client, 'properties', properties)
+
+    assert results[0] == {'position': 0, 'property_id': 0, 'status': 200}
+    assert [result['status'] for result in results[1:4]] == [400, 400, 400]
+    assert results[4]['status'] == 200
+    assert results[4]['property_id']
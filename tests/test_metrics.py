@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from property_common import metrics
+
+
+@pytest.fixture
+def emitted(monkeypatch, capsys, caplog):
+    # Runs an instrumented handler and returns (EMF records, metrics log lines)
+    monkeypatch.setattr(metrics, 'METRICS_FORMAT', 'emf')
+
+    def run(response, sampled, slow=False):
+        monkeypatch.setattr(metrics.random, 'random', lambda: 0.0 if sampled else 0.99)
+        monkeypatch.setattr(metrics, 'METRICS_SLOW_MS', 0 if slow else 60000)
+        caplog.clear()
+        capsys.readouterr()
+
+        @metrics.instrument('test')
+        def handler(event, context):
+            with metrics.phase('work'):
+                pass
+            return response
+
+        with caplog.at_level('INFO'):
+            handler({'httpMethod': 'GET', 'resource': '/properties/{property_id}'}, None)
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        lines = [record.getMessage() for record in caplog.records if 'method=metrics' in record.getMessage()]
+        return records, lines
+    return run
+
+
+def test_unsampled_requests_are_not_written(emitted):
+    assert emitted({'statusCode': 200}, sampled=False) == ([], [])
+
+
+def test_sampled_requests_publish_metrics(emitted):
+    records, lines = emitted({'statusCode': 200}, sampled=True)
+
+    assert lines == []
+    assert len(records) == 1
+    assert records[0]['sample_rate'] == metrics.METRICS_SAMPLE_RATE
+    assert records[0]['endpoint'] == 'GET /properties/{property_id}'
+    assert 'work_ms' in records[0]
+    assert records[0]['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [['function', 'endpoint']]
+
+
+@pytest.mark.parametrize('response,slow', [({'statusCode': 500}, False), ({'statusCode': 200}, True)])
+def test_forced_requests_are_logged_without_metrics(emitted, response, slow):
+    records, lines = emitted(response, sampled=False, slow=slow)
+
+    assert records == []
+    assert len(lines) == 1
+    assert 'sample_rate=1.0' in lines[0]
+    assert '_aws' not in lines[0]
+
+
+def test_sampled_errors_are_published_and_logged(emitted):
+    records, lines = emitted({'statusCode': 503}, sampled=True)
+
+    assert [record['sample_rate'] for record in records] == [metrics.METRICS_SAMPLE_RATE]
+    assert len(lines) == 1
+    assert 'sample_rate=1.0' in lines[0]
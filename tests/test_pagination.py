@@ -0,0 +1,17 @@
+import pytest
+
+from property_search import pagination
+
+
+def test_cursor_round_trip():
+    cursor = pagination.encode_cursor([120.5, 'p1'], 'pit-id')
+
+    assert pagination.decode_cursor(cursor) == ([120.5, 'p1'], 'pit-id')
+    assert pagination.decode_cursor(None) == (None, None)
+
+
+@pytest.mark.parametrize('cursor', [42, ['after'], {'after': [1]}, True, 'not a cursor', 'é',
+                                    pagination.encode_cursor('p1')])
+def test_decode_cursor_rejects_invalid_cursors(cursor):
+    with pytest.raises(pagination.InvalidCursor):
+        pagination.decode_cursor(cursor)
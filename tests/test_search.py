@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+
+from property_common import aio
+from property_search import search
+
+
+def test_cached_treats_a_slow_generation_read_as_a_miss(monkeypatch):
+    monkeypatch.setattr(search, 'SEARCH_CACHE_TIMEOUT', 0.05)
+    monkeypatch.setattr(search.search_cache, 'cache_key', lambda request: time.sleep(0.5) or 'key')
+
+    start = time.perf_counter()
+    assert aio.run(search.cached({'query': 'villa'})) == (None, None, None)
+    assert time.perf_counter() - start < 0.4
+
+
+def test_cached_treats_a_slow_entry_read_as_a_miss(monkeypatch):
+    monkeypatch.setattr(search, 'SEARCH_CACHE_TIMEOUT', 0.05)
+    monkeypatch.setattr(search.search_cache, 'cache_key', lambda request: 'key')
+    monkeypatch.setattr(search.search_cache, 'get', lambda key: time.sleep(0.5) or ({'hits': []}, 'shared'))
+
+    assert aio.run(search.cached({'query': 'villa'})) == ('key', None, None)
+
+
+def test_cached_returns_hits(monkeypatch):
+    monkeypatch.setattr(search.search_cache, 'cache_key', lambda request: 'key')
+    monkeypatch.setattr(search.search_cache, 'get', lambda key: ({'hits': []}, 'local'))
+
+    assert aio.run(search.cached({'query': 'villa'})) == ('key', {'hits': []}, 'local')
+    assert aio.run(search.cached(None)) == (None, None, None)
+
+
+def test_build_filters_maps_known_filters():
+    conditions = search.build_filters({'amenities': 'Pool', 'location': 'Nice', 'bedrooms': {'min': 2, 'max': 4}})
+
+    assert {'term': {'amenities.keyword': 'Pool'}} in conditions
+    assert {'term': {'location.keyword': 'Nice'}} in conditions
+    assert {'range': {'bedrooms': {'gte': 2, 'lte': 4}}} in conditions
+
+
+@pytest.mark.parametrize('filters', [{'amenity': 'pool'}, {'location': 'Nice', 'colour': 'red'}, ['location'], 'Nice'])
+def test_build_filters_rejects_unknown_filters(filters):
+    with pytest.raises(search.InvalidFilter):
+        search.build_filters(filters)
+
+
+def test_search_rejects_unknown_filters_with_a_400():
+    event = {'body': json.dumps({'query': 'villa', 'filters': {'locaton': 'Nice'}})}
+
+    response = aio.run(search.search_properties(event, None, 'properties'))
+
+    assert response['statusCode'] == 400
+    assert 'locaton' in json.loads(response['body'])['error']